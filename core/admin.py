@@ -1,8 +1,192 @@
+import datetime
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
-from django.http import HttpResponse
-import csv
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db.models import Max, Min, Q, QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
 
+from .export import stream_csv
 from .models import Room, Teacher, Class, Student, Enrollment, Attendance
+from .pagination import estimate_table_rows
+from .search import search_classes, search_students
+
+
+# -------------------------------
+# Listados grandes
+# -------------------------------
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Filtro por FK con un buscador (el autocompletado del admin) en lugar de
+    una opción por fila: no carga la tabla relacionada entera. El modelo
+    relacionado necesita search_fields en su admin.
+    """
+    template = "admin/core/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        super().__init__(field, request, params, model, model_admin, field_path)
+        value = self.used_parameters.get(self.lookup_kwarg)
+        widget = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            required=False,
+            widget=AutocompleteSelect(field, model_admin.admin_site, attrs={
+                "class": "autocomplete-filter", "data-width": "100%",
+            }),
+        ).widget
+        self.rendered = widget.render(self.lookup_kwarg, value[-1] if value else None)
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.lookup_kwarg not in self.used_parameters,
+            "query_string": changelist.get_query_string(remove=[self.lookup_kwarg]),
+            "display": "Todos",
+        }
+
+
+class MethodFilter(admin.SimpleListFilter):
+    """Opciones fijas: evita el SELECT DISTINCT sobre toda la tabla del filtro por valores."""
+    title = "método"
+    parameter_name = "method"
+
+    def lookups(self, request, model_admin):
+        return [("qr", "QR"), ("web", "Web"), ("kiosk", "Kiosco")]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(method=self.value())
+        return queryset
+
+
+class TokenSearchMixin:
+    """
+    Búsqueda del admin por el índice de core.search (prefijos de palabra, sin
+    acentos) en lugar de ``icontains`` sobre cada campo de search_fields.
+    Cada admin indica en ``token_search`` la función (término, queryset) →
+    queryset, p. ej. ``staticmethod(search_students)``; sin ella se usa la
+    búsqueda normal del admin.
+    """
+
+    token_search = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if self.token_search is None:
+            return super().get_search_results(request, queryset, search_term)
+        if not search_term.strip():
+            return queryset, False
+        return self.token_search(search_term, queryset), False
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Sin filtros, el total es una estimación (core.pagination) en lugar de un
+    COUNT(*) de toda la tabla. Por debajo de ADMIN_EXACT_COUNT_LIMIT filas se
+    cuenta de verdad.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is not None and not query.where:
+            estimate = estimate_table_rows(self.object_list.model)
+            if estimate >= settings.ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class IndexedDatesQuerySet(QuerySet):
+    """
+    ``dates()``/``datetimes()`` para la jerarquía de fechas sin el DISTINCT
+    sobre todas las filas: salta de periodo en periodo con la primera fila
+    ``>= inicio``, una búsqueda en el índice por cada año, mes o día con datos.
+
+    ``date_field`` es el campo de ``date_hierarchy``; sus extremos salen de
+    ``date_bounds``, dos lecturas del índice en vez de MIN y MAX juntos (que en
+    SQLite recorren todo el índice).
+    """
+    date_field = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone.date_field = self.date_field
+        return clone
+
+    def aggregate(self, *args, **kwargs):
+        # Es la consulta de la plantilla date_hierarchy cuando no hay año elegido
+        field = self.date_field
+        if field and not args and kwargs == {"first": Min(field), "last": Max(field)}:
+            return self.date_bounds(field)
+        return super().aggregate(*args, **kwargs)
+
+    def date_bounds(self, field_name):
+        qs = self.order_by()
+        last = qs.order_by(f"-{field_name}").values_list(field_name, flat=True).first()
+        return {"first": self._first(qs, field_name), "last": last}
+
+    def dates(self, field_name, kind, order="ASC"):
+        if kind not in ("year", "month", "day"):
+            return super().dates(field_name, kind, order)
+        return self._periods(field_name, kind, order, lambda value: value)
+
+    def datetimes(self, field_name, kind, order="ASC", tzinfo=None):
+        if kind not in ("year", "month", "day"):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        tzinfo = tzinfo or (timezone.get_current_timezone() if settings.USE_TZ else None)
+        return self._periods(
+            field_name, kind, order, lambda value: timezone.localtime(value, tzinfo) if tzinfo else value
+        )
+
+    def _periods(self, field_name, kind, order, local):
+        qs = self.order_by()
+        found = []
+        current = self._first(qs, field_name)
+        while current is not None:
+            period = _period_start(local(current), kind)
+            found.append(period)
+            # El límite nuevo va delante en el WHERE: SQLite acota el recorrido del
+            # índice con el primer ">=" que encuentra, no con el más restrictivo
+            after = self.model._default_manager.filter(**{f"{field_name}__gte": _next_period(period, kind)})
+            current = self._first(after & qs, field_name)
+        return found if order == "ASC" else found[::-1]
+
+    @staticmethod
+    def _first(qs, field_name):
+        # ORDER BY ... LIMIT 1 en lugar de MIN(): se detiene en la primera entrada del índice
+        return qs.order_by(field_name).values_list(field_name, flat=True).first()
+
+
+def _period_start(value, kind):
+    if isinstance(value, datetime.datetime):
+        value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if kind == "year":
+        return value.replace(month=1, day=1)
+    if kind == "month":
+        return value.replace(day=1)
+    return value
+
+
+def _next_period(start, kind):
+    if kind == "year":
+        return start.replace(year=start.year + 1)
+    if kind == "month":
+        return (start + datetime.timedelta(days=32)).replace(day=1)
+    return start + datetime.timedelta(days=1)
+
+
+def _by_student_or_class(search_term, queryset):
+    """Filas (matrículas, asistencias) cuyo alumno o clase encaja con el término."""
+    return queryset.filter(
+        Q(student__in=search_students(search_term).values("pk"))
+        | Q(clazz__in=search_classes(search_term).values("pk"))
+    )
+
 
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
@@ -19,45 +203,74 @@ class ClassAdmin(admin.ModelAdmin):
     list_display = ['name', 'room', 'teacher', 'weekday', 'start_time', 'end_time', 'capacity_override']
     list_filter = ['room', 'teacher', 'weekday']
     search_fields = ['name', 'teacher__first_name', 'teacher__last_name']
+    ordering = ['name']
 
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(TokenSearchMixin, admin.ModelAdmin):
     list_display = ['first_name', 'last_name', 'email', 'dni']
     search_fields = ['first_name', 'last_name', 'email', 'dni']
+    ordering = ['last_name', 'first_name']
+    token_search = staticmethod(search_students)
 
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(TokenSearchMixin, admin.ModelAdmin):
     list_display = ['student', 'clazz', 'status', 'created']
     list_filter = ['clazz', 'status']
+    list_select_related = ['student', 'clazz']
+    autocomplete_fields = ['student', 'clazz']
     search_fields = ['student__first_name', 'student__last_name', 'clazz__name']
+    token_search = staticmethod(_by_student_or_class)
 
 @admin.register(Attendance)
-class AttendanceAdmin(admin.ModelAdmin):
+class AttendanceAdmin(TokenSearchMixin, admin.ModelAdmin):
     list_display = ['student', 'clazz', 'date', 'check_in', 'check_out', 'method']
-    list_filter = ['clazz', 'student', 'date', 'method']
+    list_filter = [('clazz', AutocompleteFilter), ('student', AutocompleteFilter), 'date', MethodFilter]
     search_fields = ['student__first_name', 'student__last_name', 'clazz__name']
+    token_search = staticmethod(_by_student_or_class)
     readonly_fields = ['check_in']
+    # Tabla grande: filas con sus FK en la misma consulta, sin COUNT(*) total ni
+    # recuentos por opción de filtro. Jerarquía, rango de fechas y orden
+    # (-check_in, -pk) salen del mismo índice, attendance_checkin_idx
+    list_select_related = ['student', 'clazz']
+    autocomplete_fields = ['student', 'clazz']
+    date_hierarchy = 'check_in'
+    ordering = ['-check_in']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
 
     actions = ["export_as_csv"]
 
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        qs = IndexedDatesQuerySet(qs.model, query=qs.query, using=qs._db)
+        qs.date_field = self.date_hierarchy
+        return qs
+
+    @property
+    def media(self):
+        autocomplete = AutocompleteSelect(Attendance._meta.get_field("student"), self.admin_site).media
+        return super().media + autocomplete + forms.Media(js=["core/js/autocomplete_filter.js"])
+
     def export_as_csv(self, request, queryset):
         """
         Exportar asistencias seleccionadas a un archivo CSV
         """
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename=asistencias.csv'
-        writer = csv.writer(response)
-        writer.writerow(['Clase', 'Alumno', 'DNI', 'Fecha', 'Check-in', 'Check-out', 'Método'])
-        for a in queryset.select_related("student", "clazz"):
-            writer.writerow([
-                a.clazz.name,
-                f"{a.student.first_name} {a.student.last_name}",
-                a.student.dni,
-                a.date,
-                a.check_in.strftime("%Y-%m-%d %H:%M"),
-                a.check_out.strftime("%Y-%m-%d %H:%M") if a.check_out else "",
-                a.method,
-            ])
-        return response
+        rows = (
+            (
+                clazz_name, f"{first_name} {last_name}", dni, date,
+                check_in.strftime("%Y-%m-%d %H:%M"),
+                check_out.strftime("%Y-%m-%d %H:%M") if check_out else "",
+                method,
+            )
+            for clazz_name, first_name, last_name, dni, date, check_in, check_out, method in queryset.values_list(
+                "clazz__name", "student__first_name", "student__last_name", "student__dni",
+                "date", "check_in", "check_out", "method",
+            ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        )
+        return stream_csv(
+            request, "asistencias.csv",
+            ['Clase', 'Alumno', 'DNI', 'Fecha', 'Check-in', 'Check-out', 'Método'], rows,
+        )
 
     export_as_csv.short_description = "Exportar asistencias seleccionadas a CSV"
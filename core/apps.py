@@ -7,3 +7,4 @@ class CoreConfig(AppConfig):
     def ready(self):
         # Importa las señales para que se registren
         import core.signals  # noqa: F401
+        import core.metrics  # noqa: F401  (contador de consultas en cada conexión)
@@ -0,0 +1,96 @@
+"""
+Archivo de asistencias: Attendance (tabla caliente) guarda el curso actual
+y las asistencias cerradas de cursos anteriores pasan a ArchivedAttendance.
+
+- ``archive(before)`` mueve por lotes de ATTENDANCE_ARCHIVE_BATCH_SIZE filas
+  (INSERT ... SELECT en el archivo y DELETE en Attendance en la misma transacción),
+  conservando el id. Las asistencias abiertas se quedan donde están.
+- El resumen que queda son los rollups (ClassDayStats, StudentClassStats):
+  archivar no los toca, siguen cubriendo todo el histórico y son lo que
+  leen las estadísticas. ``rollups.rebuild`` lee las dos tablas.
+- La exportación CSV lee de ambas; el resto de la API (listados, check-in)
+  solo ve la tabla caliente.
+- ``table_sizes`` mide tabla e índices: dbstat en SQLite (páginas en uso,
+  sin contar las libres hasta un VACUUM), pg_*_size en PostgreSQL.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from .models import ArchivedAttendance, Attendance
+from .writes import write_transaction
+
+COLUMNS = ("id", "clazz_id", "student_id", "date", "check_in", "check_out", "method")
+
+
+def current_term_start(today=None):
+    """Inicio del curso actual según ATTENDANCE_TERM_STARTS (el más reciente que no sea futuro)."""
+    today = today or timezone.localdate()
+    starts = []
+    for value in settings.ATTENDANCE_TERM_STARTS:
+        month, day = (int(part) for part in value.strip().split("-"))
+        starts += [datetime.date(year, month, day) for year in (today.year - 1, today.year)]
+    return max(start for start in starts if start <= today)
+
+
+def archivable(before):
+    return Attendance.objects.filter(date__lt=before, check_out__isnull=False)
+
+
+def archive(before, batch_size=None, on_batch=None):
+    """Mueve las asistencias cerradas anteriores a ``before``. Devuelve las filas movidas."""
+    batch_size = batch_size or settings.ATTENDANCE_ARCHIVE_BATCH_SIZE
+    moved = 0
+    while True:
+        count = _archive_batch(before, batch_size)
+        if not count:
+            return moved
+        moved += count
+        if on_batch:
+            on_batch(moved)
+
+
+@write_transaction
+def _archive_batch(before, batch_size):
+    # Sin ORDER BY: SQLite toma las primeras del rango en attendance_date_idx
+    ids = list(archivable(before).values_list("pk", flat=True)[:batch_size])
+    if not ids:
+        return 0
+    # INSERT ... SELECT: las filas no pasan por Python (mismas columnas en ambas tablas)
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(column) for column in COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(ArchivedAttendance._meta.db_table)} ({columns}) "
+            f"SELECT {columns} FROM {quote(Attendance._meta.db_table)} "
+            f"WHERE id IN ({', '.join(['%s'] * len(ids))})",
+            ids,
+        )
+    # Attendance no tiene señales ni FK entrantes: un único DELETE
+    Attendance.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def table_sizes(model):
+    """Bytes de la tabla y de sus índices ({"table", "indexes"}), o None si el motor no lo permite."""
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(
+                    "SELECT m.type, SUM(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name "
+                    "WHERE m.tbl_name = %s GROUP BY m.type",
+                    [table],
+                )
+                sizes = dict(cursor.fetchall())
+                return {"table": sizes.get("table", 0), "indexes": sizes.get("index", 0)}
+            if connection.vendor == "postgresql":
+                cursor.execute("SELECT pg_relation_size(%s::regclass), pg_indexes_size(%s::regclass)", [table, table])
+                table_bytes, index_bytes = cursor.fetchone()
+                return {"table": table_bytes, "indexes": index_bytes}
+    except DatabaseError:
+        # p. ej. SQLite compilado sin SQLITE_ENABLE_DBSTAT_VTAB
+        return None
+    return None
@@ -0,0 +1,123 @@
+"""
+Check-in nativo async para el despliegue ASGI (uvicorn).
+
+Mismas rutas, parámetros y respuestas que ``attendance_checkin_qr`` y
+``ClassViewSet.checkin``, pero como vistas ``async def`` de Django (DRF no
+admite vistas async). Las lecturas usan el ORM async; la escritura de
+check-in/check-out es una transacción (plaza de aforo, asistencia y
+resúmenes) y el ORM async todavía no admite transacciones, así que se
+ejecuta con ``sync_to_async(thread_sensitive=False)`` en un hilo del pool,
+sin serializar el resto de peticiones del proceso. Esos hilos tienen su
+propia conexión, que Django no revisa al terminar la petición: ``_in_pool``
+la cierra como haría con la del hilo de la petición (CONN_MAX_AGE).
+
+Se activan con ASYNC_CHECKIN=True (ver core.urls y qrclassmanager/asgi.py).
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .cache import aresolve_class_token
+from .checkin import CheckinRejected, toggle_attendance, web_checkin
+from .debounce import previous_result, remember_result
+from .models import Class, Student
+from .qrtokens import TokenExpired
+from .timetable import timetable
+
+NOT_FOUND = {"detail": "No encontrado."}
+
+
+def _in_pool(func):
+    """``func`` en un hilo del pool, con el ciclo de conexión de una petición."""
+    def run(*args):
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def _payload(request):
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+    return request.POST
+
+
+@csrf_exempt
+@require_POST
+async def attendance_checkin_qr(request):
+    token = request.GET.get("token")
+    student_id = _payload(request).get("student_id")
+
+    if not token or not student_id:
+        return JsonResponse({"error": "token y student_id requeridos"}, status=400)
+
+    try:
+        clazz = await aresolve_class_token(token)
+    except Http404:
+        return JsonResponse(NOT_FOUND, status=404)
+    except TokenExpired as e:
+        return JsonResponse({"error": str(e)}, status=410)
+    idempotency_key = request.headers.get("Idempotency-Key")
+    previous = previous_result(student_id, clazz.pk, idempotency_key)
+    if previous is not None:
+        return JsonResponse(previous[1], status=previous[0])
+    student_id = await _existing_student_id(student_id)
+    if student_id is None:
+        return JsonResponse(NOT_FOUND, status=404)
+
+    try:
+        action, session = await _in_pool(_toggle)(clazz, student_id)
+    except CheckinRejected as e:
+        code, body = e.status, {"error": str(e)}
+    else:
+        code, body = 200, {"success": True, "action": action, "session": session}
+    remember_result(student_id, clazz.pk, idempotency_key, code, body)
+    return JsonResponse(body, status=code)
+
+
+async def _existing_student_id(student_id):
+    try:
+        student_id = int(student_id)
+    except (TypeError, ValueError):
+        return None
+    return student_id if await Student.objects.filter(pk=student_id).aexists() else None
+
+
+def _toggle(clazz, student_id):
+    # El índice de horario puede consultar su versión en BD: también va en el hilo
+    now = timezone.now()
+    action = toggle_attendance(clazz, student_id, method="qr", now=now)
+    return action, timetable.session(clazz.pk, now)
+
+
+@csrf_exempt
+@require_POST
+async def class_checkin(request, pk):
+    student_id = _payload(request).get("student_id")
+    if not student_id:
+        return JsonResponse({"error": "student_id requerido"}, status=400)
+
+    student_id = await _existing_student_id(student_id)
+    if student_id is None:
+        return JsonResponse(NOT_FOUND, status=404)
+    try:
+        clazz = await Class.objects.select_related("room").aget(pk=pk)
+    except Class.DoesNotExist:
+        return JsonResponse(NOT_FOUND, status=404)
+
+    try:
+        await _in_pool(web_checkin)(clazz, student_id)
+    except CheckinRejected as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    return JsonResponse({"success": True})
@@ -0,0 +1,178 @@
+"""
+Check-out automático al terminar cada sesión.
+
+Quien olvida escanear a la salida deja su asistencia abierta y el conjunto
+de abiertas (el que revisa cada escaneo) no deja de crecer. ``close_ended``
+cierra de golpe las de las sesiones cuyo fin (``Class.end_time`` del día de
+la asistencia) más ATTENDANCE_AUTO_CHECKOUT_GRACE_MINUTES ya pasó:
+
+- por cada sesión (clase, día), un UPDATE en bloque con
+  ``check_out = MAX(check_in, fin)``, en su propia transacción junto con la
+  liberación de plazas (core.occupancy) y los minutos de los resúmenes
+  (core.rollups);
+- el UPDATE solo toca las filas que siguen abiertas y devuelve (RETURNING)
+  las que cerró; plazas y resúmenes se calculan solo con esas. Así dos
+  ejecuciones a la vez (varios workers, el comando y el planificador) o un
+  check-out en vivo entre la lectura y el UPDATE no cuentan dos veces la
+  misma fila (``select_for_update`` solo bloquea en PostgreSQL).
+
+``AutoCheckoutScheduler`` lo ejecuta en un hilo del worker
+(ATTENDANCE_AUTO_CHECKOUT): duerme hasta el próximo fin de sesión del
+horario (core.timetable) más el margen, y como mucho
+ATTENDANCE_AUTO_CHECKOUT_INTERVAL segundos. También está el comando
+``auto_checkout``.
+"""
+import atexit
+import datetime
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from . import occupancy
+from .metrics import timed
+from .models import Attendance, Class
+from .rollups import record_checkouts
+from .timetable import timetable
+from .writes import write_transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _grace():
+    return datetime.timedelta(minutes=settings.ATTENDANCE_AUTO_CHECKOUT_GRACE_MINUTES)
+
+
+def ended_sessions(now=None):
+    """[(clazz_id, fecha, fin)] de las sesiones con asistencias abiertas que ya terminaron."""
+    now = now or timezone.now()
+    sessions = set(
+        Attendance.objects.filter(check_out__isnull=True, date__lte=timezone.localdate(now))
+        .values_list("clazz_id", "date").distinct()
+    )
+    end_times = dict(Class.objects.filter(pk__in={c for c, _ in sessions}).values_list("pk", "end_time"))
+    ended = []
+    for clazz_id, date in sorted(sessions):
+        if clazz_id not in end_times:
+            continue  # clase borrada entretanto (sus asistencias se van con ella)
+        ends_at = timezone.make_aware(datetime.datetime.combine(date, end_times[clazz_id]))
+        if ends_at + _grace() <= now:
+            ended.append((clazz_id, date, ends_at))
+    return ended
+
+
+@write_transaction
+def close_session(clazz_id, date, ends_at):
+    """Cierra las asistencias abiertas de una sesión. Devuelve cuántas cerró."""
+    rows = {
+        pk: (student_id, check_in)
+        for pk, student_id, check_in in Attendance.objects.select_for_update()
+        .filter(clazz_id=clazz_id, date=date, check_out__isnull=True)
+        .values_list("pk", "student_id", "check_in")
+    }
+    if not rows:
+        return 0
+    # Solo cuentan las que cerró este UPDATE: un escaneo pudo cerrar alguna entretanto
+    closed = _close_returning(list(rows), ends_at)
+    occupancy.release_seats(clazz_id, date, len(closed))
+    record_checkouts(
+        Attendance(pk=pk, clazz_id=clazz_id, student_id=rows[pk][0], date=date,
+                   check_in=rows[pk][1], check_out=max(rows[pk][1], ends_at))
+        for pk in closed
+    )
+    return len(closed)
+
+
+def _close_returning(pks, ends_at):
+    """
+    ``check_out = MAX(check_in, fin)`` en las filas aún abiertas de ``pks``;
+    devuelve los pk que cerró (UPDATE ... RETURNING: PostgreSQL y SQLite >= 3.35).
+    Quien entró después del fin (fuera de horario) sale a la misma hora: 0 minutos.
+    """
+    quote = connection.ops.quote_name
+    pk, check_in, check_out = (
+        quote(Attendance._meta.get_field(f).column) for f in ("id", "check_in", "check_out")
+    )
+    ends_at = connection.ops.adapt_datetimefield_value(ends_at)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote(Attendance._meta.db_table)} "
+            f"SET {check_out} = CASE WHEN {check_in} > %s THEN {check_in} ELSE %s END "
+            f"WHERE {pk} IN ({', '.join(['%s'] * len(pks))}) AND {check_out} IS NULL RETURNING {pk}",
+            [ends_at, ends_at, *pks],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def close_ended(now=None):
+    """Cierra todas las sesiones terminadas. Devuelve (sesiones, asistencias cerradas)."""
+    sessions = rows = 0
+    with timed("auto_checkout"):
+        for clazz_id, date, ends_at in ended_sessions(now):
+            closed = close_session(clazz_id, date, ends_at)
+            sessions += bool(closed)
+            rows += closed
+    return sessions, rows
+
+
+# -------------------------------
+# Planificador en proceso
+# -------------------------------
+
+class AutoCheckoutScheduler:
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="auto-checkout", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=10)
+
+    def seconds_to_next_run(self, now=None):
+        now = now or timezone.now()
+        # Fines posteriores a ahora - margen: su cierre (fin + margen) aún no ha llegado
+        next_end = timetable.next_end(now - _grace())
+        if next_end is None:
+            return self.interval
+        return min(max((next_end + _grace() - now).total_seconds(), 1), self.interval)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                sessions, rows = close_ended()
+                if rows:
+                    logger.info("Check-out automático: %s asistencias en %s sesiones", rows, sessions)
+                wait = self.seconds_to_next_run()
+            except Exception:
+                logger.exception("Error en el check-out automático")
+                wait = self.interval
+            finally:
+                close_old_connections()
+            self._stopped.wait(wait)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler():
+    """Arranca el planificador del proceso si ATTENDANCE_AUTO_CHECKOUT está activo (lo llaman wsgi/asgi)."""
+    global _scheduler
+    if not settings.ATTENDANCE_AUTO_CHECKOUT:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = AutoCheckoutScheduler(settings.ATTENDANCE_AUTO_CHECKOUT_INTERVAL).start()
+    return _scheduler
@@ -0,0 +1,139 @@
+"""
+Utilidades compartidas por los comandos ``bench_*``.
+
+Los datos sintéticos se crean con bulk_create (sin señales, sin PNG de QR)
+y con el prefijo ``bench-`` para poder borrarlos al terminar.
+"""
+import datetime
+import random
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.utils import timezone
+
+from .models import Room, Teacher, Class, Student, Enrollment, Attendance
+from .search import index_students
+
+PREFIX = "bench-"
+
+
+def create_fixture(n_classes=10, n_students=1000):
+    """Crea aulas, profesores, clases y alumnos de prueba. Devuelve (classes, student_ids)."""
+    tag = uuid.uuid4().hex[:8]
+    teacher = Teacher.objects.create(
+        first_name=PREFIX + tag, last_name="Bench", email=f"{PREFIX}{tag}@example.com"
+    )
+    rooms = Room.objects.bulk_create(
+        Room(name=f"{PREFIX}{tag}-room-{i}", capacity=n_students) for i in range(n_classes)
+    )
+    classes = Class.objects.bulk_create(
+        Class(
+            name=f"{PREFIX}{tag}-class-{i}", room=room, teacher=teacher,
+            weekday=i % 7, start_time=datetime.time(8 + i % 12), end_time=datetime.time(9 + i % 12),
+        )
+        for i, room in enumerate(rooms)
+    )
+    Student.objects.bulk_create(
+        Student(
+            first_name=PREFIX + tag, last_name=f"S{i}",
+            email=f"{PREFIX}{tag}-{i}@example.com", dni=f"B{tag}{i}",
+        )
+        for i in range(n_students)
+    )
+    students = list(
+        Student.objects.filter(first_name=PREFIX + tag).order_by("pk")
+        .values_list("pk", "first_name", "last_name", "dni", "email")
+    )
+    index_students(students)
+    return classes, [row[0] for row in students]
+
+
+def create_enrollments(classes, student_ids, per_class, seed=0):
+    """Matricula ``per_class`` alumnos al azar en cada clase."""
+    rnd = random.Random(seed)
+    per_class = min(per_class, len(student_ids))
+    Enrollment.objects.bulk_create(
+        (Enrollment(clazz=clazz, student_id=student_id)
+         for clazz in classes for student_id in rnd.sample(student_ids, per_class)),
+        batch_size=5000,
+    )
+
+
+def enroll_all(classes, student_ids):
+    """Matricula a todos los alumnos en todas las clases (para los check-ins de prueba)."""
+    Enrollment.objects.bulk_create(
+        (Enrollment(clazz=clazz, student_id=student_id) for clazz in classes for student_id in student_ids),
+        batch_size=5000, ignore_conflicts=True,
+    )
+
+
+def create_attendances(classes, student_ids, n_rows, days=120, batch_size=5000, seed=0):
+    """
+    Inserta ``n_rows`` asistencias repartidas en los últimos ``days`` días, por
+    lotes para no tener más de ``batch_size`` objetos en memoria. Las de hoy
+    quedan abiertas (sin check_out), como a mitad de clase.
+    """
+    rnd = random.Random(seed)
+    today = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    batch = []
+    for i in range(n_rows):
+        day = rnd.randrange(days)
+        check_in = today - datetime.timedelta(days=day, minutes=rnd.randrange(60))
+        batch.append(Attendance(
+            clazz=rnd.choice(classes), student_id=rnd.choice(student_ids), method="qr",
+            date=timezone.localdate(check_in), check_in=check_in,
+            check_out=check_in + datetime.timedelta(minutes=50) if day else None,
+        ))
+        if len(batch) >= batch_size:
+            Attendance.objects.bulk_create(batch)
+            batch = []
+    Attendance.objects.bulk_create(batch)
+
+
+def cleanup():
+    """Borra todo lo creado por create_fixture (las asistencias caen en cascada)."""
+    Class.objects.filter(name__startswith=PREFIX).delete()
+    Student.objects.filter(first_name__startswith=PREFIX).delete()
+    Room.objects.filter(name__startswith=PREFIX).delete()
+    Teacher.objects.filter(first_name__startswith=PREFIX).delete()
+
+
+@contextmanager
+def timer():
+    """Cronómetro: ``with timer() as t: ...`` y luego ``t()`` da los segundos transcurridos."""
+    start = time.perf_counter()
+    end = None
+
+    def elapsed():
+        return (end or time.perf_counter()) - start
+
+    try:
+        yield elapsed
+    finally:
+        end = time.perf_counter()
+
+
+def percentile(values, pct):
+    """Percentil por el método del rango más cercano (``values`` ya ordenados)."""
+    if not values:
+        return 0.0
+    index = max(int(round(pct / 100 * len(values))) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def summarize(latencies, queries, elapsed):
+    """Latencias (ms) y consultas por petición → p50/p95/p99, consultas medias y peticiones/s."""
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else 0,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0,
+    }
+
+
+def attendance_count(classes):
+    return Attendance.objects.filter(clazz__in=classes).count()
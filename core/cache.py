@@ -0,0 +1,176 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import Http404
+
+from .models import CatalogVersion, Class
+from .qrtokens import is_signed, verify_token
+
+
+class LRUCache:
+    """
+    Caché en memoria (por proceso) con tamaño máximo y expulsión LRU.
+    Es segura entre hilos; las claves deben ser hashables.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class VersionedLRUCache(LRUCache):
+    """
+    LRUCache que se vacía entera cuando cambia la versión de alguno de sus
+    catálogos (CatalogVersion, ver core.catalog): así ve los cambios hechos
+    en otros procesos. La versión se revisa como mucho cada
+    ``refresh_seconds``, con ``ensure_fresh`` (o ``aensure_fresh``) antes de leer.
+    """
+
+    def __init__(self, catalogs, refresh_seconds, max_entries=1024):
+        super().__init__(max_entries)
+        self.catalogs = tuple(catalogs)
+        self.refresh_seconds = refresh_seconds
+        self._version = None
+        self._checked = 0.0
+
+    def ensure_fresh(self):
+        if self._due():
+            self._apply(list(self._versions()))
+
+    async def aensure_fresh(self):
+        if self._due():
+            self._apply([row async for row in self._versions()])
+
+    def _due(self):
+        return self._version is None or time.monotonic() - self._checked >= self.refresh_seconds
+
+    def _versions(self):
+        # Sin core.catalog.get_versions: core.catalog importa este módulo
+        return CatalogVersion.objects.filter(name__in=self.catalogs).values_list("name", "version")
+
+    def _apply(self, rows):
+        versions = dict(rows)
+        version = tuple(versions.get(name, 0) for name in self.catalogs)
+        with self._lock:
+            self._checked = time.monotonic()
+            if version != self._version:
+                self._version = version
+                self._data.clear()
+
+
+# -------------------------------
+# Token QR → Class
+# -------------------------------
+
+# Las Class cacheadas llevan su Room precargada: dependen de ambos catálogos
+class_token_cache = VersionedLRUCache(
+    ("class", "room"),
+    getattr(settings, "QR_TOKEN_REFRESH_SECONDS", 30),
+    getattr(settings, "QR_TOKEN_CACHE_SIZE", 1024),
+)
+
+
+def resolve_class_token(token):
+    """
+    Devuelve la Class asociada a un token QR, consultando la base de datos
+    solo cuando la clase no está en la caché. Acepta el UUID fijo de la clase
+    (QR_STATIC_TOKENS) y los tokens firmados de core.qrtokens
+    (QR_ROTATING_TOKENS), que se verifican sin ir a la base de datos. Lanza
+    Http404 si el token no es válido o no corresponde a ninguna clase y
+    TokenExpired si es firmado y ha caducado.
+
+    Las señales descartan las entradas de las clases que cambian en este
+    proceso; los cambios de otros procesos se ven por las versiones de los
+    catálogos "class" y "room", revisadas como mucho cada
+    QR_TOKEN_REFRESH_SECONDS.
+    """
+    key = token_key(token)
+    class_token_cache.ensure_fresh()
+    clazz = class_token_cache.get(key)
+    if clazz is None:
+        try:
+            clazz = Class.objects.select_related("room").get(**_lookup(key))
+        except Class.DoesNotExist:
+            raise Http404("Token QR inválido")
+        class_token_cache.set(key, clazz)
+    return clazz
+
+
+async def aresolve_class_token(token):
+    """Versión async de resolve_class_token (ORM async de Django)."""
+    key = token_key(token)
+    await class_token_cache.aensure_fresh()
+    clazz = class_token_cache.get(key)
+    if clazz is None:
+        try:
+            clazz = await Class.objects.select_related("room").aget(**_lookup(key))
+        except Class.DoesNotExist:
+            raise Http404("Token QR inválido")
+        class_token_cache.set(key, clazz)
+    return clazz
+
+
+def token_key(token, at=None):
+    """
+    Clave de la clase de un token QR: el pk (int) si es firmado, verificado
+    en el instante ``at`` (por defecto, ahora), o el UUID fijo. Lanza Http404
+    si no es válido o su tipo está desactivado y TokenExpired si ha caducado.
+    """
+    # Tokens firmados → pk (int); UUID fijo → UUID. Comparten caché sin chocar
+    token = str(token)
+    if is_signed(token):
+        if not settings.QR_ROTATING_TOKENS:
+            raise Http404("Token QR inválido")
+        return verify_token(token, None if at is None else at.timestamp())
+    if not settings.QR_STATIC_TOKENS:
+        raise Http404("Token QR inválido")
+    try:
+        return uuid.UUID(token)
+    except ValueError:
+        raise Http404("Token QR inválido")
+
+
+def _lookup(key):
+    return {"pk": key} if isinstance(key, int) else {"qr_token": key}
+
+
+def invalidate_class_token(qr_token, pk=None):
+    if qr_token:
+        class_token_cache.delete(uuid.UUID(str(qr_token)))
+    if pk is not None:
+        class_token_cache.delete(pk)
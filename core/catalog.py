@@ -0,0 +1,93 @@
+"""
+GET condicionales (ETag / 304) para los catálogos que casi nunca cambian.
+
+Cada catálogo tiene un contador en CatalogVersion que las señales de
+core.signals incrementan en cada alta, cambio o baja. El ETag se deriva de
+esos contadores y de la URL pedida, así que validar una petición solo lee
+esa fila diminuta, nunca las tablas de datos. Las respuestas completas se
+guardan en una caché LRU por proceso bajo su ETag: al cambiar la versión,
+las entradas viejas dejan de pedirse y acaban expulsadas.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseNotModified
+
+from .cache import LRUCache
+from .models import CatalogVersion
+
+_response_cache = LRUCache(getattr(settings, "CATALOG_CACHE_SIZE", 256))
+
+
+def bump_version(name):
+    if not CatalogVersion.objects.filter(name=name).update(version=F("version") + 1):
+        CatalogVersion.objects.get_or_create(name=name)
+        CatalogVersion.objects.filter(name=name).update(version=F("version") + 1)
+
+
+def get_versions(names):
+    versions = dict(CatalogVersion.objects.filter(name__in=names).values_list("name", "version"))
+    return tuple(versions.get(name, 0) for name in names)
+
+
+def _etag_matches(etag, header):
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class CatalogCacheMixin:
+    """
+    ``list`` y ``retrieve`` con ETag fuerte, 304 Not Modified y caché de la
+    respuesta. ``catalog_versions`` son los catálogos de los que depende la
+    salida (p. ej. las clases anidan a su profesor).
+    """
+
+    catalog_versions = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+    def get_catalog_etag(self, request):
+        key = "|".join([
+            ",".join(f"{n}:{v}" for n, v in zip(self.catalog_versions, get_versions(self.catalog_versions))),
+            request.accepted_renderer.format,
+            request.build_absolute_uri(),  # qr_image sale como URL absoluta
+        ])
+        return '"%s"' % hashlib.sha256(key.encode()).hexdigest()[:32]
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        # El API navegable (HTML) lleva usuario y token CSRF: no se cachea
+        if request.accepted_renderer.format != "json":
+            return handler(request, *args, **kwargs)
+
+        etag = self.get_catalog_etag(request)
+        if _etag_matches(etag, request.headers.get("If-None-Match")):
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+
+        cached = _response_cache.get(etag)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response["ETag"] = etag
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+
+            def store(rendered):
+                _response_cache.set(etag, (rendered.content, rendered["Content-Type"]))
+
+            if hasattr(response, "add_post_render_callback"):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+        return response
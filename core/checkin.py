@@ -0,0 +1,250 @@
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import occupancy
+from .cache import token_key
+from .membership import class_rosters
+from .models import Attendance, Class, ClassOccupancy, Student
+from .qrtokens import TokenExpired
+from .rollups import record_checkins, record_checkouts
+from .timetable import OUT_OF_WINDOW, timetable
+from .writes import write_transaction
+
+
+SYNC_CLOCK_SKEW = datetime.timedelta(minutes=1)  # adelanto admitido en el reloj del kiosko
+
+
+class CheckinRejected(Exception):
+    """El check-in no se admite (p. ej. aforo completo). La vista responde con ``status``."""
+
+    def __init__(self, message, status=409):
+        super().__init__(message)
+        self.status = status
+
+
+def check_window(clazz, when):
+    """Con ATTENDANCE_REJECT_OUT_OF_WINDOW, rechaza check-ins fuera de la franja de la clase."""
+    if not settings.ATTENDANCE_REJECT_OUT_OF_WINDOW:
+        return
+    session = timetable.session(clazz.pk, when)
+    if session is None or session["status"] == OUT_OF_WINDOW:
+        raise CheckinRejected("fuera de horario")
+
+
+def check_enrollment(clazz, student_id):
+    """Con ATTENDANCE_REQUIRE_ENROLLMENT, rechaza a quien no tenga matrícula activa en la clase."""
+    if settings.ATTENDANCE_REQUIRE_ENROLLMENT and not class_rosters.is_enrolled(clazz.pk, student_id):
+        raise CheckinRejected("alumno no matriculado", status=403)
+
+
+def toggle_attendance(clazz, student_id, method="qr", now=None):
+    """
+    Check-in/check-out por escaneo: si el alumno tiene una asistencia abierta
+    hoy en la clase, la cierra; si no, abre una nueva. Devuelve la acción.
+
+    El check-in ocupa una plaza de la sesión (core.occupancy) y lanza
+    CheckinRejected si el alumno no está matriculado, si está completa o,
+    si así se configura, fuera de horario; el check-out la libera.
+
+    Con ATTENDANCE_BUFFERED_INGEST activo el escaneo se acepta en el búfer
+    del proceso y se escribe en bloque más tarde (ver core.ingest).
+    """
+    now = now or timezone.now()
+    if settings.ATTENDANCE_BUFFERED_INGEST:
+        from .ingest import get_checkin_buffer
+        return get_checkin_buffer().submit(clazz, student_id, method, now)
+
+    return _toggle(clazz, student_id, method, now)
+
+
+@write_transaction
+def _toggle(clazz, student_id, method, now):
+    today = timezone.localdate(now)
+    att = Attendance.objects.filter(
+        student_id=student_id,
+        clazz=clazz,
+        date=today,
+        check_out__isnull=True
+    ).first()
+
+    if att:
+        att.check_out = now
+        att.save(update_fields=["check_out"])
+        occupancy.release_seat(clazz.pk, att.date)
+        record_checkouts([att])
+        return "check_out"
+    check_enrollment(clazz, student_id)
+    check_window(clazz, now)
+    if not occupancy.reserve_seat(clazz, today):
+        raise CheckinRejected("aforo completo")
+    att = Attendance.objects.create(
+        student_id=student_id, clazz=clazz, method=method, date=today, check_in=now
+    )
+    record_checkins([att], {clazz.pk: clazz.start_time})
+    return "check_in"
+
+
+@write_transaction
+def web_checkin(clazz, student_id):
+    """Check-in manual desde la web (sin toggle). Lanza CheckinRejected si no hay plaza."""
+    check_enrollment(clazz, student_id)
+    now = timezone.now()
+    today = timezone.localdate(now)
+    if not occupancy.reserve_seat(clazz, today):
+        raise CheckinRejected("aforo completo")
+    att = Attendance.objects.create(student_id=student_id, clazz=clazz, method="web", date=today, check_in=now)
+    record_checkins([att], {clazz.pk: clazz.start_time})
+    return att
+
+
+def sync_scans(events, now=None):
+    """
+    Aplica en bloque escaneos registrados offline por un kiosko.
+
+    ``events`` es una lista de dicts {token, student_id, scanned_at}; el token
+    es el UUID de la clase o uno firmado (core.qrtokens). Un ``scanned_at``
+    futuro o más antiguo que ATTENDANCE_SYNC_MAX_AGE_HOURS se rechaza: si no,
+    un QR viejo valdría para siempre con solo atrasar la hora. Resuelve
+    clases y alumnos con una consulta IN cada uno, empareja check-in/check-out
+    por orden de ``scanned_at`` (un escaneo anterior a la entrada abierta se
+    rechaza) y escribe todo en una transacción. Devuelve un
+    resultado por evento, en el mismo orden de entrada.
+    """
+    now = now or timezone.now()
+    oldest = now - datetime.timedelta(hours=settings.ATTENDANCE_SYNC_MAX_AGE_HOURS)
+    results = [None] * len(events)
+    parsed = []
+    for i, ev in enumerate(events):
+        error = None
+        try:
+            student_id = int(ev.get("student_id"))
+            scanned_at = parse_datetime(str(ev.get("scanned_at") or ""))
+        except (AttributeError, TypeError, ValueError):
+            error = "evento inválido"
+        else:
+            if scanned_at is None:
+                error = "scanned_at inválido"
+            else:
+                if timezone.is_naive(scanned_at):
+                    scanned_at = timezone.make_aware(scanned_at)
+                if scanned_at > now + SYNC_CLOCK_SKEW:
+                    error = "scanned_at en el futuro"
+                elif scanned_at < oldest:
+                    error = "scanned_at fuera del plazo de sincronización"
+                else:
+                    # Misma validación que el escaneo en vivo (QR_STATIC_TOKENS,
+                    # QR_ROTATING_TOKENS), con la ventana del token frente a scanned_at
+                    try:
+                        token = token_key(ev.get("token"), at=scanned_at)
+                    except Http404:
+                        error = "token desconocido"
+                    except TokenExpired:
+                        error = "token QR caducado"
+        if error:
+            results[i] = {"index": i, "success": False, "error": error}
+            continue
+        parsed.append((scanned_at, i, token, student_id))
+
+    keys = {p[2] for p in parsed}
+    classes = {}
+    for c in Class.objects.filter(
+        Q(qr_token__in=[k for k in keys if not isinstance(k, int)])
+        | Q(pk__in=[k for k in keys if isinstance(k, int)])
+    ).select_related("room"):
+        for key in (c.qr_token, c.pk):
+            if key in keys:
+                classes[key] = c
+    student_ids = set(
+        Student.objects.filter(pk__in={p[3] for p in parsed}).values_list("pk", flat=True)
+    )
+
+    if settings.ATTENDANCE_BUFFERED_INGEST:
+        from .ingest import get_checkin_buffer
+        get_checkin_buffer().flush()
+
+    _apply_scans(parsed, results, classes, student_ids)
+    return results
+
+
+@write_transaction
+def _apply_scans(parsed, results, classes, student_ids):
+    class_ids = {token: c.pk for token, c in classes.items()}
+    open_atts, seats = {}, {}
+    valid = [p for p in parsed if p[2] in class_ids and p[3] in student_ids]
+    if valid:
+        for att in Attendance.objects.filter(
+            student_id__in={p[3] for p in valid},
+            clazz_id__in={class_ids[p[2]] for p in valid},
+            date__in={timezone.localdate(p[0]) for p in valid},
+            check_out__isnull=True,
+        ).order_by("check_in"):
+            open_atts[(att.student_id, att.clazz_id, att.date)] = att
+        seats = {
+            (o.clazz_id, o.date): o.count
+            for o in ClassOccupancy.objects.filter(
+                clazz_id__in={class_ids[p[2]] for p in valid},
+                date__in={timezone.localdate(p[0]) for p in valid},
+            )
+        }
+
+    created, closed = [], {}
+    deltas = defaultdict(int)
+    for scanned_at, i, token, student_id in sorted(parsed, key=lambda p: (p[0], p[1])):
+        if token not in class_ids:
+            results[i] = {"index": i, "success": False, "error": "token desconocido"}
+            continue
+        if student_id not in student_ids:
+            results[i] = {"index": i, "success": False, "error": "alumno inexistente"}
+            continue
+        key = (student_id, class_ids[token], timezone.localdate(scanned_at))
+        session = key[1:]
+        att = open_atts.pop(key, None)
+        if att is not None and scanned_at < att.check_in:
+            # Escaneo anterior a la entrada abierta (p. ej. un check-in en vivo
+            # posterior): no puede ser su salida
+            open_atts[key] = att
+            results[i] = {"index": i, "success": False, "error": "escaneo anterior al check-in abierto"}
+            continue
+        if att is not None:
+            att.check_out = scanned_at
+            if att.pk is not None:
+                closed[att.pk] = att
+            if seats.get(session, 0) > 0:
+                seats[session] -= 1
+                deltas[session] -= 1
+            action = "check_out"
+        else:
+            try:
+                check_enrollment(classes[token], student_id)
+                check_window(classes[token], scanned_at)
+            except CheckinRejected as e:
+                results[i] = {"index": i, "success": False, "error": str(e)}
+                continue
+            if (
+                settings.ATTENDANCE_ENFORCE_CAPACITY
+                and seats.get(session, 0) >= classes[token].capacity
+            ):
+                results[i] = {"index": i, "success": False, "error": "aforo completo"}
+                continue
+            seats[session] = seats.get(session, 0) + 1
+            deltas[session] += 1
+            att = Attendance(
+                student_id=student_id, clazz_id=key[1], method="kiosk",
+                date=key[2], check_in=scanned_at,
+            )
+            created.append(att)
+            open_atts[key] = att
+            action = "check_in"
+        results[i] = {"index": i, "success": True, "action": action}
+
+    Attendance.objects.bulk_create(created)
+    Attendance.objects.bulk_update(closed.values(), ["check_out"])
+    occupancy.apply_deltas(deltas)
+    record_checkins(created, {c.pk: c.start_time for c in classes.values()})
+    record_checkouts([*created, *closed.values()])
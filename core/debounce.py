@@ -0,0 +1,117 @@
+"""
+Antirrebote de escaneos QR: un alumno que escanea dos veces en un segundo
+no debe hacer check-in y check-out seguidos.
+
+- Cada resultado de ``attendance_checkin_qr`` se recuerda por (alumno,
+  clase) durante ATTENDANCE_DEBOUNCE_SECONDS; un escaneo repetido en ese
+  plazo recibe la misma respuesta sin llegar a la base de datos.
+- Si el cliente manda la cabecera ``Idempotency-Key``, la respuesta se
+  recuerda además por (alumno, clave) durante ATTENDANCE_IDEMPOTENCY_SECONDS:
+  un reintento de la misma petición devuelve el resultado original. Solo se
+  guardan los éxitos (200): un 403 o un 409 (fuera de matrícula, aforo
+  completo) vale solo lo que la ventana corta del antirrebote.
+
+Cada mecanismo se desactiva por separado poniendo su plazo a 0.
+
+Las entradas van en cubos de tiempo del tamaño de la ventana: basta con
+mirar el cubo actual y el anterior, y los cubos viejos se descartan
+enteros, sin recorrer entradas. Cada caché guarda como mucho
+ATTENDANCE_DEBOUNCE_MAX_ENTRIES; llena, no recuerda nada nuevo hasta que
+caduca su cubo más viejo (el escaneo se procesa normalmente).
+
+Es por proceso: un repetido que cae en otro worker llega a la base de
+datos como antes. Dos escaneos simultáneos, antes de que termine el
+primero, tampoco se detectan. Aciertos y fallos se cuentan en /metrics
+(``scan_debounce_total``).
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .metrics import registry
+
+registry.describe("scan_debounce_total", "counter", "Escaneos repetidos (hit) o nuevos (miss) en el antirrebote")
+
+
+class TimeWindowCache:
+    """Resultados recientes por clave durante ``seconds``, en cubos de tiempo y con tamaño máximo."""
+
+    def __init__(self, seconds, max_entries):
+        self.seconds = seconds
+        self.max_entries = max_entries
+        self._buckets = {}  # nº de cubo → {clave: (instante, valor)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        current = int(now // self.seconds)
+        with self._lock:
+            for bucket in (current, current - 1):
+                entry = self._buckets.get(bucket, {}).get(key)
+                if entry is not None and now - entry[0] <= self.seconds:
+                    self.hits += 1
+                    return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, now=None):
+        now = time.monotonic() if now is None else now
+        current = int(now // self.seconds)
+        with self._lock:
+            for bucket in [b for b in self._buckets if b < current - 1]:
+                del self._buckets[bucket]
+            entries = self._buckets.setdefault(current, {})
+            if len(self) < self.max_entries or key in entries:
+                entries[key] = (now, value)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._buckets.values())
+
+
+# Con su plazo a 0 no se usan (ver previous_result)
+recent_scans = TimeWindowCache(
+    max(settings.ATTENDANCE_DEBOUNCE_SECONDS, 1), settings.ATTENDANCE_DEBOUNCE_MAX_ENTRIES
+)
+idempotent_responses = TimeWindowCache(
+    max(settings.ATTENDANCE_IDEMPOTENCY_SECONDS, 1), settings.ATTENDANCE_DEBOUNCE_MAX_ENTRIES
+)
+
+
+def _student_key(student_id):
+    try:
+        return int(student_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def previous_result(student_id, class_id, idempotency_key=None):
+    """(status, cuerpo) de un escaneo igual reciente, o None si es nuevo."""
+    student_id = _student_key(student_id)
+    idempotent = bool(idempotency_key) and settings.ATTENDANCE_IDEMPOTENCY_SECONDS > 0
+    debounce = settings.ATTENDANCE_DEBOUNCE_SECONDS > 0
+    if student_id is None or not (idempotent or debounce):
+        return None
+    result = None
+    if idempotent:
+        result = idempotent_responses.get((student_id, idempotency_key))
+    if result is None and debounce:
+        result = recent_scans.get((student_id, class_id))
+    registry.inc("scan_debounce_total", (("result", "miss" if result is None else "hit"),))
+    return result
+
+
+def remember_result(student_id, class_id, idempotency_key, status, body):
+    student_id = _student_key(student_id)
+    if student_id is None:
+        return
+    if settings.ATTENDANCE_DEBOUNCE_SECONDS > 0:
+        recent_scans.set((student_id, class_id), (status, body))
+    if status == 200 and idempotency_key and settings.ATTENDANCE_IDEMPOTENCY_SECONDS > 0:
+        idempotent_responses.set((student_id, idempotency_key), (status, body))
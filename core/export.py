@@ -0,0 +1,58 @@
+import csv
+import io
+import zlib
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .metrics import timed_iter
+
+
+def csv_chunks(header, rows, chunk_size):
+    """Genera el CSV en trozos de ``chunk_size`` filas; la cabecera sale sola y de inmediato."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def gzip_chunks(chunks, charset="utf-8"):
+    """Comprime al vuelo; cada trozo se vacía con Z_SYNC_FLUSH para que el cliente lo reciba ya."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 → formato gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode(charset)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_csv(request, filename, header, rows):
+    """
+    Respuesta CSV en streaming con memoria constante. ``rows`` debe ser un
+    iterable perezoso (p. ej. ``values_list(...).iterator(chunk_size=...)``,
+    que en PostgreSQL usa un cursor del lado del servidor).
+
+    Si el cliente acepta gzip (y EXPORT_GZIP está activo) se comprime al vuelo
+    con Content-Encoding: gzip.
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    chunks = timed_iter("csv_export", csv_chunks(header, rows, chunk_size))
+    accepts_gzip = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+
+    if settings.EXPORT_GZIP and accepts_gzip:
+        response = StreamingHttpResponse(gzip_chunks(chunks), content_type="text/csv")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = StreamingHttpResponse(chunks, content_type="text/csv")
+    response["Vary"] = "Accept-Encoding"
+    response["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
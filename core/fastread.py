@@ -0,0 +1,171 @@
+"""
+Ruta rápida de solo lectura para los ``list`` de los ViewSets.
+
+Lee filas con ``values()`` (un plan de joins fijo, sin instanciar modelos) y
+las codifica directamente a JSON con la misma forma y formato que los
+ModelSerializer de core.serializers. Se activa con FAST_READ_LISTS y solo
+cuando el renderer negociado es JSON.
+"""
+import json
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import Class
+
+
+def _datetime(value):
+    # Igual que serializers.DateTimeField: hora local y sufijo Z para UTC
+    if value is None:
+        return None
+    value = value.astimezone(timezone.get_current_timezone()).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _isoformat(value):
+    return None if value is None else value.isoformat()
+
+
+def _str(value):
+    return None if value is None else str(value)
+
+
+_qr_storage = Class._meta.get_field("qr_image").storage
+
+
+def _image_url(value, request):
+    if not value:
+        return None
+    url = _qr_storage.url(value)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class FastList:
+    """
+    Especificación de una lista rápida: ``fields`` son pares (clave de salida,
+    columna de values()) con un conversor opcional; ``nested`` agrupa columnas
+    con un prefijo común (p. ej. ``teacher__``) en un objeto anidado.
+    """
+
+    def __init__(self, fields, nested=None):
+        self.fields = fields
+        self.nested = nested or {}
+        self.columns = [column for key, column, _ in fields if key not in self.nested]
+        for prefix, sub_fields in self.nested.items():
+            self.columns += [f"{prefix}__{column}" for _, column, _ in sub_fields]
+
+    def values(self, queryset):
+        return queryset.values(*self.columns)
+
+    def to_representation(self, rows, request=None):
+        data = []
+        for row in rows:
+            item = {}
+            for key, column, convert in self.fields:
+                if key in self.nested:
+                    item[key] = self._nested(key, row, request)
+                    continue
+                value = row[column]
+                if convert is _image_url:
+                    value = _image_url(value, request)
+                elif convert is not None:
+                    value = convert(value)
+                item[key] = value
+            data.append(item)
+        return data
+
+    def _nested(self, prefix, row, request):
+        if row[f"{prefix}__id"] is None:
+            return None
+        return {
+            key: (convert(row[f"{prefix}__{column}"]) if convert else row[f"{prefix}__{column}"])
+            for key, column, convert in self.nested[prefix]
+        }
+
+
+def dumps(data):
+    """Mismo formato que el JSONRenderer de DRF (compacto, UTF-8 sin escapar)."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+
+class FastListMixin:
+    """Sustituye ``list`` por la ruta rápida si está activa y el cliente pide JSON."""
+
+    fast_list = None
+
+    def list(self, request, *args, **kwargs):
+        if (
+            not settings.FAST_READ_LISTS
+            or self.fast_list is None
+            or getattr(request.accepted_renderer, "format", None) != "json"
+        ):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.fast_list.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        data = self.fast_list.to_representation(page if page is not None else queryset, request)
+        if page is not None:
+            data = self.paginator.get_paginated_payload(data)
+        return HttpResponse(dumps(data), content_type="application/json")
+
+
+TEACHER_FIELDS = [
+    ("id", "id", None),
+    ("first_name", "first_name", None),
+    ("last_name", "last_name", None),
+    ("email", "email", None),
+    ("phone", "phone", None),
+]
+
+ROOM_LIST = FastList([
+    ("id", "id", None),
+    ("name", "name", None),
+    ("capacity", "capacity", None),
+])
+
+TEACHER_LIST = FastList(TEACHER_FIELDS)
+
+CLASS_LIST = FastList(
+    [
+        ("id", "id", None),
+        ("teacher", "teacher", None),
+        ("name", "name", None),
+        ("weekday", "weekday", None),
+        ("start_time", "start_time", _isoformat),
+        ("end_time", "end_time", _isoformat),
+        ("capacity_override", "capacity_override", None),
+        ("qr_image", "qr_image", _image_url),
+        ("qr_token", "qr_token", _str),
+        ("room", "room_id", None),
+    ],
+    nested={"teacher": TEACHER_FIELDS},
+)
+
+STUDENT_LIST = FastList([
+    ("id", "id", None),
+    ("first_name", "first_name", None),
+    ("last_name", "last_name", None),
+    ("email", "email", None),
+    ("dni", "dni", None),
+])
+
+ENROLLMENT_LIST = FastList([
+    ("id", "id", None),
+    ("status", "status", None),
+    ("created", "created", _datetime),
+    ("student", "student_id", None),
+    ("clazz", "clazz_id", None),
+])
+
+ATTENDANCE_LIST = FastList([
+    ("id", "id", None),
+    ("date", "date", _isoformat),
+    ("check_in", "check_in", _datetime),
+    ("check_out", "check_out", _datetime),
+    ("method", "method", None),
+    ("clazz", "clazz_id", None),
+    ("student", "student_id", None),
+])
@@ -0,0 +1,248 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import occupancy
+from .checkin import CheckinRejected, check_enrollment, check_window
+from .models import Attendance
+from .rollups import record_checkins, record_checkouts
+from .writes import write_transaction
+
+logger = logging.getLogger(__name__)
+
+
+class CheckinBuffer:
+    """
+    Búfer de escritura diferida para los escaneos QR.
+
+    Los escaneos se aceptan en memoria y se responden al momento; un hilo los
+    vuelca con bulk_create/bulk_update cada ``flush_interval_ms`` o en cuanto
+    hay ``max_events`` pendientes. El estado abierto/cerrado de cada
+    (alumno, clase, día) y las plazas ocupadas de cada (clase, día) se llevan
+    en memoria hasta que el volcado las escribe, así que el check-in/check-out
+    alterna bien aunque los escaneos previos sigan en el búfer. El alternado y
+    el aforo solo son exactos dentro del proceso.
+
+    Con el candado tomado nunca se toca la BD: lo que falta en memoria se lee
+    antes de tomarlo y el volcado escribe después de soltarlo.
+    """
+
+    def __init__(self, flush_interval_ms=200, max_events=500):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()  # un solo volcado a la vez
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._reset()
+
+    def _reset(self):
+        self._open = {}        # (student_id, clazz_id, date) -> Attendance abierta o None
+        self._seat_base = {}   # (clazz_id, date) -> plazas ocupadas en la BD al leerla
+        self._created = {}     # id -> Attendance nueva, aún sin volcar
+        self._closed = {}      # id -> Attendance ya volcada (o volcándose) con check_out pendiente
+        self._seats = {}       # (clazz_id, date) -> variación de plazas sin volcar
+        self._inflight = {}    # (clazz_id, date) -> variación de plazas del volcado en curso
+        self._dirty = set()    # claves tocadas desde el último volcado
+        self._pending = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="checkin-buffer", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Detiene el hilo y fuerza un último volcado (se llama al salir el worker)."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=10)
+        self.flush()
+
+    def submit(self, clazz, student_id, method, now):
+        """
+        Acepta un escaneo y devuelve la acción. La decisión se toma en memoria;
+        la matrícula y el horario se comprueban fuera del candado y solo si el
+        escaneo va a ser un check-in.
+        """
+        key = (int(student_id), clazz.pk, timezone.localdate(now))
+        seat = (clazz.pk, key[2])
+        checked = False
+        while True:
+            self._load(key, seat)
+            with self._lock:
+                # Un volcado pudo descartar el estado entre la lectura y el candado
+                loaded = key in self._open and seat in self._seat_base
+                if loaded and self._open[key] is not None:
+                    action = self._check_out(key, seat, now)
+                    break
+                if loaded and checked:
+                    action = self._check_in(key, seat, clazz, method, now)
+                    break
+            if loaded:
+                check_enrollment(clazz, key[0])
+                check_window(clazz, now)
+                checked = True
+        if self._pending >= self.max_events:
+            self._wakeup.set()
+        return action
+
+    def _load(self, key, seat):
+        """Lee de la BD, sin el candado, el estado que aún no está en memoria."""
+        if key not in self._open:
+            att = Attendance.objects.filter(
+                student_id=key[0], clazz_id=key[1], date=key[2], check_out__isnull=True
+            ).first()
+            with self._lock:
+                self._open.setdefault(key, att)
+        if seat not in self._seat_base:
+            count = occupancy.current(*seat)
+            with self._lock:
+                self._seat_base.setdefault(seat, count)
+
+    def _check_out(self, key, seat, now):
+        att = self._open[key]
+        att.check_out = now
+        if id(att) not in self._created:
+            self._closed[id(att)] = att
+        self._open[key] = None
+        self._seats[seat] = self._seats.get(seat, 0) - 1
+        self._touch(key)
+        return "check_out"
+
+    def _check_in(self, key, seat, clazz, method, now):
+        taken = self._seat_base[seat] + self._inflight.get(seat, 0) + self._seats.get(seat, 0)
+        if settings.ATTENDANCE_ENFORCE_CAPACITY and taken >= clazz.capacity:
+            raise CheckinRejected("aforo completo")
+        att = Attendance(student_id=key[0], clazz_id=key[1], method=method, date=key[2], check_in=now)
+        self._created[id(att)] = att
+        self._open[key] = att
+        self._seats[seat] = self._seats.get(seat, 0) + 1
+        self._touch(key)
+        return "check_in"
+
+    def _touch(self, key):
+        self._dirty.add(key)
+        self._pending += 1
+
+    def flush(self):
+        """
+        Escribe todo lo pendiente en una transacción. Devuelve el nº de eventos volcados.
+
+        Lo pendiente se cambia por listas vacías con el candado tomado y se
+        escribe después, sin él, así que los escaneos siguen entrando durante
+        la escritura. Se escriben copias: las filas vivas pueden cerrarse
+        mientras tanto y ese cierre va en el volcado siguiente.
+        """
+        with self._flushing:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                live = list(self._created.values())
+                created = [_snapshot(att) for att in live]
+                # Sin pk tras el volcado anterior: su alta se descartó
+                closed = [_snapshot(att) for att in self._closed.values() if att.pk is not None]
+                pending = self._pending
+                self._inflight, self._seats = self._seats, {}
+                self._created, self._closed, self._dirty, self._pending = {}, {}, set(), 0
+
+            close_old_connections()
+            try:
+                _write_batch(created, closed)
+            except Exception:
+                logger.exception("Error al volcar %d escaneos; se reintenta fila a fila", pending)
+                _save_one_by_one(created, closed)
+
+            with self._lock:
+                for att, saved in zip(live, created):
+                    att.pk = saved.pk
+                # Lo no tocado desde el cambio ya está en la BD: a partir de aquí manda ella
+                self._open = {key: att for key, att in self._open.items() if key in self._dirty}
+                self._seat_base, self._inflight = {}, {}
+        return pending
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error en el hilo de volcado de check-ins")
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_checkin_buffer():
+    """Búfer único por proceso, creado y arrancado en el primer escaneo."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = CheckinBuffer(
+                    settings.ATTENDANCE_FLUSH_INTERVAL_MS,
+                    settings.ATTENDANCE_FLUSH_MAX_EVENTS,
+                ).start()
+    return _buffer
+
+
+def _snapshot(att):
+    return Attendance(
+        pk=att.pk, student_id=att.student_id, clazz_id=att.clazz_id, method=att.method,
+        date=att.date, check_in=att.check_in, check_out=att.check_out,
+    )
+
+
+def _seat_deltas(created, closed):
+    """Plazas que mueve un lote por (clase, día): +1 por alta aún abierta, -1 por cierre."""
+    deltas = {}
+    for att in created:
+        if att.check_out is None:
+            deltas[att.clazz_id, att.date] = deltas.get((att.clazz_id, att.date), 0) + 1
+    for att in closed:
+        deltas[att.clazz_id, att.date] = deltas.get((att.clazz_id, att.date), 0) - 1
+    return deltas
+
+
+@write_transaction
+def _write_batch(created, closed):
+    if created:
+        Attendance.objects.bulk_create(created)
+    if closed:
+        Attendance.objects.bulk_update(closed, ["check_out"])
+    occupancy.apply_deltas(_seat_deltas(created, closed))
+    record_checkins(created)
+    record_checkouts(created + closed)
+
+
+def _save_one_by_one(created, closed):
+    for att, is_new in [(att, True) for att in created] + [(att, False) for att in closed]:
+        try:
+            _write_one(att, is_new)
+        except Exception:
+            if is_new:
+                att.pk = None
+            logger.exception("Escaneo descartado: alumno %s, clase %s", att.student_id, att.clazz_id)
+
+
+@write_transaction
+def _write_one(att, is_new):
+    """Una fila del lote fallido, con su plaza y sus resúmenes, en su propia transacción."""
+    if is_new:
+        att.pk = None  # el bulk_create revertido pudo asignarle un pk que no existe
+        att.save(force_insert=True)
+        occupancy.apply_deltas(_seat_deltas([att], []))
+        record_checkins([att])
+    else:
+        att.save(update_fields=["check_out"])
+        occupancy.apply_deltas(_seat_deltas([], [att]))
+    record_checkouts([att])
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.dateparse import parse_date
+
+from core import archive
+from core.benchmarks import timer
+from core.models import ArchivedAttendance, Attendance
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve a ArchivedAttendance las asistencias cerradas anteriores al curso actual "
+        "(ATTENDANCE_TERM_STARTS) y mide cuánto se reducen la tabla Attendance y sus índices."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", help="Archivar lo anterior a esta fecha (YYYY-MM-DD); "
+                                             "por defecto, el inicio del curso actual")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--dry-run", action="store_true", help="solo contar")
+        parser.add_argument("--vacuum", action="store_true",
+                            help="SQLite: VACUUM al terminar para devolver el espacio al disco (bloquea la BD)")
+
+    def handle(self, *args, **opts):
+        if opts["before"]:
+            before = parse_date(opts["before"])
+            if before is None:
+                raise CommandError("Fecha inválida (YYYY-MM-DD)")
+        else:
+            before = archive.current_term_start()
+
+        pending = archive.archivable(before).count()
+        self.stdout.write(f"{pending} asistencias cerradas anteriores a {before}")
+        if opts["dry_run"] or not pending:
+            return
+
+        sizes_before = archive.table_sizes(Attendance)
+        with timer() as elapsed:
+            moved = archive.archive(
+                before, opts["batch_size"],
+                on_batch=lambda n: self.stdout.write(f"  {n}/{pending}", ending="\r"),
+            )
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(
+            f"{moved} asistencias archivadas en {elapsed():.1f}s ({moved / elapsed():.0f} filas/s)"
+        ))
+
+        if opts["vacuum"] and connection.vendor == "sqlite":
+            with timer() as elapsed, connection.cursor() as cursor:
+                cursor.execute("VACUUM")
+            self.stdout.write(f"VACUUM en {elapsed():.1f}s")
+
+        sizes_after = archive.table_sizes(Attendance)
+        if sizes_before is None or sizes_after is None:
+            self.stdout.write("Este motor no permite medir el tamaño de las tablas.")
+            return
+        for part in ("table", "indexes"):
+            old, new = sizes_before[part], sizes_after[part]
+            self.stdout.write(
+                f"Attendance {'tabla' if part == 'table' else 'índices'}: "
+                f"{_mb(old)} → {_mb(new)} ({(new - old) / old * 100 if old else 0:+.0f}%)"
+            )
+        cold = archive.table_sizes(ArchivedAttendance)
+        self.stdout.write(f"Archivo: tabla {_mb(cold['table'])}, índices {_mb(cold['indexes'])}")
+
+
+def _mb(size):
+    return f"{size / 1024 / 1024:.1f} MB"
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core import autocheckout
+from core.benchmarks import timer
+
+
+class Command(BaseCommand):
+    help = (
+        "Cierra (check-out) las asistencias abiertas de las sesiones ya terminadas: "
+        "fin de la clase más ATTENDANCE_AUTO_CHECKOUT_GRACE_MINUTES. Un UPDATE por sesión."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="solo listar las sesiones pendientes")
+
+    def handle(self, *args, **opts):
+        if opts["dry_run"]:
+            sessions = autocheckout.ended_sessions()
+            for clazz_id, date, ends_at in sessions:
+                self.stdout.write(f"  clase {clazz_id}, {date} (fin {ends_at:%H:%M})")
+            self.stdout.write(f"{len(sessions)} sesiones terminadas con asistencias abiertas")
+            return
+
+        with timer() as elapsed:
+            sessions, rows = autocheckout.close_ended()
+        self.stdout.write(self.style.SUCCESS(
+            f"{rows} asistencias cerradas en {sessions} sesiones ({elapsed() * 1000:.0f} ms)"
+        ))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.benchmarks import attendance_count, cleanup, create_fixture, enroll_all, timer
+from core.checkin import toggle_attendance
+from core.ingest import CheckinBuffer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara escrituras por segundo del check-in por petición frente al "
+        "búfer de escritura diferida. Crea datos 'bench-' y los borra al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=2000)
+        parser.add_argument("--classes", type=int, default=5)
+        parser.add_argument("--flush-interval-ms", type=int, default=200)
+        parser.add_argument("--flush-max-events", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        try:
+            for label, run in (("por petición", self._direct), ("búfer", self._buffered)):
+                classes, student_ids = create_fixture(opts["classes"], opts["students"])
+                enroll_all(classes, student_ids)
+                # Dos pasadas: entrada y salida de cada alumno en cada clase
+                scans = [(c, s) for _ in range(2) for c in classes for s in student_ids]
+                with timer() as elapsed:
+                    run(scans, opts)
+                rows = attendance_count(classes)
+                self.stdout.write(
+                    f"{label:>14}: {len(scans)} escaneos en {elapsed():.2f}s "
+                    f"→ {len(scans) / elapsed():.0f} escrituras/s ({rows} filas)"
+                )
+                cleanup()
+        finally:
+            cleanup()
+
+    def _direct(self, scans, opts):
+        with override_settings(ATTENDANCE_BUFFERED_INGEST=False):
+            for clazz, student_id in scans:
+                toggle_attendance(clazz, student_id)
+
+    def _buffered(self, scans, opts):
+        buffer = CheckinBuffer(opts["flush_interval_ms"], opts["flush_max_events"]).start()
+        for clazz, student_id in scans:
+            buffer.submit(clazz, student_id, "qr", timezone.now())
+        buffer.stop()
+
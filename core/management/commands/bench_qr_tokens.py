@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from core.benchmarks import cleanup, create_fixture, timer
+from core.cache import class_token_cache, resolve_class_token
+from core.models import Class
+from core.qr import delete_rotating, render_rotating
+from core.qrtokens import make_token, verify_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark de la resolución de tokens QR: UUID fijo contra la base de datos "
+        "y en caché frente a tokens rotatorios firmados (core.qrtokens), verificados solo con CPU. "
+        "Mide también el render de un lote de QR rotatorios."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--classes", type=int, default=50)
+        parser.add_argument("--iterations", type=int, default=20000)
+        parser.add_argument("--batch", type=int, default=None, help="QR rotatorios a renderizar (por defecto QR_ROTATION_BATCH)")
+        parser.add_argument("--keep", action="store_true", help="No borrar los datos al terminar")
+
+    @override_settings(QR_ROTATING_TOKENS=True, QR_STATIC_TOKENS=True)
+    def handle(self, *args, **opts):
+        pk = None
+        try:
+            classes, _ = create_fixture(opts["classes"], 1)
+            uuids = [c.qr_token for c in classes]
+            signed = [make_token(c.pk) for c in classes]
+            n = opts["iterations"]
+
+            def by_db(i):
+                Class.objects.select_related("room").get(qr_token=uuids[i % len(uuids)])
+
+            class_token_cache.clear()
+            cases = {
+                "UUID, consulta a BD": by_db,
+                "UUID, caché en memoria": lambda i: resolve_class_token(uuids[i % len(uuids)]),
+                "firmado, solo verificación": lambda i: verify_token(signed[i % len(signed)]),
+                "firmado, verificación + caché": lambda i: resolve_class_token(signed[i % len(signed)]),
+            }
+            for label, run in cases.items():
+                for i in range(len(classes)):  # calienta la caché
+                    run(i)
+                queries = []
+                with connection.execute_wrapper(_counting(queries)), timer() as elapsed:
+                    for i in range(n):
+                        run(i)
+                self.stdout.write(
+                    f"{label:32} {elapsed() / n * 1e6:8.2f} µs/token  "
+                    f"{n / elapsed():10.0f} tokens/s  {len(queries) / n:.2f} consultas/token"
+                )
+
+            pk = classes[0].pk
+            with timer() as elapsed:
+                rendered = render_rotating(pk, count=opts["batch"])
+            self.stdout.write(
+                f"Lote rotatorio: {rendered} PNG en {elapsed():.2f}s ({elapsed() / max(rendered, 1) * 1000:.1f} ms/PNG)"
+            )
+        finally:
+            if pk is not None:
+                delete_rotating(pk)
+            if not opts["keep"]:
+                cleanup()
+
+
+def _counting(queries):
+    # Sin CaptureQueriesContext: no guarda el SQL ni tiene el límite de 9000 consultas
+    def wrapper(execute, sql, params, many, context):
+        queries.append(None)
+        return execute(sql, params, many, context)
+    return wrapper
@@ -0,0 +1,55 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core.benchmarks import cleanup, create_attendances, create_fixture, timer
+from core.models import Attendance
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera asistencias sintéticas (1M por defecto) y registra el plan de "
+        "ejecución y el tiempo de las consultas calientes de Attendance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--students", type=int, default=5000)
+        parser.add_argument("--classes", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--keep", action="store_true", help="No borrar los datos al terminar")
+
+    def handle(self, *args, **opts):
+        try:
+            classes, student_ids = create_fixture(opts["classes"], opts["students"])
+            with timer() as elapsed:
+                create_attendances(classes, student_ids, opts["rows"])
+            self.stdout.write(f"{opts['rows']} asistencias generadas en {elapsed():.1f}s")
+            if connection.vendor == "sqlite":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+            today = timezone.localdate()
+            clazz, student_id = classes[0], student_ids[0]
+            queries = {
+                "alternado (asistencia abierta)": Attendance.objects.filter(
+                    student_id=student_id, clazz=clazz, date=today, check_out__isnull=True
+                ),
+                "historial alumno/clase": Attendance.objects.filter(student_id=student_id, clazz=clazz),
+                "exportación por rango de fechas": Attendance.objects.filter(
+                    date__gte=today - datetime.timedelta(days=7), date__lte=today
+                ).values_list("clazz__name", "student__first_name", "student__last_name",
+                              "check_in", "check_out", "method"),
+            }
+            for label, qs in queries.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                self.stdout.write(qs.explain())
+                with timer() as elapsed:
+                    for _ in range(opts["repeat"]):
+                        list(qs.all())  # .all(): sin reutilizar la caché del queryset
+                self.stdout.write(f"  {elapsed() / opts['repeat'] * 1000:.2f} ms/consulta")
+        finally:
+            if not opts["keep"]:
+                cleanup()
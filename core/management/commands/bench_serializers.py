@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from core import fastread
+from core.benchmarks import cleanup, create_attendances, create_fixture, timer
+from core.models import Attendance, Class
+from core.serializers import AttendanceSerializer, ClassSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara filas/s de los ModelSerializer frente a la ruta rápida "
+        "(values() + JSON directo) y comprueba que la salida es idéntica."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--classes", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        request = APIRequestFactory().get("/")
+        try:
+            classes, student_ids = create_fixture(opts["classes"], 200)
+            create_attendances(classes, student_ids, opts["rows"])
+            cases = [
+                ("classes", Class.objects.filter(pk__in=[c.pk for c in classes]).select_related("teacher"),
+                 ClassSerializer, fastread.CLASS_LIST),
+                ("attendance", Attendance.objects.filter(clazz__in=classes),
+                 AttendanceSerializer, fastread.ATTENDANCE_LIST),
+            ]
+            for label, qs, serializer_class, fast_list in cases:
+                with timer() as slow:
+                    data = serializer_class(qs.all(), many=True, context={"request": request}).data
+                    slow_body = JSONRenderer().render(data)
+                with timer() as fast:
+                    fast_body = fastread.dumps(fast_list.to_representation(fast_list.values(qs.all()), request))
+                if json.loads(slow_body) != json.loads(fast_body):
+                    raise CommandError(f"{label}: la ruta rápida no coincide con el serializer")
+                rows = len(data)
+                self.stdout.write(
+                    f"{label:>10}: serializer {rows / slow():.0f} filas/s · "
+                    f"rápida {rows / fast():.0f} filas/s (x{slow() / fast():.1f})"
+                )
+        finally:
+            cleanup()
@@ -0,0 +1,250 @@
+import datetime
+import json
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.benchmarks import (
+    PREFIX, cleanup, create_attendances, create_enrollments, create_fixture, enroll_all, summarize, timer,
+)
+from core.models import Class, Student
+from core.timetable import timetable
+
+# Ajustes que cambian el resultado y conviene guardar junto a cada ejecución
+RECORDED_SETTINGS = (
+    "ATTENDANCE_BUFFERED_INGEST", "ATTENDANCE_ENFORCE_CAPACITY", "FAST_READ_LISTS",
+    "EXPORT_GZIP", "SQLITE_HIGH_CONCURRENCY", "ASYNC_CHECKIN",
+)
+
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries_per_request", "throughput_rps")
+
+
+class Command(BaseCommand):
+    help = (
+        "Suite de benchmarks de extremo a extremo (URL → vista → BD, en proceso): "
+        "pico de escaneos al empezar una clase (checkin_qr y classes/<id>/checkin), "
+        "exportación CSV y paginación de listados. Informa p50/p95/p99, consultas por "
+        "petición y rendimiento, y guarda un JSON en BENCH_RESULTS_DIR para comparar "
+        "versiones. La concurrencia real (varios workers) se mide con loadtest_checkin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--classes", type=int, default=50)
+        parser.add_argument("--students", type=int, default=5000)
+        parser.add_argument("--enrollments-per-class", type=int, default=200)
+        parser.add_argument("--rows", type=int, default=1_000_000, help="asistencias históricas")
+        parser.add_argument("--burst", type=int, default=1000, help="escaneos del pico de entrada")
+        parser.add_argument("--exports", type=int, default=5)
+        parser.add_argument("--export-days", type=int, default=30)
+        parser.add_argument("--pages", type=int, default=50)
+        parser.add_argument("--label", default=None, help="nombre de la versión (por defecto, el commit)")
+        parser.add_argument("--compare", default=None,
+                            help="JSON de una ejecución anterior, o 'latest' para la última guardada")
+        parser.add_argument("--reuse", action="store_true", help="reutilizar datos 'bench-' existentes")
+        parser.add_argument("--keep", action="store_true", help="no borrar los datos al terminar")
+
+    def handle(self, *args, **opts):
+        previous = self._load_previous(opts["compare"])
+        self.client = Client()
+        try:
+            classes, student_ids = self._dataset(opts)
+            if connection.vendor == "sqlite":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+            scenarios = {}
+            burst_class, web_class = self._start_now(classes[0]), self._start_now(classes[1])
+            enroll_all([burst_class, web_class], student_ids[:opts["burst"]])
+            scenarios["checkin_qr_burst"] = self._burst(
+                f"/api/attendance/checkin_qr/?token={burst_class.qr_token}", student_ids[:opts["burst"]]
+            )
+            scenarios["class_checkin_burst"] = self._burst(
+                f"/api/classes/{web_class.pk}/checkin/", student_ids[:opts["burst"]]
+            )
+            scenarios["export_csv"] = self._export(opts["exports"], opts["export_days"])
+            scenarios["attendance_pages"] = self._pages("/api/attendance/?page_size=100", opts["pages"])
+            scenarios["attendance_pages_by_class"] = self._pages(
+                f"/api/attendance/?page_size=100&class={classes[2].pk}", opts["pages"]
+            )
+            scenarios["enrollment_pages"] = self._pages("/api/enrollments/?page_size=100", opts["pages"])
+        finally:
+            if not opts["keep"]:
+                cleanup()
+
+        result = {
+            "label": opts["label"] or _git_revision(),
+            "created": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "params": {k: opts[k] for k in (
+                "classes", "students", "enrollments_per_class", "rows", "burst",
+                "exports", "export_days", "pages",
+            )},
+            "settings": {name: getattr(settings, name, None) for name in RECORDED_SETTINGS},
+            "scenarios": scenarios,
+        }
+        self._print(result, previous)
+        path = self._save(result)
+        self.stdout.write(f"Resultados guardados en {path}")
+
+    # -------------------------------
+    # Datos
+    # -------------------------------
+
+    def _dataset(self, opts):
+        if opts["reuse"]:
+            classes = list(Class.objects.filter(name__startswith=PREFIX).select_related("room").order_by("pk"))
+            student_ids = list(
+                Student.objects.filter(first_name__startswith=PREFIX).order_by("pk").values_list("pk", flat=True)
+            )
+            if len(classes) >= 3 and student_ids:
+                self.stdout.write(f"Reutilizando {len(classes)} clases y {len(student_ids)} alumnos 'bench-'")
+                return classes, student_ids
+
+        classes, student_ids = create_fixture(opts["classes"], opts["students"])
+        with timer() as elapsed:
+            create_enrollments(classes, student_ids, opts["enrollments_per_class"])
+            create_attendances(classes, student_ids, opts["rows"])
+        self.stdout.write(
+            f"Datos: {len(classes)} clases, {len(student_ids)} alumnos, "
+            f"{len(classes) * opts['enrollments_per_class']} matrículas, "
+            f"{opts['rows']} asistencias ({elapsed():.1f}s)"
+        )
+        return classes, student_ids
+
+    def _start_now(self, clazz):
+        # La clase empieza ahora: el pico de escaneos cae dentro de su franja
+        local = timezone.localtime()
+        start = local.replace(second=0, microsecond=0) - datetime.timedelta(minutes=2)
+        end = start + datetime.timedelta(hours=1)
+        if end.date() != start.date():
+            end = start.replace(hour=23, minute=59)
+        Class.objects.filter(pk=clazz.pk).update(
+            weekday=start.weekday(), start_time=start.time(), end_time=end.time()
+        )
+        clazz.refresh_from_db()
+        timetable.load()
+        return clazz
+
+    # -------------------------------
+    # Escenarios
+    # -------------------------------
+
+    def _measure(self, requests):
+        """Ejecuta ``requests`` (callables que devuelven (respuesta, filas)) midiendo cada una."""
+        latencies, queries, rows, errors = [], [], 0, 0
+        with timer() as total:
+            for send in requests:
+                with CaptureQueriesContext(connection) as captured, timer() as elapsed:
+                    response, n = send()
+                latencies.append(elapsed() * 1000)
+                queries.append(len(captured))
+                rows += n
+                errors += response.status_code >= 400
+        stats = summarize(latencies, queries, total())
+        stats["errors"] = errors
+        if rows:
+            stats["rows"] = rows
+            stats["rows_per_second"] = round(rows / total(), 1)
+        return stats
+
+    def _burst(self, url, student_ids):
+        return self._measure(
+            (lambda s=s: (self.client.post(url, {"student_id": s}, content_type="application/json"), 0))
+            for s in student_ids
+        )
+
+    def _export(self, repeat, days):
+        today = timezone.localdate()
+        url = f"/api/attendance/export_excel/?from={today - datetime.timedelta(days=days)}&to={today}"
+
+        def send():
+            response = self.client.get(url)
+            lines = sum(chunk.count(b"\n") for chunk in response.streaming_content)
+            return response, max(lines - 1, 0)  # sin la cabecera
+
+        return self._measure(send for _ in range(repeat))
+
+    def _pages(self, url, pages):
+        state = {"url": url}
+
+        def send():
+            response = self.client.get(state["url"], HTTP_ACCEPT="application/json")
+            data = response.json()
+            state["url"] = data.get("next") or url
+            return response, len(data.get("results", []))
+
+        return self._measure(send for _ in range(pages))
+
+    # -------------------------------
+    # Resultados
+    # -------------------------------
+
+    def _print(self, result, previous):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{result['label']} ({result['database']})"
+            + (f" frente a {previous['label']}" if previous else "")
+        ))
+        for name, stats in result["scenarios"].items():
+            line = (
+                f"{name:>26}: {stats['requests']} peticiones · p50 {stats['p50_ms']} ms · "
+                f"p95 {stats['p95_ms']} ms · p99 {stats['p99_ms']} ms · "
+                f"{stats['queries_per_request']} consultas/petición · {stats['throughput_rps']} pet/s"
+            )
+            if "rows_per_second" in stats:
+                line += f" · {stats['rows_per_second']} filas/s"
+            if stats["errors"]:
+                line += f" · {stats['errors']} errores"
+            self.stdout.write(line)
+            old = (previous or {}).get("scenarios", {}).get(name)
+            if old:
+                self.stdout.write(" " * 28 + " · ".join(
+                    f"{metric} {_change(old.get(metric), stats[metric])}" for metric in COMPARED_METRICS
+                ))
+
+    def _results_dir(self):
+        return Path(settings.BENCH_RESULTS_DIR)
+
+    def _save(self, result):
+        directory = self._results_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+        path = directory / f"{stamp}-{result['label'].replace('/', '-')}.json"
+        path.write_text(json.dumps(result, indent=2, default=str))
+        return path
+
+    def _load_previous(self, compare):
+        if not compare:
+            return None
+        if compare == "latest":
+            files = sorted(self._results_dir().glob("*.json"))
+            if not files:
+                raise CommandError(f"No hay resultados anteriores en {self._results_dir()}")
+            path = files[-1]
+        else:
+            path = Path(compare)
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f"No se puede leer {path}: {e}")
+
+
+def _change(old, new):
+    if not old:
+        return f"{new}"
+    return f"{old}→{new} ({(new - old) / old * 100:+.0f}%)"
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "local"
@@ -0,0 +1,64 @@
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import cleanup, create_fixture, enroll_all, percentile, timer
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga HTTP del check-in QR contra un servidor en marcha "
+        "(gunicorn síncrono o uvicorn/ASGI) que use la misma base de datos. "
+        "Lanza --concurrency escaneos simultáneos y mide escaneos/s y latencias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--scans", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--classes", type=int, default=10)
+
+    def handle(self, *args, **opts):
+        try:
+            classes, student_ids = create_fixture(opts["classes"], opts["scans"] // opts["classes"] + 1)
+            enroll_all(classes, student_ids)
+            targets = [
+                (classes[i % len(classes)].qr_token, student_ids[i // len(classes)])
+                for i in range(opts["scans"])
+            ]
+            with ThreadPoolExecutor(opts["concurrency"]) as pool, timer() as elapsed:
+                results = list(pool.map(lambda t: self._scan(opts["url"], *t), targets))
+
+            latencies = sorted(ms for ms, _ in results)
+            statuses = {}
+            for _, status in results:
+                statuses[status] = statuses.get(status, 0) + 1
+            self.stdout.write(
+                f"{opts['scans']} escaneos, concurrencia {opts['concurrency']}: "
+                f"{opts['scans'] / elapsed():.0f} escaneos/s · "
+                f"p50 {percentile(latencies, 50):.1f} ms · p95 {percentile(latencies, 95):.1f} ms · "
+                f"p99 {percentile(latencies, 99):.1f} ms · estados {statuses}"
+            )
+        finally:
+            cleanup()
+
+    def _scan(self, base_url, token, student_id):
+        request = urllib.request.Request(
+            f"{base_url}/api/attendance/checkin_qr/?token={token}",
+            data=json.dumps({"student_id": student_id}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = "error"
+        return (time.perf_counter() - start) * 1000, status
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Class
+from core.qr import SHEET_FORMATS, render_sheet
+from core.views import filter_classes
+
+
+class Command(BaseCommand):
+    help = "Genera un PDF o ZIP con los QR imprimibles de las clases filtradas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Fichero de salida (.pdf o .zip)")
+        parser.add_argument("--class", dest="class", help="Nombre de la clase (contiene)")
+        parser.add_argument("--room", help="ID del aula")
+        parser.add_argument("--teacher", help="ID del profesor")
+        parser.add_argument("--weekday", help="Día de la semana (0=lunes)")
+        parser.add_argument("--size", type=int, default=600, help="Lado del QR en píxeles")
+
+    def handle(self, *args, **opts):
+        fmt = opts["output"].rsplit(".", 1)[-1].lower()
+        if fmt not in SHEET_FORMATS:
+            raise CommandError("La salida debe terminar en .pdf o .zip")
+
+        classes = list(filter_classes(
+            Class.objects.select_related("room").order_by("room__name", "weekday", "start_time"),
+            {k: opts[k] for k in ("class", "room", "teacher", "weekday")},
+        ))
+        if not classes:
+            raise CommandError("Ninguna clase coincide con el filtro")
+        document, _, _ = render_sheet(classes, fmt, opts["size"])
+        with open(opts["output"], "wb") as f:
+            f.write(document)
+        self.stdout.write(self.style.SUCCESS(f"{len(classes)} clases → {opts['output']}"))
@@ -0,0 +1,34 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.catalog import bump_version
+from core.models import Class
+from core.qr import qr_is_current, qr_payload, render_png, store_qr
+
+
+class Command(BaseCommand):
+    help = "Regenera en paralelo los QR de las clases cuya imagen falta o está desfasada."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerar también los que están al día")
+        parser.add_argument("--workers", type=int, default=None, help="Procesos de render (por defecto, nº de CPUs)")
+
+    def handle(self, *args, **opts):
+        classes = [
+            c for c in Class.objects.only("pk", "qr_image").order_by("pk")
+            if opts["force"] or not qr_is_current(c)
+        ]
+        if not classes:
+            self.stdout.write("Todos los QR están al día.")
+            return
+
+        with ProcessPoolExecutor(opts["workers"]) as pool:
+            pngs = pool.map(render_png, [qr_payload(c) for c in classes], chunksize=16)
+            for clazz, png in zip(classes, pngs):
+                clazz.qr_image.name = store_qr(clazz, png, overwrite=opts["force"])
+
+        # bulk_update no dispara post_save: no se vuelven a encolar renders
+        Class.objects.bulk_update(classes, ["qr_image"], batch_size=500)
+        bump_version("class")
+        self.stdout.write(self.style.SUCCESS(f"{len(classes)} QR regenerados."))
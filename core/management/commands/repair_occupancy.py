@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core import occupancy
+
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores de ocupación a partir de las asistencias abiertas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Solo ese día (YYYY-MM-DD); por defecto, todos")
+
+    def handle(self, *args, **opts):
+        date = None
+        if opts["date"]:
+            date = parse_date(opts["date"])
+            if date is None:
+                raise CommandError("Fecha inválida (YYYY-MM-DD)")
+        fixed = occupancy.repair(date)
+        self.stdout.write(self.style.SUCCESS(f"{fixed} contadores corregidos."))
@@ -0,0 +1,133 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from core.benchmarks import cleanup, create_fixture, enroll_all, percentile
+from core.checkin import CheckinRejected, toggle_attendance
+from core.models import Class
+from core.writes import is_locked_error
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de estrés de SQLite con varios procesos escribiendo check-ins a la vez, "
+        "primero con la configuración por defecto y después con SQLITE_HIGH_CONCURRENCY. "
+        "Informa de la tasa de errores 'database is locked'. Ejecutar contra una copia de "
+        "la base: cambia su journal_mode. Crea datos 'bench-' y los borra al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=4, help="procesos, como workers de gunicorn")
+        parser.add_argument("--threads", type=int, default=4, help="hilos por proceso")
+        parser.add_argument("--scans", type=int, default=200, help="escaneos por hilo")
+        parser.add_argument("--classes", type=int, default=5)
+        parser.add_argument("--students", type=int, default=500)
+        parser.add_argument("--worker", action="store_true", help="uso interno: proceso hijo")
+
+    def handle(self, *args, **opts):
+        if opts["worker"]:
+            return self._worker()
+        if connection.vendor != "sqlite":
+            raise CommandError("Solo tiene sentido con SQLite")
+
+        try:
+            for label, high in (("por defecto", False), ("alta concurrencia", True)):
+                classes, student_ids = create_fixture(opts["classes"], opts["students"])
+                enroll_all(classes, student_ids)
+                if not high:
+                    with connection.cursor() as cursor:
+                        cursor.execute("PRAGMA journal_mode=DELETE")
+                connection.close()
+                job = json.dumps({
+                    "classes": [c.pk for c in classes], "students": student_ids,
+                    "threads": opts["threads"], "scans": opts["scans"],
+                })
+                self._report(label, self._run(job, high, opts["processes"]))
+                cleanup()
+        finally:
+            cleanup()
+
+    def _run(self, job, high, processes):
+        env = {
+            **os.environ,
+            "SQLITE_HIGH_CONCURRENCY": str(high),
+            # "Antes" es la configuración original: sin reintentos
+            "SQLITE_WRITE_RETRIES": os.environ.get("SQLITE_WRITE_RETRIES", "3") if high else "0",
+            "ATTENDANCE_BUFFERED_INGEST": "False",
+        }
+        procs = [
+            subprocess.Popen(
+                [sys.executable, "-m", "django", "stress_sqlite", "--worker"],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, text=True,
+            )
+            for _ in range(processes)
+        ]
+        results = []
+        for proc in procs:
+            out, _ = proc.communicate(job)
+            if proc.returncode:
+                raise CommandError("Un proceso de la prueba terminó con error")
+            results.append(json.loads(out))
+        return results
+
+    def _report(self, label, results):
+        latencies = sorted(ms for r in results for ms in r["latencies"])
+        total = len(latencies)
+        locked = sum(r["locked"] for r in results)
+        rejected = sum(r["rejected"] for r in results)
+        errors = sum(r["errors"] for r in results)
+        elapsed = max(r["end"] for r in results) - min(r["start"] for r in results)
+        written = total - locked - errors - rejected
+        self.stdout.write(
+            f"{label:>17}: {total} escaneos · bloqueos {locked} ({100 * locked / total:.1f}%) · "
+            f"rechazados {rejected} · otros errores {errors} · {written / elapsed:.0f} escrituras/s · "
+            f"p50 {percentile(latencies, 50):.1f} ms · p95 {percentile(latencies, 95):.1f} ms · "
+            f"p99 {percentile(latencies, 99):.1f} ms"
+        )
+
+    # -------------------------------
+    # Proceso hijo
+    # -------------------------------
+
+    def _worker(self):
+        job = json.loads(sys.stdin.read())
+        classes = list(Class.objects.filter(pk__in=job["classes"]).select_related("room"))
+        connection.close()
+        stats = {"locked": 0, "rejected": 0, "errors": 0, "latencies": []}
+        lock = threading.Lock()
+
+        def run():
+            rnd = random.Random()
+            for _ in range(job["scans"]):
+                clazz, student_id = rnd.choice(classes), rnd.choice(job["students"])
+                start = time.perf_counter()
+                outcome = None
+                try:
+                    toggle_attendance(clazz, student_id)
+                except CheckinRejected:
+                    outcome = "rejected"
+                except OperationalError as e:
+                    outcome = "locked" if is_locked_error(e) else "errors"
+                except Exception:
+                    outcome = "errors"
+                with lock:
+                    stats["latencies"].append((time.perf_counter() - start) * 1000)
+                    if outcome:
+                        stats[outcome] += 1
+            connection.close()
+
+        threads = [threading.Thread(target=run) for _ in range(job["threads"])]
+        stats["start"] = time.time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats["end"] = time.time()
+        self.stdout.write(json.dumps(stats))
@@ -0,0 +1,103 @@
+"""
+Matrículas activas por clase, en memoria.
+
+Cada clase guarda el conjunto de ids de sus alumnos con matrícula ACTIVE,
+cargado la primera vez que se consulta (una consulta por clase). Después,
+``is_enrolled`` es una búsqueda en un set: microsegundos y sin tocar la BD.
+
+Se mantiene con las señales de Enrollment (tras el commit). Las altas en
+bloque (core.roster) invalidan las clases afectadas. Los cambios de otros
+procesos se detectan por la versión "enrollment" de CatalogVersion,
+revisada como mucho cada ROSTER_REFRESH_SECONDS.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .catalog import get_versions
+from .models import Enrollment
+
+
+class RosterIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rosters = {}       # clazz_id -> set(student_id)
+        self._generation = 0     # cambia con cada modificación local
+        self._version = None
+        self._checked = 0.0
+
+    def is_enrolled(self, clazz_id, student_id):
+        self.ensure_fresh()
+        roster = self._rosters.get(clazz_id)
+        if roster is None:
+            roster = self._load(clazz_id)
+        return int(student_id) in roster
+
+    def _load(self, clazz_id):
+        generation = self._generation
+        roster = set(
+            Enrollment.objects.filter(clazz_id=clazz_id, status=Enrollment.ACTIVE)
+            .values_list("student_id", flat=True)
+        )
+        with self._lock:
+            # Si hubo un cambio mientras se leía, no se cachea (la próxima vez se recarga)
+            if generation == self._generation:
+                self._rosters[clazz_id] = roster
+        return roster
+
+    # -------------------------------
+    # Mantenimiento
+    # -------------------------------
+
+    def ensure_fresh(self):
+        """Descarta todo si otro proceso cambió matrículas desde la última revisión."""
+        if time.monotonic() - self._checked < settings.ROSTER_REFRESH_SECONDS:
+            return
+        version = get_versions(("enrollment",))
+        with self._lock:
+            self._checked = time.monotonic()
+            if version != self._version:
+                self._version = version
+                self._rosters.clear()
+                self._generation += 1
+
+    def apply(self, clazz_id, student_id, active, moved=False):
+        """Refleja el alta, baja o cambio de una matrícula guardada en este proceso."""
+        with self._lock:
+            self._generation += 1
+            if moved:
+                # Una matrícula editada puede venir de otra clase: las que tengan al
+                # alumno se recargarán (puede seguir matriculado en ellas por otra fila)
+                for other in [c for c, roster in self._rosters.items() if c != clazz_id and student_id in roster]:
+                    del self._rosters[other]
+            roster = self._rosters.get(clazz_id)
+            if roster is not None:
+                if active:
+                    roster.add(student_id)
+                else:
+                    roster.discard(student_id)
+        self._advance_version()
+
+    def invalidate(self, clazz_ids=None):
+        with self._lock:
+            self._generation += 1
+            if clazz_ids is None:
+                self._rosters.clear()
+            for clazz_id in clazz_ids or ():
+                self._rosters.pop(clazz_id, None)
+        self._advance_version()
+
+    def _advance_version(self):
+        # Como en core.timetable: si solo ha entrado nuestro cambio, seguimos al día.
+        # Sin nada cargado no hace falta consultar: como mucho se vacía una caché vacía.
+        if not self._rosters:
+            return
+        current = get_versions(("enrollment",))
+        with self._lock:
+            if self._version is not None and current[0] == self._version[0] + 1:
+                self._version = current
+
+
+class_rosters = RosterIndex()
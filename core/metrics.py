@@ -0,0 +1,271 @@
+"""
+Métricas de peticiones, base de datos y operaciones costosas, en formato
+de texto de Prometheus (``/metrics``).
+
+- ``MetricsMiddleware`` mide cada petición y la etiqueta con la ruta de
+  URL y la vista que la atendió: histograma de latencia, nº de consultas
+  por petición y tiempo total en la base de datos.
+- Las consultas se cuentan con un ``execute_wrapper`` que se instala en
+  cada conexión nueva; apunta en el estado de la petición en curso (una
+  ContextVar, así que también funciona con vistas async y sync_to_async).
+- ``timed(name)`` mide operaciones sueltas (render de QR, escritura CSV).
+  El cuerpo de una respuesta en streaming se genera después de salir del
+  middleware: su tiempo y sus consultas cuentan en ``csv_export``, no en la ruta.
+- Con METRICS_SLOW_REQUEST_MS > 0 se guarda el SQL de cada petición y, si
+  supera el umbral, se registra en el log ``core.metrics.slow``. Con 0 no
+  se guarda nada.
+
+Los valores son por proceso (cada worker de gunicorn expone los suyos).
+"""
+import bisect
+import contextlib
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+slow_logger = logging.getLogger("core.metrics.slow")
+
+NAMESPACE = "qrclassmanager"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            yield f'{name}_bucket{_labels(labels, le=bound)} {total}'
+        yield f"{name}_sum{_labels(labels)} {self.sum}"
+        yield f"{name}_count{_labels(labels)} {total}"
+
+
+class Registry:
+    """Contadores e histogramas por etiquetas, protegidos por un lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}    # nombre -> {labels: valor}
+        self._histograms = {}  # nombre -> {labels: Histogram}
+        self._help = {}
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if labels not in series:
+                series[labels] = Histogram(buckets)
+            series[labels].observe(value)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name in sorted({*self._counters, *self._histograms}):
+                kind, text = self._help.get(name, ("untyped", ""))
+                full = f"{NAMESPACE}_{name}"
+                lines += [f"# HELP {full} {text}", f"# TYPE {full} {kind}"]
+                for labels, value in sorted(self._counters.get(name, {}).items()):
+                    lines.append(f"{full}{_labels(labels)} {value}")
+                for labels, histogram in sorted(self._histograms.get(name, {}).items()):
+                    lines.extend(histogram.lines(full, labels))
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+registry.describe("http_requests_total", "counter", "Peticiones atendidas")
+registry.describe("http_request_duration_seconds", "histogram", "Latencia de la petición")
+registry.describe("db_queries_per_request", "histogram", "Consultas SQL por petición")
+registry.describe("db_queries_total", "counter", "Consultas SQL")
+registry.describe("db_query_seconds_total", "counter", "Tiempo en la base de datos")
+registry.describe("slow_requests_total", "counter", "Peticiones por encima de METRICS_SLOW_REQUEST_MS")
+registry.describe("operation_duration_seconds", "histogram", "Duración de operaciones (render de QR, CSV)")
+
+
+# -------------------------------
+# Consultas SQL
+# -------------------------------
+
+class RequestStats:
+    __slots__ = ("queries", "query_time", "sql")
+
+    def __init__(self, capture_sql):
+        self.queries = 0
+        self.query_time = 0.0
+        self.sql = [] if capture_sql else None
+
+
+_current = ContextVar("metrics_request", default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.queries += 1
+        stats.query_time += elapsed
+        if stats.sql is not None:
+            stats.sql.append((elapsed, sql))
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    if settings.METRICS_ENABLED and _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+# -------------------------------
+# Operaciones
+# -------------------------------
+
+@contextlib.contextmanager
+def timed(operation):
+    """``with timed("qr_render"): ...`` suma la duración al histograma de operaciones."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe("operation_duration_seconds", (("operation", operation),),
+                         time.perf_counter() - start)
+
+
+def timed_iter(operation, iterable):
+    """Como ``timed`` para un generador en streaming: solo cuenta el tiempo en producir cada trozo."""
+    spent = 0.0
+    try:
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                spent += time.perf_counter() - start
+                return
+            spent += time.perf_counter() - start
+            yield chunk
+    finally:
+        registry.observe("operation_duration_seconds", (("operation", operation),), spent)
+
+
+# -------------------------------
+# Middleware y vista
+# -------------------------------
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        stats, token, start = self._begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, stats, start)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+        stats, token, start = self._begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, stats, start)
+        return response
+
+    def _begin(self):
+        stats = RequestStats(capture_sql=settings.METRICS_SLOW_REQUEST_MS > 0)
+        return stats, _current.set(stats), time.perf_counter()
+
+    def _finish(self, request, response, stats, start):
+        elapsed = time.perf_counter() - start
+        match = getattr(request, "resolver_match", None)
+        route = (("route", match.route), ("view", match.view_name or match._func_path)) if match else (
+            ("route", "unmatched"), ("view", "unmatched"))
+
+        registry.inc("http_requests_total", (*route, ("method", request.method), ("status", response.status_code)))
+        registry.observe("http_request_duration_seconds", route, elapsed)
+        registry.observe("db_queries_per_request", route, stats.queries, QUERY_COUNT_BUCKETS)
+        registry.inc("db_queries_total", route, stats.queries)
+        registry.inc("db_query_seconds_total", route, stats.query_time)
+
+        if stats.sql is not None and elapsed * 1000 >= settings.METRICS_SLOW_REQUEST_MS:
+            registry.inc("slow_requests_total", route)
+            slowest = sorted(stats.sql, reverse=True)[:settings.METRICS_SLOW_SQL_LIMIT]
+            slow_logger.warning(
+                "Petición lenta %s %s (%s): %.0f ms, %d consultas, %.0f ms en BD\n%s",
+                request.method, request.path, dict(route)["view"], elapsed * 1000,
+                stats.queries, stats.query_time * 1000,
+                "\n".join(f"  {t * 1000:.1f} ms  {sql}" for t, sql in slowest),
+            )
+
+
+def metrics_view(request):
+    """
+    Exposición en texto de Prometheus. Con METRICS_TOKEN exige
+    ``Authorization: Bearer``; sin él, solo la ve el personal (sesión del admin).
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        if request.headers.get("Authorization") != f"Bearer {token}":
+            return HttpResponse(status=401)
+    elif not request.user.is_staff:
+        return HttpResponse(status=403)
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
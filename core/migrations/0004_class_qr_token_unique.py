@@ -0,0 +1,30 @@
+import uuid
+
+from django.db import migrations, models
+
+
+def backfill_qr_tokens(apps, schema_editor):
+    """Asigna un token a las clases sin él y regenera los duplicados antes de exigir unique."""
+    Class = apps.get_model("core", "Class")
+    seen = set()
+    for clazz in Class.objects.order_by("pk").only("pk", "qr_token"):
+        if clazz.qr_token is None or clazz.qr_token in seen:
+            clazz.qr_token = uuid.uuid4()
+            Class.objects.filter(pk=clazz.pk).update(qr_token=clazz.qr_token)
+        seen.add(clazz.qr_token)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_attendance_method'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_qr_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='class',
+            name='qr_token',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
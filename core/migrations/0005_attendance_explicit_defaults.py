@@ -0,0 +1,24 @@
+import datetime
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_class_qr_token_unique'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='date',
+            field=models.DateField(default=datetime.date.today, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='check_in',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_attendance_explicit_defaults'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'clazz', 'date'], name='attendance_toggle_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(condition=models.Q(('check_out__isnull', True)), fields=['student', 'clazz', 'date'], name='attendance_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'clazz'], name='attendance_date_idx'),
+        ),
+    ]
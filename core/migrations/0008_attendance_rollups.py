@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassDayStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('headcount', models.PositiveIntegerField(default=0)),
+                ('on_time', models.PositiveIntegerField(default=0)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('clazz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_stats', to='core.class')),
+            ],
+            options={
+                'unique_together': {('clazz', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentClassStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('on_time', models.PositiveIntegerField(default=0)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('clazz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_stats', to='core.class')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='class_stats', to='core.student')),
+            ],
+            options={
+                'unique_together': {('student', 'clazz')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('clazz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='core.class')),
+            ],
+            options={
+                'unique_together': {('clazz', 'date')},
+            },
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate, editable=False),
+        ),
+    ]
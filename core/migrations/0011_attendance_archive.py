@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAttendance',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('check_in', models.DateTimeField()),
+                ('check_out', models.DateTimeField()),
+                ('method', models.CharField(blank=True, max_length=10)),
+                ('clazz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendances', to='core.class')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendances', to='core.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'clazz'], name='archive_date_idx')],
+            },
+        ),
+    ]
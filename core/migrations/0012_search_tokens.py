@@ -0,0 +1,83 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:05
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copia de core.search tal como era al crear la migración: si el módulo
+# cambia más adelante, esta migración debe seguir haciendo lo mismo.
+def normalize(text):
+    decomposed = unicodedata.normalize("NFKD", (text or "").casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def words(text):
+    return re.findall(r"\w+", normalize(text))
+
+
+def student_tokens(first_name, last_name, dni, email):
+    tokens = {*words(first_name), *words(last_name), normalize(dni), normalize(email)}
+    return {token[:254] for token in tokens if token}
+
+
+def class_tokens(name):
+    return {token[:120] for token in words(name)}
+
+
+def backfill_search_tokens(apps, schema_editor):
+    """Tokens de los alumnos y clases existentes (después los mantiene core.search)."""
+    Student = apps.get_model("core", "Student")
+    Class = apps.get_model("core", "Class")
+    StudentSearchToken = apps.get_model("core", "StudentSearchToken")
+    ClassSearchToken = apps.get_model("core", "ClassSearchToken")
+    batch = []
+    for pk, first_name, last_name, dni, email in Student.objects.values_list(
+        "pk", "first_name", "last_name", "dni", "email"
+    ).iterator(chunk_size=2000):
+        batch += [StudentSearchToken(student_id=pk, token=t) for t in student_tokens(first_name, last_name, dni, email)]
+        if len(batch) >= 5000:
+            StudentSearchToken.objects.bulk_create(batch)
+            batch = []
+    StudentSearchToken.objects.bulk_create(batch)
+    ClassSearchToken.objects.bulk_create(
+        ClassSearchToken(clazz_id=pk, token=t)
+        for pk, name in Class.objects.values_list("pk", "name") for t in class_tokens(name)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_attendance_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=120)),
+                ('clazz', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='core.class')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'clazz'], name='class_token_idx')],
+                'unique_together': {('clazz', 'token')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=254)),
+                ('student', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='core.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'student'], name='student_token_idx')],
+                'unique_together': {('student', 'token')},
+            },
+        ),
+        migrations.RunPython(backfill_search_tokens, migrations.RunPython.noop),
+    ]
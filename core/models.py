@@ -1,4 +1,6 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 import uuid
 
 class Room(models.Model):
@@ -28,12 +30,27 @@ class Class(models.Model):
     end_time     = models.TimeField()
     capacity_override = models.PositiveSmallIntegerField(null=True, blank=True)
     qr_image     = models.ImageField(upload_to="class_qr/", blank=True)
-    qr_token     = models.UUIDField(default=uuid.uuid4, editable=False, null=True, blank=True)  # Sin unique
+    qr_token     = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
 
     @property
     def capacity(self):
         return self.capacity_override or self.room.capacity or 40
 
+    def clean(self):
+        if self.start_time and self.end_time and self.start_time >= self.end_time:
+            raise ValidationError({"end_time": "La hora de fin debe ser posterior a la de inicio."})
+        conflicts = self.room_conflicts()
+        if conflicts:
+            raise ValidationError({"room": f"El aula ya está ocupada en ese horario por: {', '.join(conflicts)}."})
+
+    def room_conflicts(self):
+        """Nombres de las clases que ocupan la misma aula en una franja solapada."""
+        if self.room_id is None or self.weekday is None or not self.start_time or not self.end_time:
+            return []
+        from .timetable import timetable
+        pks = timetable.conflicts(self.room_id, self.weekday, self.start_time, self.end_time, exclude=self.pk)
+        return list(Class.objects.filter(pk__in=pks).values_list("name", flat=True)) if pks else []
+
     def __str__(self):
         return self.name
 
@@ -48,6 +65,11 @@ class Student(models.Model):
 class Enrollment(models.Model):
     class Meta:
         unique_together = ("student", "clazz")
+        indexes = [
+            # Paginación por cursor (created, id), global y por clase
+            models.Index(fields=["created", "id"], name="enrollment_created_idx"),
+            models.Index(fields=["clazz", "created"], name="enrollment_class_created_idx"),
+        ]
     ACTIVE   = "A"
     CANCELED = "C"
     STATUS_CHOICES = [(ACTIVE, "Activo"), (CANCELED, "Baja")]
@@ -61,9 +83,117 @@ class Enrollment(models.Model):
 class Attendance(models.Model):
     clazz    = models.ForeignKey(Class, on_delete=models.CASCADE, related_name="attendances")
     student  = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="attendances")
-    date     = models.DateField(auto_now_add=True)
-    check_in = models.DateTimeField(auto_now_add=True)
+    # default en lugar de auto_now_add: las altas en bloque (bulk_create) conservan la hora real del escaneo
+    date     = models.DateField(default=timezone.localdate, editable=False)  # día en TIME_ZONE, como check_in
+    check_in = models.DateTimeField(default=timezone.now, editable=False)
     check_out = models.DateTimeField(null=True, blank=True)
     method = models.CharField(max_length=10, default="web", blank=True)  # Para distinguir QR/web
+
+    class Meta:
+        indexes = [
+            # Alternado check-in/check-out: (alumno, clase, día)
+            models.Index(fields=["student", "clazz", "date"], name="attendance_toggle_idx"),
+            # Solo asistencias abiertas: pequeño aunque la tabla crezca
+            models.Index(
+                fields=["student", "clazz", "date"], name="attendance_open_idx",
+                condition=models.Q(check_out__isnull=True),
+            ),
+            # Exportaciones por rango de fechas
+            models.Index(fields=["date", "clazz"], name="attendance_date_idx"),
+            # Paginación por cursor (check_in, id), global y por clase
+            models.Index(fields=["check_in", "id"], name="attendance_checkin_idx"),
+            models.Index(fields=["clazz", "check_in"], name="attendance_class_checkin_idx"),
+        ]
     def __str__(self):
         return f"{self.student} @ {self.clazz} ({self.date})"
+
+class ArchivedAttendance(models.Model):
+    """Asistencias cerradas de cursos anteriores, movidas desde Attendance por core.archive."""
+    id       = models.BigIntegerField(primary_key=True)  # el que tenía en Attendance
+    clazz    = models.ForeignKey(Class, on_delete=models.CASCADE, related_name="archived_attendances")
+    student  = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="archived_attendances")
+    date     = models.DateField()
+    check_in = models.DateTimeField()
+    check_out = models.DateTimeField()
+    method = models.CharField(max_length=10, blank=True)
+
+    class Meta:
+        indexes = [
+            # Exportaciones por rango de fechas (además de los de las FK, nada más)
+            models.Index(fields=["date", "clazz"], name="archive_date_idx"),
+        ]
+    def __str__(self):
+        return f"{self.student} @ {self.clazz} ({self.date})"
+
+# -------------------------------
+# Resúmenes (rollups) mantenidos por core.rollups
+# -------------------------------
+
+class ClassDayStats(models.Model):
+    class Meta:
+        unique_together = ("clazz", "date")
+    clazz    = models.ForeignKey(Class, on_delete=models.CASCADE, related_name="day_stats")
+    date     = models.DateField()
+    headcount = models.PositiveIntegerField(default=0)   # alumnos distintos del día
+    on_time   = models.PositiveIntegerField(default=0)   # de ellos, con la primera entrada en el margen de puntualidad
+    minutes   = models.PositiveIntegerField(default=0)   # minutos presentes (check-ins cerrados)
+    def __str__(self):
+        return f"{self.clazz} ({self.date}): {self.headcount}"
+
+class StudentClassStats(models.Model):
+    class Meta:
+        unique_together = ("student", "clazz")
+    student  = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="class_stats")
+    clazz    = models.ForeignKey(Class, on_delete=models.CASCADE, related_name="student_stats")
+    sessions = models.PositiveIntegerField(default=0)  # días distintos con asistencia
+    on_time  = models.PositiveIntegerField(default=0)
+    minutes  = models.PositiveIntegerField(default=0)
+    def __str__(self):
+        return f"{self.student} @ {self.clazz}: {self.sessions}"
+
+class ClassOccupancy(models.Model):
+    """Alumnos dentro ahora mismo (check-in sin check-out) por clase y día; ver core.occupancy."""
+    class Meta:
+        unique_together = ("clazz", "date")
+    clazz = models.ForeignKey(Class, on_delete=models.CASCADE, related_name="occupancy")
+    date  = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    def __str__(self):
+        return f"{self.clazz} ({self.date}): {self.count}"
+
+class CatalogVersion(models.Model):
+    """Versión de cada catálogo (rooms, teachers, classes); la incrementan las señales de core.signals."""
+    name    = models.CharField(max_length=30, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+# -------------------------------
+# Búsqueda por nombre, mantenida por core.search
+# -------------------------------
+
+class StudentSearchToken(models.Model):
+    """Palabras del nombre, DNI y email de un alumno, sin acentos ni mayúsculas."""
+    class Meta:
+        unique_together = ("student", "token")
+        indexes = [
+            # Prefijo de una palabra → alumnos: rango sobre el índice, sin leer la tabla
+            models.Index(fields=["token", "student"], name="student_token_idx"),
+        ]
+    # Sin índice propio: lo cubre el de unique_together (student, token)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="search_tokens", db_index=False)
+    token   = models.CharField(max_length=254)
+    def __str__(self):
+        return f"{self.token} → {self.student_id}"
+
+class ClassSearchToken(models.Model):
+    """Palabras del nombre de una clase, sin acentos ni mayúsculas."""
+    class Meta:
+        unique_together = ("clazz", "token")
+        indexes = [
+            models.Index(fields=["token", "clazz"], name="class_token_idx"),
+        ]
+    clazz = models.ForeignKey(Class, on_delete=models.CASCADE, related_name="search_tokens", db_index=False)
+    token = models.CharField(max_length=120)
+    def __str__(self):
+        return f"{self.token} → {self.clazz_id}"
@@ -0,0 +1,80 @@
+"""
+Contadores de ocupación en vivo por clase y sesión (día).
+
+Las plazas se reservan con un UPDATE condicional de una sola fila
+(``count = count + 1 WHERE count < aforo``), atómico en la base de datos,
+así que varios workers de gunicorn no pueden sobrepasar el aforo. Si el
+contador se desajusta (ediciones manuales, borrados) se repara con
+``repair_occupancy`` a partir de las asistencias abiertas reales.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Attendance, ClassOccupancy
+
+
+def reserve_seat(clazz, date):
+    """Ocupa una plaza. Devuelve False si la sesión está completa (y se aplica el aforo)."""
+    qs = ClassOccupancy.objects.filter(clazz=clazz, date=date)
+    if settings.ATTENDANCE_ENFORCE_CAPACITY:
+        qs = qs.filter(count__lt=clazz.capacity)
+    for _ in range(2):
+        if qs.update(count=F("count") + 1):
+            return True
+        _, created = ClassOccupancy.objects.get_or_create(clazz=clazz, date=date)
+        if not created:
+            return False
+    return False
+
+
+def release_seat(clazz_id, date):
+    ClassOccupancy.objects.filter(clazz_id=clazz_id, date=date, count__gt=0).update(count=F("count") - 1)
+
+
+def release_seats(clazz_id, date, n):
+    """Libera ``n`` plazas de una vez (cierre en bloque, ver core.autocheckout)."""
+    ClassOccupancy.objects.filter(clazz_id=clazz_id, date=date).update(count=Greatest(F("count") - n, 0))
+
+
+def apply_deltas(deltas):
+    """Suma variaciones {(clazz_id, date): n} sin condición (sincronización en bloque)."""
+    for (clazz_id, date), delta in deltas.items():
+        if not delta:
+            continue
+        ClassOccupancy.objects.get_or_create(clazz_id=clazz_id, date=date)
+        ClassOccupancy.objects.filter(clazz_id=clazz_id, date=date).update(count=F("count") + delta)
+
+
+def current(clazz_id, date):
+    return (
+        ClassOccupancy.objects.filter(clazz_id=clazz_id, date=date)
+        .values_list("count", flat=True).first() or 0
+    )
+
+
+def repair(date=None):
+    """Recalcula los contadores desde las asistencias abiertas. Devuelve las sesiones corregidas."""
+    open_atts = Attendance.objects.filter(check_out__isnull=True)
+    counters = ClassOccupancy.objects.all()
+    if date is not None:
+        open_atts = open_atts.filter(date=date)
+        counters = counters.filter(date=date)
+
+    real = {
+        (row["clazz_id"], row["date"]): row["n"]
+        for row in open_atts.values("clazz_id", "date").annotate(n=Count("id"))
+    }
+    fixed = 0
+    with transaction.atomic():
+        for occ in counters.select_for_update():
+            count = real.pop((occ.clazz_id, occ.date), 0)
+            if occ.count != count:
+                occ.count = count
+                occ.save(update_fields=["count"])
+                fixed += 1
+        ClassOccupancy.objects.bulk_create(
+            ClassOccupancy(clazz_id=clazz_id, date=day, count=n) for (clazz_id, day), n in real.items()
+        )
+    return fixed + len(real)
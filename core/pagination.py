@@ -0,0 +1,175 @@
+import base64
+import json
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import LRUCache
+
+_count_cache = LRUCache(getattr(settings, "PAGINATION_COUNT_CACHE_SIZE", 256))
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (``ordering_field``, id), de más
+    reciente a más antiguo. El cursor guarda la última clave servida, así que
+    la página 1000 cuesta lo mismo que la primera (sin OFFSET).
+
+    El total solo se calcula en la primera página, según ``?count=``:
+    - ``estimate`` (por defecto): estimación del motor si no hay filtros;
+      con filtros, COUNT cacheado.
+    - ``exact``: COUNT cacheado PAGINATION_COUNT_TTL segundos.
+    - ``none``: sin total.
+    """
+
+    ordering_field = None
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+    filter_params = ()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        field = self.ordering_field
+
+        qs = queryset.order_by(f"-{field}", "-pk")
+        position = self.decode_cursor(request)
+        if position:
+            value, pk = position
+            # El __lte redundante deja al planificador recorrer el índice por rango
+            qs = qs.filter(**{f"{field}__lte": value}).filter(
+                Q(**{f"{field}__lt": value}) | Q(**{field: value, "pk__lt": pk})
+            )
+
+        rows = list(qs[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        self.count = None if position else self.get_count(queryset, request)
+        return rows
+
+    def get_position(self, row):
+        # Filas de modelo o dicts de values() (ruta rápida, ver core.fastread)
+        if isinstance(row, dict):
+            return row[self.ordering_field], row["id"]
+        return getattr(row, self.ordering_field), row.pk
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # -------------------------------
+    # Cursor
+    # -------------------------------
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(raw.encode()))
+            value = parse_datetime(value)
+            if value is None:
+                raise ValueError
+            return value, int(pk)
+        except (TypeError, ValueError):
+            raise NotFound("Cursor inválido")
+
+    def encode_cursor(self, position):
+        value, pk = position
+        raw = json.dumps([value.isoformat(), pk]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def get_next_link(self):
+        if not self.next_position:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    # -------------------------------
+    # Total
+    # -------------------------------
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param, "estimate")
+        if mode == "none":
+            return None
+        filters = tuple(sorted(
+            (k, v) for k, v in request.query_params.items() if k in self.filter_params
+        ))
+        if mode == "estimate" and not filters:
+            return estimate_table_rows(queryset.model)
+
+        key = (queryset.model._meta.label, filters)
+        cached = _count_cache.get(key)
+        if cached and time.monotonic() - cached[1] < settings.PAGINATION_COUNT_TTL:
+            return cached[0]
+        count = queryset.count()
+        _count_cache.set(key, (count, time.monotonic()))
+        return count
+
+    def get_paginated_payload(self, data):
+        payload = {"next": self.get_next_link(), "results": data}
+        if self.count is not None:
+            payload = {"count": self.count, **payload}
+        return payload
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_payload(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "description": "Solo en la primera página; puede ser estimado"},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {"name": self.cursor_query_param, "required": False, "in": "query",
+             "description": "Cursor de la página siguiente", "schema": {"type": "string"}},
+            {"name": self.page_size_query_param, "required": False, "in": "query",
+             "description": f"Resultados por página (máx. {self.max_page_size})", "schema": {"type": "integer"}},
+            {"name": self.count_query_param, "required": False, "in": "query",
+             "description": "estimate (por defecto), exact o none", "schema": {"type": "string"}},
+        ]
+
+
+def estimate_table_rows(model):
+    """Número aproximado de filas sin recorrer la tabla."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    # Ids autoincrementales: MAX(id) es una lectura del índice y solo sobrestima por los borrados
+    return model.objects.aggregate(n=Max("pk"))["n"] or 0
+
+
+class AttendancePagination(KeysetPagination):
+    ordering_field = "check_in"
+    filter_params = ("class", "student", "from", "to")
+
+
+class EnrollmentPagination(KeysetPagination):
+    ordering_field = "created"
+    filter_params = ("class", "student", "from", "to")
@@ -0,0 +1,26 @@
+"""
+Carteles PNG de las hojas imprimibles de QR (core.qr.render_sheet).
+
+Se renderizan en un pool de procesos arrancados con "spawn", que importan
+este módulo desde cero sin configurar Django: aquí no puede importarse
+nada que toque modelos ni settings.
+"""
+import io
+
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+
+def render_poster(payload, caption, size):
+    """Cartel PNG: el QR a ``size`` px con el rótulo de la clase debajo. Función pura."""
+    qr_img = qrcode.make(payload).get_image().convert("RGB").resize((size, size), Image.NEAREST)
+    font = ImageFont.load_default(size=max(12, size // 24))
+    margin = size // 10
+    poster = Image.new("RGB", (size, size + margin * 2), "white")
+    poster.paste(qr_img, (0, 0))
+    draw = ImageDraw.Draw(poster)
+    width = draw.textlength(caption, font=font)
+    draw.text(((size - width) / 2, size + margin / 2), caption, fill="black", font=font)
+    buffer = io.BytesIO()
+    poster.save(buffer, format="PNG")
+    return buffer.getvalue()
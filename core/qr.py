@@ -0,0 +1,285 @@
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import qrcode
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils.text import slugify
+from PIL import Image
+
+from .cache import LRUCache
+from .catalog import bump_version
+from .metrics import timed
+from .models import Class
+from .posters import render_poster
+from .qrtokens import current_window, make_token, window_start
+
+logger = logging.getLogger(__name__)
+
+
+def qr_payload(clazz):
+    """Contenido del QR. Debe ser determinista: del payload sale el nombre del fichero."""
+    return json.dumps({"class_id": clazz.pk}, sort_keys=True)
+
+
+def qr_filename(clazz):
+    """Nombre direccionado por contenido: un payload igual da siempre el mismo fichero."""
+    digest = hashlib.sha256(qr_payload(clazz).encode()).hexdigest()[:16]
+    return f"class_qr/class_{clazz.pk}_{digest}.png"
+
+
+def render_png(payload):
+    """Renderiza el payload a PNG. Función pura (apta para un pool de procesos)."""
+    buffer = io.BytesIO()
+    qrcode.make(payload).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def store_qr(clazz, png=None, overwrite=False):
+    """
+    Guarda el PNG con su nombre por contenido (si ese fichero ya existe no se
+    reescribe ni se renderiza) y borra la imagen anterior de la clase.
+    """
+    storage = Class._meta.get_field("qr_image").storage
+    name = qr_filename(clazz)
+    if overwrite and storage.exists(name):
+        storage.delete(name)
+    if not storage.exists(name):
+        name = storage.save(name, ContentFile(png or render_png(qr_payload(clazz))))
+    old = clazz.qr_image.name
+    if old and old != name and storage.exists(old):
+        storage.delete(old)
+    return name
+
+
+def qr_is_current(clazz):
+    return clazz.qr_image.name == qr_filename(clazz)
+
+
+def render_class_qr(pk, force=False):
+    """Genera el QR de una clase si falta o no corresponde a su payload actual."""
+    clazz = Class.objects.filter(pk=pk).only("pk", "qr_image").first()
+    if clazz is None or (qr_is_current(clazz) and not force):
+        return False
+    with timed("qr_render"):
+        name = store_qr(clazz, overwrite=force)
+    # update(): no dispara post_save, así que no vuelve a encolarse
+    Class.objects.filter(pk=pk).update(qr_image=name)
+    bump_version("class")
+    return True
+
+
+_executor = None
+
+
+def _run(pk):
+    try:
+        render_class_qr(pk)
+    except Exception:
+        logger.exception("Error generando el QR de la clase %s", pk)
+
+
+def schedule_qr_render(pk):
+    """
+    Encola el render del QR en el pool de hilos del proceso, tras el commit
+    de la transacción en curso. Con QR_RENDER_ASYNC=False se hace en línea.
+    """
+    global _executor
+    if not settings.QR_RENDER_ASYNC:
+        transaction.on_commit(lambda: render_class_qr(pk))
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(settings.QR_RENDER_WORKERS, thread_name_prefix="qr-render")
+    transaction.on_commit(lambda: _executor.submit(_run, pk))
+
+
+# -------------------------------
+# QR rotatorios (core.qrtokens)
+# -------------------------------
+# Un PNG por ventana de rotación en class_qr/rotating/<pk>/. El nombre lleva
+# un resumen del token (que incluye un nonce aleatorio): no se puede adivinar
+# la URL de la imagen de una ventana aunque MEDIA sea público.
+
+def rotating_dir(pk):
+    return f"class_qr/rotating/{pk}"
+
+
+def rotating_payload(pk, window):
+    return json.dumps({"class_id": pk, "token": make_token(pk, window)}, sort_keys=True)
+
+
+def _rotating_files(pk):
+    """{ventana: nombre} de los PNG rotatorios guardados de la clase."""
+    storage = Class._meta.get_field("qr_image").storage
+    try:
+        _, files = storage.listdir(rotating_dir(pk))
+    except FileNotFoundError:
+        return {}
+    found = {}
+    for filename in files:
+        window, _, _ = filename.partition("_")
+        if window.isdigit():
+            found[int(window)] = f"{rotating_dir(pk)}/{filename}"
+    return found
+
+
+def _store_rotating(pk, window, png_payload):
+    storage = Class._meta.get_field("qr_image").storage
+    digest = hashlib.sha256(png_payload.encode()).hexdigest()[:16]
+    return storage.save(f"{rotating_dir(pk)}/{window}_{digest}.png", ContentFile(render_png(png_payload)))
+
+
+def render_rotating(pk, first=None, count=None):
+    """
+    Renderiza por adelantado los QR de ``count`` ventanas (QR_ROTATION_BATCH)
+    desde ``first`` (por defecto, la actual), salvo los ya guardados, y borra
+    los de ventanas caducadas. Devuelve cuántos renderizó.
+    """
+    first = current_window() if first is None else first
+    count = count or settings.QR_ROTATION_BATCH
+    existing = _rotating_files(pk)
+    missing = [w for w in range(first, first + count) if w not in existing]
+    with timed("qr_rotating_render"):
+        for window in missing:
+            _store_rotating(pk, window, rotating_payload(pk, window))
+    _prune_rotating(existing)
+    return len(missing)
+
+
+def _prune_rotating(files):
+    storage = Class._meta.get_field("qr_image").storage
+    oldest = current_window() - settings.QR_ROTATION_GRACE_WINDOWS
+    for window, name in files.items():
+        if window < oldest:
+            storage.delete(name)
+
+
+def delete_rotating(pk):
+    storage = Class._meta.get_field("qr_image").storage
+    for name in _rotating_files(pk).values():
+        storage.delete(name)
+
+
+def current_rotating_qr(pk):
+    """
+    PNG del QR de la ventana actual y segundos que le quedan. Si el lote
+    pendiente baja de la mitad, encola el siguiente; si falta la imagen
+    actual (primer uso, otro proceso), la renderiza en línea.
+    """
+    window = current_window()
+    files = _rotating_files(pk)
+    if window + settings.QR_ROTATION_BATCH // 2 not in files:
+        schedule_rotating_render(pk)
+    name = files.get(window) or _store_rotating(pk, window, rotating_payload(pk, window))
+    storage = Class._meta.get_field("qr_image").storage
+    with storage.open(name) as f:
+        png = f.read()
+    remaining = window_start(window + 1) - time.time()
+    return png, max(int(remaining), 0)
+
+
+_rotating_pending = set()
+_rotating_lock = threading.Lock()
+
+
+def _run_rotating(pk):
+    try:
+        render_rotating(pk)
+    except Exception:
+        logger.exception("Error generando los QR rotatorios de la clase %s", pk)
+    finally:
+        with _rotating_lock:
+            _rotating_pending.discard(pk)
+
+
+def schedule_rotating_render(pk):
+    """Encola un lote de QR rotatorios en el pool de render (uno pendiente por clase)."""
+    global _executor
+    with _rotating_lock:
+        if pk in _rotating_pending:
+            return
+        _rotating_pending.add(pk)
+    if not settings.QR_RENDER_ASYNC:
+        _run_rotating(pk)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(settings.QR_RENDER_WORKERS, thread_name_prefix="qr-render")
+    _executor.submit(_run_rotating, pk)
+
+
+# -------------------------------
+# Hojas imprimibles (PDF / ZIP)
+# -------------------------------
+
+SHEET_FORMATS = ("pdf", "zip")
+
+_poster_cache = LRUCache(getattr(settings, "QR_SHEET_CACHE_SIZE", 512))   # (payload, rótulo, tamaño) → PNG
+_sheet_cache = LRUCache(getattr(settings, "QR_SHEET_DOCUMENT_CACHE_SIZE", 16))  # documento completo
+_process_pool = None
+
+
+def poster_caption(clazz):
+    return (
+        f"{clazz.name} · {clazz.room.name} · {clazz.get_weekday_display()} "
+        f"{clazz.start_time:%H:%M}-{clazz.end_time:%H:%M}"
+    )
+
+
+def _render_posters(jobs):
+    """Renderiza en el pool de procesos solo los carteles que no están en caché."""
+    global _process_pool
+    pngs = [_poster_cache.get(job) for job in jobs]
+    missing = [i for i, png in enumerate(pngs) if png is None]
+    if len(missing) > 1 and settings.QR_SHEET_WORKERS > 1:
+        if _process_pool is None:
+            # "spawn": un fork heredaría los hilos del worker (render en segundo
+            # plano, planificadores) y las conexiones a la BD abiertas
+            _process_pool = ProcessPoolExecutor(
+                settings.QR_SHEET_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        rendered = _process_pool.map(render_poster, *zip(*(jobs[i] for i in missing)))
+    else:
+        rendered = (render_poster(*jobs[i]) for i in missing)
+    for i, png in zip(missing, rendered):
+        _poster_cache.set(jobs[i], png)
+        pngs[i] = png
+    return pngs
+
+
+def render_sheet(classes, fmt="pdf", size=600):
+    """
+    Documento con los QR de ``classes``: un PDF de una página por clase o un
+    ZIP con un PNG por clase. Devuelve (bytes, content_type, nombre_fichero).
+    Lanza ValueError si no hay ninguna clase.
+    """
+    classes = list(classes)
+    if not classes:
+        raise ValueError("No hay clases para la hoja de QR")
+    jobs = [(qr_payload(c), poster_caption(c), size) for c in classes]
+    key = (fmt, tuple(jobs))
+    document = _sheet_cache.get(key)
+    if document is None:
+        with timed("qr_sheet"):
+            pngs = _render_posters(jobs)
+            buffer = io.BytesIO()
+            if fmt == "zip":
+                with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:  # PNG ya va comprimido
+                    for clazz, png in zip(classes, pngs):
+                        zf.writestr(f"class_{clazz.pk}_{slugify(clazz.name)}.png", png)
+            else:
+                pages = [Image.open(io.BytesIO(png)) for png in pngs]
+                pages[0].save(buffer, format="PDF", save_all=True, append_images=pages[1:], resolution=150)
+            document = buffer.getvalue()
+        _sheet_cache.set(key, document)
+
+    if fmt == "zip":
+        return document, "application/zip", "qr_clases.zip"
+    return document, "application/pdf", "qr_clases.pdf"
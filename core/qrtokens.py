@@ -0,0 +1,92 @@
+"""
+Tokens QR firmados y rotatorios: se verifican solo con CPU, sin consultar
+la base de datos (alternativa al UUID fijo de Class.qr_token).
+
+Formato: ``<payload>.<firma>``, ambos en base64url sin relleno (46 caracteres).
+
+- payload (17 bytes): versión, class_id, ventana y un nonce aleatorio de
+  8 bytes. La ventana es ``epoch // QR_ROTATION_SECONDS``: el QR que se
+  muestra cambia en cada una.
+- firma: HMAC-SHA256 del payload truncado a 16 bytes, con una clave
+  derivada de SECRET_KEY (cambiar SECRET_KEY invalida todos los tokens).
+
+Un token vale en su ventana y en las QR_ROTATION_GRACE_WINDOWS siguientes
+(quien escanea justo al rotar). Los de ventanas futuras, aunque ya estén
+renderizados (core.qr.render_rotating), todavía no se aceptan.
+"""
+import base64
+import functools
+import hashlib
+import hmac
+import os
+import struct
+import time
+
+from django.conf import settings
+from django.http import Http404
+
+VERSION = 1
+PAYLOAD = struct.Struct(">BII8s")   # versión, class_id, ventana, nonce
+SIGNATURE_BYTES = 16
+SEPARATOR = "."
+
+
+class TokenExpired(Exception):
+    """Firma válida, pero de una ventana ya caducada (o aún no vigente)."""
+
+
+def is_signed(token):
+    """Distingue un token firmado de un UUID (que no lleva punto)."""
+    return SEPARATOR in token
+
+
+def current_window(now=None):
+    return int((time.time() if now is None else now) // settings.QR_ROTATION_SECONDS)
+
+
+def window_start(window):
+    """Epoch (segundos) en que empieza la ventana."""
+    return window * settings.QR_ROTATION_SECONDS
+
+
+@functools.lru_cache(maxsize=4)
+def _key(secret):
+    # Clave propia de los QR: un token no sirve como firma de otra parte de Django
+    return hashlib.sha256(b"core.qrtokens:" + secret.encode()).digest()
+
+
+def _sign(payload):
+    return hmac.digest(_key(settings.SECRET_KEY), payload, "sha256")[:SIGNATURE_BYTES]
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def make_token(class_id, window=None, nonce=None):
+    window = current_window() if window is None else window
+    payload = PAYLOAD.pack(VERSION, class_id, window, nonce or os.urandom(8))
+    return f"{_b64encode(payload)}{SEPARATOR}{_b64encode(_sign(payload))}"
+
+
+def verify_token(token, now=None):
+    """
+    Devuelve el class_id de un token firmado. Lanza Http404 si está mal
+    formado o la firma no cuadra y TokenExpired si su ventana no está vigente.
+    """
+    try:
+        payload_part, signature_part = token.split(SEPARATOR)
+        payload = _b64decode(payload_part)
+        signature = _b64decode(signature_part)
+        version, class_id, window, _ = PAYLOAD.unpack(payload)
+    except (ValueError, struct.error):
+        raise Http404("Token QR inválido")
+    if version != VERSION or not hmac.compare_digest(signature, _sign(payload)):
+        raise Http404("Token QR inválido")
+    if not 0 <= current_window(now) - window <= settings.QR_ROTATION_GRACE_WINDOWS:
+        raise TokenExpired("Token QR caducado")
+    return class_id
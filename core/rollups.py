@@ -0,0 +1,163 @@
+"""
+Resúmenes de asistencia mantenidos de forma incremental.
+
+Cada escritura de check-in/check-out llama a ``record_checkins`` o
+``record_checkouts`` con las asistencias afectadas; los contadores se suman
+con un único ``INSERT ... ON CONFLICT DO UPDATE SET x = x + excluded.x``
+por tabla (SQLite ≥ 3.24 y PostgreSQL), así que no hay carreras entre workers.
+Las ediciones manuales (admin, CRUD del API) no pasan por aquí: para
+reconciliar está el comando ``rebuild_rollups``.
+"""
+import datetime
+import itertools
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ArchivedAttendance, Attendance, Class, ClassDayStats, StudentClassStats
+
+COUNTERS = ("headcount", "on_time", "minutes")
+STUDENT_COUNTERS = ("sessions", "on_time", "minutes")
+
+
+def _start_times(atts, start_times=None):
+    start_times = dict(start_times or {})
+    missing = {a.clazz_id for a in atts} - start_times.keys()
+    if missing:
+        start_times.update(Class.objects.filter(pk__in=missing).values_list("pk", "start_time"))
+    return start_times
+
+
+def is_on_time(check_in, start_time):
+    grace = datetime.timedelta(minutes=settings.ATTENDANCE_ON_TIME_GRACE_MINUTES)
+    local = timezone.localtime(check_in)
+    limit = datetime.datetime.combine(local.date(), start_time) + grace
+    return local.replace(tzinfo=None) <= limit
+
+
+def minutes_present(check_in, check_out):
+    return max(int((check_out - check_in).total_seconds() // 60), 0)
+
+
+def record_checkins(atts, start_times=None):
+    """
+    Suma headcount/sesiones y puntualidad por las asistencias nuevas. Solo
+    cuenta la primera entrada de cada (alumno, clase, día): salir y volver a
+    entrar, o un check-in web más uno QR, no suman otro asistente ni otra sesión.
+    """
+    atts = _first_checkins(list(atts))
+    if not atts:
+        return
+    start_times = _start_times(atts, start_times)
+    by_day = defaultdict(lambda: [0, 0, 0])
+    by_student = defaultdict(lambda: [0, 0, 0])
+    for att in atts:
+        on_time = int(is_on_time(att.check_in, start_times[att.clazz_id]))
+        for acc in (by_day[(att.clazz_id, att.date)], by_student[(att.student_id, att.clazz_id)]):
+            acc[0] += 1
+            acc[1] += on_time
+    _apply(by_day, by_student)
+
+
+def _first_checkins(atts):
+    """Las asistencias de ``atts`` que son la primera de su (alumno, clase, día)."""
+    first = {}
+    for att in atts:
+        key = (att.student_id, att.clazz_id, att.date)
+        if key not in first or att.check_in < first[key].check_in:
+            first[key] = att
+    if not first:
+        return []
+    # Ya guardadas: cualquier otra fila de la misma clave es una entrada anterior
+    earlier = set(
+        Attendance.objects.filter(
+            student_id__in={k[0] for k in first},
+            clazz_id__in={k[1] for k in first},
+            date__in={k[2] for k in first},
+        ).exclude(pk__in=[att.pk for att in atts if att.pk is not None])
+        .values_list("student_id", "clazz_id", "date")
+    )
+    return [att for key, att in first.items() if key not in earlier]
+
+
+def record_checkouts(atts):
+    """Suma los minutos presentes de cada asistencia recién cerrada."""
+    by_day = defaultdict(lambda: [0, 0, 0])
+    by_student = defaultdict(lambda: [0, 0, 0])
+    for att in atts:
+        if att.check_out is None:
+            continue
+        minutes = minutes_present(att.check_in, att.check_out)
+        by_day[(att.clazz_id, att.date)][2] += minutes
+        by_student[(att.student_id, att.clazz_id)][2] += minutes
+    _apply(by_day, by_student)
+
+
+def _apply(by_day, by_student):
+    if by_day:
+        _upsert_add(ClassDayStats, ("clazz_id", "date"), COUNTERS, by_day)
+    if by_student:
+        _upsert_add(StudentClassStats, ("student_id", "clazz_id"), STUDENT_COUNTERS, by_student)
+
+
+def _upsert_add(model, keys, counters, deltas):
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = [model._meta.get_field(k).column for k in keys] + list(counters)
+    quoted = [connection.ops.quote_name(c) for c in columns]
+    updates = ", ".join(f"{q} = {table}.{q} + excluded.{q}" for q in quoted[len(keys):])
+    sql = (
+        f"INSERT INTO {table} ({', '.join(quoted)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({', '.join(quoted[:len(keys)])}) DO UPDATE SET {updates}"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(*map(_adapt, key), *values) for key, values in deltas.items()])
+
+
+def _adapt(value):
+    if isinstance(value, datetime.date):
+        return connection.ops.adapt_datefield_value(value)
+    return value
+
+
+def rebuild(chunk_size=5000):
+    """
+    Recalcula ambas tablas desde Attendance y su archivo (core.archive), en
+    streaming. Devuelve (filas_día, filas_alumno).
+    """
+    start_times = dict(Class.objects.values_list("pk", "start_time"))
+    by_day = defaultdict(lambda: [0, 0, 0])
+    by_student = defaultdict(lambda: [0, 0, 0])
+    # Ordenadas por (alumno, clase, día, entrada): la primera de cada grupo es la que cuenta
+    rows = itertools.chain.from_iterable(
+        model.objects.order_by("student_id", "clazz_id", "date", "check_in").values_list(
+            "clazz_id", "student_id", "date", "check_in", "check_out"
+        ).iterator(chunk_size=chunk_size)
+        for model in (ArchivedAttendance, Attendance)
+    )
+    previous = None
+    for clazz_id, student_id, date, check_in, check_out in rows:
+        first = (student_id, clazz_id, date) != previous
+        previous = (student_id, clazz_id, date)
+        on_time = int(first and is_on_time(check_in, start_times[clazz_id]))
+        minutes = minutes_present(check_in, check_out) if check_out else 0
+        for acc in (by_day[(clazz_id, date)], by_student[(student_id, clazz_id)]):
+            acc[0] += first
+            acc[1] += on_time
+            acc[2] += minutes
+
+    with transaction.atomic():
+        ClassDayStats.objects.all().delete()
+        StudentClassStats.objects.all().delete()
+        ClassDayStats.objects.bulk_create(
+            (ClassDayStats(clazz_id=c, date=d, headcount=h, on_time=o, minutes=m)
+             for (c, d), (h, o, m) in by_day.items()),
+            batch_size=chunk_size,
+        )
+        StudentClassStats.objects.bulk_create(
+            (StudentClassStats(student_id=s, clazz_id=c, sessions=n, on_time=o, minutes=m)
+             for (s, c), (n, o, m) in by_student.items()),
+            batch_size=chunk_size,
+        )
+    return len(by_day), len(by_student)
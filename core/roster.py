@@ -0,0 +1,184 @@
+"""
+Importación masiva de alumnos y matrículas desde CSV.
+
+Columnas: ``first_name, last_name, email, dni`` y ``classes`` (nombres de
+clase separados por ``;``). El fichero se lee en streaming y se escribe por
+lotes de ROSTER_IMPORT_CHUNK_SIZE filas, cada uno en su transacción:
+
+- Student: ``bulk_create(update_conflicts=True)`` sobre ``dni`` (alta o
+  actualización de nombre y email).
+- Enrollment: ``bulk_create(update_conflicts=True)`` sobre
+  (student, clazz); una baja previa vuelve a quedar activa.
+
+Las filas con datos inválidos, clases desconocidas o ambiguas o un email
+que ya pertenece a otro DNI se descartan y se informan con su nº de línea.
+La memoria no depende del tamaño del fichero (un lote y el índice de
+nombres de clase).
+"""
+import csv
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from .catalog import bump_version
+from .membership import class_rosters
+from .models import Class, Enrollment, Student
+from .search import index_students
+from .writes import write_transaction
+
+STUDENT_FIELDS = ("first_name", "last_name", "email", "dni")
+CLASS_SEPARATOR = ";"
+
+
+class RosterError(Exception):
+    """El fichero no se puede importar (p. ej. faltan columnas)."""
+
+
+def import_roster(text, chunk_size=None, max_errors=None, on_error=None):
+    """
+    Importa un CSV (iterable de líneas de texto). Devuelve un resumen con
+    contadores y hasta ``max_errors`` errores {row, error}; ``on_error(row,
+    error)`` recibe todos a medida que aparecen.
+    """
+    chunk_size = chunk_size or settings.ROSTER_IMPORT_CHUNK_SIZE
+    max_errors = settings.ROSTER_IMPORT_MAX_ERRORS if max_errors is None else max_errors
+    reader = csv.DictReader(text)
+    missing = [f for f in STUDENT_FIELDS if f not in (reader.fieldnames or ())]
+    if missing:
+        raise RosterError(f"Faltan columnas: {', '.join(missing)}")
+
+    summary = {
+        "rows": 0, "students_created": 0, "students_updated": 0,
+        "enrollments": 0, "error_count": 0, "errors": [],
+    }
+
+    def report(row, error):
+        summary["error_count"] += 1
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append({"row": row, "error": error})
+        if on_error:
+            on_error(row, error)
+
+    classes = _class_index()
+    chunk = []
+    for data in reader:
+        summary["rows"] += 1
+        try:
+            chunk.append((reader.line_num, *_parse_row(data, classes)))
+        except RosterError as e:
+            report(reader.line_num, str(e))
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, summary, report)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, summary, report)
+    return summary
+
+
+def _class_index():
+    index = {}
+    for pk, name in Class.objects.values_list("pk", "name"):
+        index.setdefault(name.strip().casefold(), []).append(pk)
+    return index
+
+
+def _parse_row(data, classes):
+    student = {}
+    for field in STUDENT_FIELDS:
+        value = (data.get(field) or "").strip()
+        if not value:
+            raise RosterError(f"{field} requerido")
+        max_length = Student._meta.get_field(field).max_length
+        if len(value) > max_length:
+            raise RosterError(f"{field} demasiado largo (máx. {max_length})")
+        student[field] = value
+    try:
+        validate_email(student["email"])
+    except DjangoValidationError:
+        raise RosterError("email inválido")
+
+    class_ids = set()
+    for name in (data.get("classes") or "").split(CLASS_SEPARATOR):
+        name = name.strip()
+        if not name:
+            continue
+        matches = classes.get(name.casefold())
+        if not matches:
+            raise RosterError(f"clase desconocida: {name}")
+        if len(matches) > 1:
+            raise RosterError(f"clase ambigua: {name} ({len(matches)} con ese nombre)")
+        class_ids.add(matches[0])
+    return student, class_ids
+
+
+def _import_chunk(chunk, summary, report):
+    try:
+        errors, created, updated, enrolled = _write_chunk(chunk)
+    except IntegrityError as e:
+        # p. ej. dos alumnos del lote que se intercambian el email
+        for line, _, _ in chunk:
+            report(line, f"lote rechazado por conflicto de unicidad: {e}")
+        return
+    for line, error in errors:
+        report(line, error)
+    summary["students_created"] += created
+    summary["students_updated"] += updated
+    summary["enrollments"] += enrolled
+
+
+@write_transaction
+def _write_chunk(chunk):
+    """Escribe un lote. Devuelve (errores, alumnos_nuevos, alumnos_actualizados, matrículas)."""
+    errors = []
+    by_dni, email_owner = {}, {}
+    for line, student, class_ids in chunk:
+        owner = email_owner.get(student["email"])
+        if owner is not None and owner != student["dni"]:
+            errors.append((line, f"email repetido en el fichero (DNI {owner})"))
+            continue
+        email_owner[student["email"]] = student["dni"]
+        previous = by_dni.get(student["dni"])
+        if previous is not None:
+            # DNI repetido: mandan los datos de la última fila y se suman las clases
+            class_ids = class_ids | previous[2]
+        by_dni[student["dni"]] = (line, student, class_ids)
+
+    existing = set(Student.objects.filter(dni__in=by_dni).values_list("dni", flat=True))
+    taken = dict(
+        Student.objects.filter(email__in=email_owner).values_list("email", "dni")
+    )
+    rows = []
+    for dni, (line, student, class_ids) in by_dni.items():
+        owner = taken.get(student["email"], dni)
+        if owner != dni:
+            errors.append((line, f"email ya usado por el alumno con DNI {owner}"))
+            continue
+        rows.append((student, class_ids))
+
+    Student.objects.bulk_create(
+        [Student(**student) for student, _ in rows],
+        update_conflicts=True, unique_fields=["dni"], update_fields=["first_name", "last_name", "email"],
+    )
+    ids = dict(
+        Student.objects.filter(dni__in=[s["dni"] for s, _ in rows]).values_list("dni", "pk")
+    )
+    # bulk_create no envía señales: tokens de búsqueda del lote (core.search)
+    index_students(
+        (ids[s["dni"]], s["first_name"], s["last_name"], s["dni"], s["email"]) for s, _ in rows
+    )
+    enrollments = [
+        Enrollment(student_id=ids[student["dni"]], clazz_id=clazz_id, status=Enrollment.ACTIVE)
+        for student, class_ids in rows for clazz_id in class_ids
+    ]
+    Enrollment.objects.bulk_create(
+        enrollments, update_conflicts=True, unique_fields=["student", "clazz"], update_fields=["status"],
+    )
+    if enrollments:
+        # bulk_create no envía señales: se avisa a las listas de matriculados (core.membership)
+        bump_version("enrollment")
+        touched = {e.clazz_id for e in enrollments}
+        transaction.on_commit(lambda: class_rosters.invalidate(touched))
+    updated = sum(1 for student, _ in rows if student["dni"] in existing)
+    return errors, len(rows) - updated, updated, len(enrollments)
@@ -0,0 +1,104 @@
+"""
+Búsqueda de alumnos y clases por nombre con índice.
+
+Cada alumno guarda en StudentSearchToken las palabras de su nombre y
+apellidos más su DNI y su email completos; cada clase, en ClassSearchToken,
+las de su nombre. Todo normalizado: minúsculas (casefold) y sin acentos,
+así que "garcia" encuentra "García" y "MUÑOZ" encuentra "Muñoz".
+
+Un término de búsqueda se parte en palabras y cada una debe ser el prefijo
+de alguna palabra del alumno/clase ("mar gar" → "María García"). Cada
+prefijo es un rango ``token >= p AND token < p + U+10FFFF`` sobre el
+índice (token, id): tiempo logarítmico, a diferencia de ``icontains``.
+El rango supone comparación binaria de texto (la de SQLite).
+
+Los tokens se mantienen al guardar (señales de core.signals) y en las altas
+en bloque de core.roster; la migración 0012 rellena los existentes.
+"""
+import re
+import unicodedata
+
+from .models import Class, ClassSearchToken, Student, StudentSearchToken
+
+PREFIX_END = "\U0010ffff"
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize("NFKD", (text or "").casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def words(text):
+    return re.findall(r"\w+", normalize(text))
+
+
+def student_tokens(first_name, last_name, dni, email):
+    tokens = {*words(first_name), *words(last_name), normalize(dni), normalize(email)}
+    return {token[:254] for token in tokens if token}
+
+
+def class_tokens(name):
+    return {token[:120] for token in words(name)}
+
+
+# -------------------------------
+# Consultas
+# -------------------------------
+
+def _matching(token_model, column, prefix):
+    return token_model.objects.filter(token__gte=prefix, token__lt=prefix + PREFIX_END).values(column)
+
+
+def search_students(term, qs=None):
+    """Alumnos en los que cada palabra de ``term`` es prefijo de alguna de las suyas."""
+    qs = Student.objects.all() if qs is None else qs
+    prefixes = words(term)
+    if not prefixes:
+        return qs.none()
+    for prefix in prefixes:
+        qs = qs.filter(pk__in=_matching(StudentSearchToken, "student_id", prefix))
+    return qs
+
+
+def search_classes(term, qs=None):
+    qs = Class.objects.all() if qs is None else qs
+    prefixes = words(term)
+    if not prefixes:
+        return qs.none()
+    for prefix in prefixes:
+        qs = qs.filter(pk__in=_matching(ClassSearchToken, "clazz_id", prefix))
+    return qs
+
+
+# -------------------------------
+# Mantenimiento
+# -------------------------------
+
+def index_student(student):
+    _sync(StudentSearchToken, "student_id", student.pk, student_tokens(
+        student.first_name, student.last_name, student.dni, student.email
+    ))
+
+
+def index_class(clazz):
+    _sync(ClassSearchToken, "clazz_id", clazz.pk, class_tokens(clazz.name))
+
+
+def _sync(token_model, column, pk, tokens):
+    # Solo escribe si algo cambió (guardar sin tocar el nombre no cuesta escrituras)
+    current = set(token_model.objects.filter(**{column: pk}).values_list("token", flat=True))
+    if current - tokens:
+        token_model.objects.filter(**{column: pk}, token__in=current - tokens).delete()
+    if tokens - current:
+        token_model.objects.bulk_create(token_model(**{column: pk}, token=t) for t in tokens - current)
+
+
+def index_students(rows):
+    """Reindexa en bloque: ``rows`` son (id, first_name, last_name, dni, email)."""
+    rows = list(rows)
+    StudentSearchToken.objects.filter(student_id__in=[row[0] for row in rows]).delete()
+    StudentSearchToken.objects.bulk_create(
+        (StudentSearchToken(student_id=pk, token=token)
+         for pk, *fields in rows for token in student_tokens(*fields)),
+        batch_size=5000,
+    )
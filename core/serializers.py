@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 from .models import Room, Teacher, Class, Student, Enrollment, Attendance
 
@@ -21,6 +22,17 @@ class ClassSerializer(serializers.ModelSerializer):
         model = Class
         fields = "__all__"
 
+    def validate(self, attrs):
+        # Instancia provisional con los valores resultantes (también en PATCH parcial)
+        clazz = Class(pk=self.instance.pk if self.instance else None)
+        for field in ("room", "weekday", "start_time", "end_time"):
+            setattr(clazz, field, attrs.get(field, getattr(self.instance, field, None)))
+        try:
+            clazz.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+        return attrs
+
 class StudentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Student
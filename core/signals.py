@@ -1,32 +1,90 @@
-import io, json, qrcode
-from django.core.files import File
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
 from django.dispatch import receiver
-from django.utils import timezone
-from .models import Class
+from .cache import class_token_cache, invalidate_class_token
+from .catalog import bump_version
+from .membership import class_rosters
+from .models import Class, Enrollment, Room, Student, Teacher
+from .qr import delete_rotating, qr_is_current, schedule_qr_render, schedule_rotating_render
+from .search import index_class, index_student
+from .timetable import timetable
 
 @receiver(post_save, sender=Class)
 def generate_qr(sender, instance, created, **kwargs):
     """
-    Crea o regenera el QR y lo guarda en qr_image.
-    La segunda llamada a save() usa update_fields para no disparar la señal de nuevo.
+    Encola la generación del QR (fuera de la petición) solo si qr_image no
+    corresponde ya al payload actual; guardar una clase sin cambios no
+    vuelve a renderizar ni a escribir el fichero. Con QR_ROTATING_TOKENS,
+    una clase nueva encola además su primer lote de QR rotatorios (dependen
+    solo del pk; los siguientes los pide core.qr.current_rotating_qr).
     """
-    # --- genera el payload (ajústalo a gusto) ---
-    payload = json.dumps({
-        "class_id": instance.id,
-        "ts": timezone.now().isoformat(),
-    })
+    if not qr_is_current(instance):
+        schedule_qr_render(instance.pk)
+    if created and settings.QR_ROTATING_TOKENS:
+        transaction.on_commit(lambda: schedule_rotating_render(instance.pk))
 
-    # --- crea la imagen ---
-    img = qrcode.make(payload)
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
 
-    filename = f"class_{instance.id}.png"
+@receiver(post_delete, sender=Class)
+def delete_rotating_qr(sender, instance, **kwargs):
+    if settings.QR_ROTATING_TOKENS:
+        pk = instance.pk
+        transaction.on_commit(lambda: delete_rotating(pk))
 
-    # --- asigna al campo FileField sin disparar save() automáticamente ---
-    instance.qr_image.save(filename, File(buffer), save=False)
 
-    # --- persiste solo el campo qr_image ---
-    sender.objects.filter(pk=instance.pk).update(qr_image=instance.qr_image.name)
+@receiver([post_save, post_delete], sender=Class)
+def invalidate_class_cache(sender, instance, **kwargs):
+    """Descarta la Class cacheada (por su UUID y por su pk, la de los tokens firmados)."""
+    invalidate_class_token(instance.qr_token, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Room)
+def invalidate_room_cache(sender, instance, **kwargs):
+    """Las Class cacheadas llevan su Room precargada; un cambio de aula las invalida todas."""
+    class_token_cache.clear()
+
+
+@receiver([post_save, post_delete], sender=Room)
+@receiver([post_save, post_delete], sender=Teacher)
+@receiver([post_save, post_delete], sender=Class)
+def bump_catalog_version(sender, instance, **kwargs):
+    """Nueva versión del catálogo: cambia el ETag y deja obsoletas sus respuestas cacheadas."""
+    bump_version(sender._meta.model_name)
+
+
+@receiver(post_save, sender=Class)
+def update_timetable(sender, instance, **kwargs):
+    """Actualiza la franja de la clase en el índice de horario (tras subir la versión del catálogo)."""
+    timetable.upsert(instance)
+
+
+@receiver(post_delete, sender=Class)
+def remove_from_timetable(sender, instance, **kwargs):
+    timetable.remove(instance.pk)
+
+
+@receiver(post_save, sender=Enrollment)
+def update_roster(sender, instance, created, **kwargs):
+    """Mantiene el conjunto de matriculados de la clase (ver core.membership)."""
+    bump_version("enrollment")
+    active = instance.status == Enrollment.ACTIVE
+    transaction.on_commit(
+        lambda: class_rosters.apply(instance.clazz_id, instance.student_id, active, moved=not created)
+    )
+
+
+@receiver(post_delete, sender=Enrollment)
+def remove_from_roster(sender, instance, **kwargs):
+    bump_version("enrollment")
+    transaction.on_commit(lambda: class_rosters.apply(instance.clazz_id, instance.student_id, False))
+
+
+@receiver(post_save, sender=Student)
+def update_student_search(sender, instance, **kwargs):
+    """Tokens de búsqueda por nombre, DNI y email (ver core.search)."""
+    index_student(instance)
+
+
+@receiver(post_save, sender=Class)
+def update_class_search(sender, instance, **kwargs):
+    index_class(instance)
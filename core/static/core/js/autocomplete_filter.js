@@ -0,0 +1,15 @@
+'use strict';
+// Filtros con autocompletado del listado del admin (core.admin.AutocompleteFilter):
+// al elegir una opción se recarga la lista con su parámetro y se vuelve a la primera página.
+window.addEventListener('load', function() {
+    django.jQuery('select.autocomplete-filter').on('change', function() {
+        const params = new URLSearchParams(window.location.search);
+        params.delete('p');
+        if (this.value) {
+            params.set(this.name, this.value);
+        } else {
+            params.delete(this.name);
+        }
+        window.location.search = params.toString();
+    });
+});
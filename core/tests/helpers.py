@@ -0,0 +1,24 @@
+import datetime
+
+from core.models import Class, Room, Student, Teacher
+
+
+def create_class(name="Yoga", weekday=0, start="09:00", end="10:00", capacity=30, room=None, **kwargs):
+    room = room or Room.objects.create(name=f"Aula {name}", capacity=capacity)
+    teacher = Teacher.objects.create(first_name="Ana", last_name=name, email=f"{name.lower()}@example.com")
+    return Class.objects.create(
+        name=name, room=room, teacher=teacher, weekday=weekday,
+        start_time=datetime.time.fromisoformat(start), end_time=datetime.time.fromisoformat(end),
+        **kwargs,
+    )
+
+
+def create_student(n=1, **kwargs):
+    defaults = {"first_name": f"Alumno{n}", "last_name": "Prueba", "email": f"a{n}@example.com", "dni": f"{n:08d}X"}
+    return Student.objects.create(**{**defaults, **kwargs})
+
+
+def aware(date, hour, minute=0):
+    """Instante local (zona de TIME_ZONE) de ``date`` a ``hour:minute``."""
+    from django.utils import timezone
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time(hour, minute)))
@@ -0,0 +1,70 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db.models import Count, Max, Min
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import admin as core_admin
+from core.models import Attendance
+
+from .helpers import aware, create_class, create_student
+
+DAYS = [datetime.date(2024, 11, 4), datetime.date(2025, 9, 15), datetime.date(2025, 9, 22), datetime.date(2025, 10, 6)]
+
+
+class AttendanceChangelistTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        self.url = reverse("admin:core_attendance_changelist")
+        clazz = create_class()
+        student = create_student()
+        for day in DAYS:
+            Attendance.objects.create(
+                student=student, clazz=clazz, date=day, check_in=aware(day, 9), check_out=aware(day, 10),
+            )
+
+    def hierarchy_links(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_date_hierarchy_drill_down(self):
+        years = self.hierarchy_links()
+        self.assertIn("?check_in__year=2024", years)
+        self.assertIn("?check_in__year=2025", years)
+        months = self.hierarchy_links(check_in__year=2025)
+        self.assertIn("check_in__month=9", months)
+        self.assertIn("check_in__month=10", months)
+        self.assertNotIn("check_in__month=11", months)
+        days = self.hierarchy_links(check_in__year=2025, check_in__month=9)
+        self.assertIn("check_in__day=15", days)
+        self.assertIn("check_in__day=22", days)
+
+    def test_hierarchy_bounds_read_each_end_of_the_index(self):
+        qs = core_admin.AttendanceAdmin(Attendance, core_admin.admin.site).get_queryset(None).filter(date__year=2025)
+        with self.assertNumQueries(2):
+            bounds = qs.aggregate(first=Min("check_in"), last=Max("check_in"))
+        self.assertEqual(bounds, {"first": aware(DAYS[1], 9), "last": aware(DAYS[3], 9)})
+        # Cualquier otro agregado sigue siendo el de Django
+        self.assertEqual(qs.aggregate(n=Count("pk"), first=Min("check_in"))["n"], 3)
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=1000)
+    def test_estimated_count_only_without_filters(self):
+        with mock.patch.object(core_admin, "estimate_table_rows", return_value=250000):
+            unfiltered = self.client.get(self.url).context["cl"]
+            filtered = self.client.get(self.url, {"check_in__year": 2025}).context["cl"]
+        self.assertEqual(unfiltered.paginator.count, 250000)
+        self.assertEqual(filtered.paginator.count, 3)
+
+    def test_export_selected_as_csv(self):
+        selected = list(Attendance.objects.filter(date__year=2025).values_list("pk", flat=True))
+        response = self.client.post(self.url, {"action": "export_as_csv", "_selected_action": selected})
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[0], "Clase,Alumno,DNI,Fecha,Check-in,Check-out,Método")
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(sorted(line.split(",")[3] for line in lines[1:]), ["2025-09-15", "2025-09-22", "2025-10-06"])
+        self.assertTrue(lines[1].startswith("Yoga,Alumno1 Prueba,00000001X,"))
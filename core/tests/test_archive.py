@@ -0,0 +1,71 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import archive
+from core.models import ArchivedAttendance, Attendance
+
+from .helpers import aware, create_class, create_student
+
+OLD_TERM = [datetime.date(2025, 3, 3), datetime.date(2025, 3, 10), datetime.date(2025, 5, 5)]
+CURRENT = datetime.date(2025, 9, 15)
+TERM_START = datetime.date(2025, 9, 1)
+
+
+class TermStartTests(TestCase):
+
+    @override_settings(ATTENDANCE_TERM_STARTS=["09-01", "02-01"])
+    def test_most_recent_start_not_in_the_future(self):
+        for today, start in [
+            (datetime.date(2025, 10, 10), datetime.date(2025, 9, 1)),
+            (datetime.date(2025, 3, 1), datetime.date(2025, 2, 1)),
+            (datetime.date(2025, 1, 10), datetime.date(2024, 9, 1)),
+        ]:
+            with self.subTest(today=today):
+                self.assertEqual(archive.current_term_start(today), start)
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.clazz = create_class()
+        self.student = create_student()
+        for day in OLD_TERM + [CURRENT]:
+            self.attend(day, closed=True)
+        self.open_old = self.attend(OLD_TERM[0], closed=False)  # olvidó salir
+
+    def attend(self, day, closed):
+        return Attendance.objects.create(
+            student=self.student, clazz=self.clazz, date=day, check_in=aware(day, 9),
+            check_out=aware(day, 10) if closed else None,
+        )
+
+    def test_moves_closed_rows_of_past_terms_in_batches(self):
+        old_ids = set(archive.archivable(TERM_START).values_list("pk", flat=True))
+        kept_ids = set(Attendance.objects.exclude(pk__in=old_ids).values_list("pk", flat=True))
+        progress = []
+        self.assertEqual(archive.archive(TERM_START, batch_size=2, on_batch=progress.append), 3)
+        self.assertEqual(progress, [2, 3])
+        self.assertEqual(set(ArchivedAttendance.objects.values_list("pk", flat=True)), old_ids)
+        self.assertEqual(set(Attendance.objects.values_list("pk", flat=True)), kept_ids)
+        self.assertIn(self.open_old.pk, kept_ids)
+        self.assertEqual(archive.archive(TERM_START), 0)
+
+    def test_export_reads_hot_and_archived_rows(self):
+        archive.archive(TERM_START)
+        response = self.client.get(reverse("attendance-export-excel"))
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(len(lines), 1 + 5)
+        only_old = self.client.get(reverse("attendance-export-excel"), {"to": "2025-06-30"})
+        self.assertEqual(len(b"".join(only_old.streaming_content).decode("utf-8").splitlines()), 1 + 4)
+
+    def test_command_dry_run_and_archive(self):
+        out = io.StringIO()
+        call_command("archive_attendance", before="2025-09-01", dry_run=True, stdout=out)
+        self.assertIn("3 asistencias cerradas anteriores a 2025-09-01", out.getvalue())
+        self.assertFalse(ArchivedAttendance.objects.exists())
+        call_command("archive_attendance", before="2025-09-01", stdout=io.StringIO())
+        self.assertEqual(ArchivedAttendance.objects.count(), 3)
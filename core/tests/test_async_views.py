@@ -0,0 +1,30 @@
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from core import async_views
+
+
+class InPoolTests(SimpleTestCase):
+
+    def run_in_pool(self, func):
+        calls = []
+        with mock.patch.object(async_views, "close_old_connections",
+                               side_effect=lambda: calls.append(threading.get_ident())):
+            try:
+                return async_to_sync(async_views._in_pool(func))(), calls
+            except ValueError:
+                return None, calls
+
+    def test_pool_thread_connection_is_recycled(self):
+        result, calls = self.run_in_pool(threading.get_ident)
+        self.assertEqual(calls, [result, result])
+        self.assertNotEqual(result, threading.get_ident())
+
+    def test_connection_recycled_on_error(self):
+        def fail():
+            raise ValueError
+        _, calls = self.run_in_pool(fail)
+        self.assertEqual(len(calls), 2)
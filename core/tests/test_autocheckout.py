@@ -0,0 +1,77 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from core import autocheckout, occupancy
+from core.autocheckout import AutoCheckoutScheduler, close_ended
+from core.checkin import toggle_attendance
+from core.models import Attendance, ClassDayStats
+from core.timetable import timetable
+
+from .helpers import aware, create_class, create_student
+
+DAY = datetime.date(2025, 9, 15)
+
+
+@override_settings(
+    ATTENDANCE_BUFFERED_INGEST=False, ATTENDANCE_REQUIRE_ENROLLMENT=False,
+    ATTENDANCE_AUTO_CHECKOUT_GRACE_MINUTES=15,
+)
+class AutoCheckoutTests(TestCase):
+
+    def setUp(self):
+        self.clazz = create_class(weekday=DAY.weekday(), start="09:00", end="10:00")
+        self.students = [create_student(n) for n in (1, 2)]
+
+    def scan(self, student, hour, minute=0):
+        return toggle_attendance(self.clazz, student.pk, now=aware(DAY, hour, minute))
+
+    def test_closes_open_attendances_at_session_end(self):
+        self.scan(self.students[0], 9, 0)
+        self.scan(self.students[1], 9, 30)
+        self.assertEqual(close_ended(aware(DAY, 10, 20)), (1, 2))
+        self.assertEqual(set(Attendance.objects.values_list("check_out", flat=True)), {aware(DAY, 10, 0)})
+        self.assertEqual(occupancy.current(self.clazz.pk, DAY), 0)
+        self.assertEqual(ClassDayStats.objects.get(clazz=self.clazz, date=DAY).minutes, 90)
+
+    def test_waits_for_the_grace_period(self):
+        self.scan(self.students[0], 9, 0)
+        self.assertEqual(close_ended(aware(DAY, 10, 10)), (0, 0))
+        self.assertIsNone(Attendance.objects.get().check_out)
+
+    def test_closed_attendances_are_left_alone(self):
+        self.scan(self.students[0], 9, 0)
+        self.scan(self.students[0], 9, 40)
+        close_ended(aware(DAY, 11, 0))
+        self.assertEqual(Attendance.objects.get().check_out, aware(DAY, 9, 40))
+        self.assertEqual(close_ended(aware(DAY, 11, 0)), (0, 0))
+
+    def test_rows_closed_meanwhile_are_not_counted_twice(self):
+        self.scan(self.students[0], 9, 0)
+        self.scan(self.students[1], 9, 30)
+
+        def live_check_out(pks, ends_at):
+            # Un escaneo cierra la del primero entre la lectura y el UPDATE
+            Attendance.objects.filter(student=self.students[0]).update(check_out=aware(DAY, 9, 50))
+            occupancy.release_seat(self.clazz.pk, DAY)
+            return close_returning(pks, ends_at)
+
+        close_returning = autocheckout._close_returning
+        with mock.patch.object(autocheckout, "_close_returning", side_effect=live_check_out):
+            self.assertEqual(close_ended(aware(DAY, 10, 20)), (1, 1))
+        self.assertEqual(Attendance.objects.get(student=self.students[0]).check_out, aware(DAY, 9, 50))
+        self.assertEqual(occupancy.current(self.clazz.pk, DAY), 0)
+        self.assertEqual(ClassDayStats.objects.get(clazz=self.clazz, date=DAY).minutes, 30)
+
+    def test_check_in_after_the_end_gets_zero_minutes(self):
+        self.scan(self.students[0], 10, 5)
+        close_ended(aware(DAY, 11, 0))
+        att = Attendance.objects.get()
+        self.assertEqual(att.check_out, att.check_in)
+
+    def test_scheduler_wakes_after_next_end_plus_grace(self):
+        timetable.load()
+        scheduler = AutoCheckoutScheduler(interval=3600)
+        self.assertEqual(scheduler.seconds_to_next_run(aware(DAY, 10, 5)), 10 * 60)
+        self.assertEqual(scheduler.seconds_to_next_run(aware(DAY, 8, 0)), 3600)
@@ -0,0 +1,45 @@
+from django.test import TestCase
+
+from core.cache import class_token_cache, resolve_class_token
+from core.catalog import bump_version
+from core.models import Class, Room
+
+from .helpers import create_class
+
+
+class ClassTokenCacheTests(TestCase):
+
+    def setUp(self):
+        class_token_cache.clear()
+        self.clazz = create_class()
+        self.addCleanup(class_token_cache.clear)
+
+    def expire_check(self):
+        class_token_cache._checked = 0.0
+
+    def test_cached_class_is_served_without_queries(self):
+        resolve_class_token(self.clazz.qr_token)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_class_token(self.clazz.qr_token).pk, self.clazz.pk)
+
+    def test_change_saved_in_this_process_is_seen_at_once(self):
+        resolve_class_token(self.clazz.qr_token)
+        self.clazz.name = "Pilates"
+        self.clazz.save()
+        self.assertEqual(resolve_class_token(self.clazz.qr_token).name, "Pilates")
+
+    def test_change_from_another_process_is_seen_after_version_check(self):
+        resolve_class_token(self.clazz.qr_token)
+        # Otro proceso: sin señales aquí, solo la nueva versión del catálogo
+        Class.objects.filter(pk=self.clazz.pk).update(name="Pilates")
+        bump_version("class")
+        self.assertEqual(resolve_class_token(self.clazz.qr_token).name, "Yoga")
+        self.expire_check()
+        self.assertEqual(resolve_class_token(self.clazz.qr_token).name, "Pilates")
+
+    def test_room_change_from_another_process_is_seen(self):
+        resolve_class_token(self.clazz.qr_token)
+        Room.objects.filter(pk=self.clazz.room_id).update(name="Aula nueva")
+        bump_version("room")
+        self.expire_check()
+        self.assertEqual(resolve_class_token(self.clazz.qr_token).room.name, "Aula nueva")
@@ -0,0 +1,47 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from core import catalog
+from core.models import Room, Teacher
+
+from .helpers import create_class
+
+
+class CatalogETagTests(TestCase):
+
+    def setUp(self):
+        # Las versiones vuelven atrás con cada test: las respuestas cacheadas no valen
+        catalog._response_cache.clear()
+
+    def get(self, name, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(reverse(name), headers=headers)
+
+    def test_unchanged_catalog_answers_304(self):
+        Room.objects.create(name="Aula 1")
+        first = self.get("room-list")
+        self.assertEqual(first.status_code, 200)
+        second = self.get("room-list", first["ETag"])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_change_gives_a_new_etag_and_fresh_content(self):
+        etag = self.get("room-list")["ETag"]
+        Room.objects.create(name="Aula 2")
+        response = self.get("room-list", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual([room["name"] for room in response.json()], ["Aula 2"])
+
+    def test_repeated_request_served_from_cache(self):
+        Room.objects.create(name="Aula 1")
+        first = self.get("room-list")
+        with self.assertNumQueries(1):  # solo la versión del catálogo
+            second = self.get("room-list")
+        self.assertEqual(second.content, first.content)
+
+    def test_class_etag_follows_its_teacher(self):
+        clazz = create_class()
+        etag = self.get("class-list")["ETag"]
+        Teacher.objects.filter(pk=clazz.teacher_id).get().save()
+        self.assertEqual(self.get("class-list", etag).status_code, 200)
@@ -0,0 +1,78 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import occupancy
+from core.checkin import CheckinRejected, sync_scans, toggle_attendance
+from core.models import Attendance, ClassOccupancy
+
+from .helpers import aware, create_class, create_student
+
+DAY = datetime.date(2025, 9, 15)
+NEXT_DAY = DAY + datetime.timedelta(days=1)
+# 00:30 del día siguiente en Europe/Madrid, aún DAY en UTC
+AFTER_MIDNIGHT = aware(NEXT_DAY, 0, 30)
+
+
+@override_settings(ATTENDANCE_BUFFERED_INGEST=False, ATTENDANCE_REQUIRE_ENROLLMENT=False)
+class LocalDateTests(TestCase):
+
+    def setUp(self):
+        self.clazz = create_class(weekday=NEXT_DAY.weekday(), start="00:00", end="02:00")
+        self.student = create_student()
+
+    def test_scan_uses_local_date(self):
+        toggle_attendance(self.clazz, self.student.pk, now=AFTER_MIDNIGHT)
+        self.assertEqual(Attendance.objects.get().date, NEXT_DAY)
+        self.assertEqual(occupancy.current(self.clazz.pk, NEXT_DAY), 1)
+
+    def test_web_check_in_row_and_seat_share_the_local_date(self):
+        with mock.patch("django.utils.timezone.now", return_value=AFTER_MIDNIGHT):
+            self.client.post(reverse("class-checkin", args=[self.clazz.pk]), {"student_id": self.student.pk})
+        self.assertEqual(Attendance.objects.get().date, NEXT_DAY)
+        self.assertEqual(occupancy.current(self.clazz.pk, NEXT_DAY), 1)
+        # El escaneo siguiente encuentra la entrada web y la cierra
+        self.assertEqual(toggle_attendance(self.clazz, self.student.pk, now=aware(NEXT_DAY, 1, 30)), "check_out")
+        self.assertEqual(occupancy.current(self.clazz.pk, NEXT_DAY), 0)
+
+    def test_synced_scan_uses_local_date(self):
+        scanned_at = AFTER_MIDNIGHT.astimezone(datetime.timezone.utc)
+        sync_scans([{"token": str(self.clazz.qr_token), "student_id": self.student.pk,
+                     "scanned_at": scanned_at.isoformat()}], now=AFTER_MIDNIGHT + datetime.timedelta(hours=1))
+        self.assertEqual(Attendance.objects.get().date, NEXT_DAY)
+        self.assertEqual(occupancy.current(self.clazz.pk, NEXT_DAY), 1)
+
+
+@override_settings(
+    ATTENDANCE_BUFFERED_INGEST=False, ATTENDANCE_REQUIRE_ENROLLMENT=False, ATTENDANCE_ENFORCE_CAPACITY=True,
+)
+class CapacityTests(TestCase):
+
+    def setUp(self):
+        self.clazz = create_class(weekday=DAY.weekday(), start="09:00", end="11:00", capacity=2)
+        self.students = [create_student(n) for n in range(1, 4)]
+
+    def scan(self, student, minute=0):
+        return toggle_attendance(self.clazz, student.pk, now=aware(DAY, 9, minute))
+
+    def test_full_class_rejects_check_in(self):
+        self.scan(self.students[0])
+        self.scan(self.students[1])
+        with self.assertRaises(CheckinRejected):
+            self.scan(self.students[2])
+        self.assertEqual(occupancy.current(self.clazz.pk, DAY), 2)
+
+    def test_check_out_frees_the_seat(self):
+        self.scan(self.students[0])
+        self.scan(self.students[1])
+        self.scan(self.students[0], 30)  # sale
+        self.assertEqual(self.scan(self.students[2], 31), "check_in")
+        self.assertEqual(occupancy.current(self.clazz.pk, DAY), 2)
+
+    def test_repair_recounts_open_attendances(self):
+        self.scan(self.students[0])
+        ClassOccupancy.objects.filter(clazz=self.clazz, date=DAY).update(count=5)  # contador desajustado
+        occupancy.repair(DAY)
+        self.assertEqual(occupancy.current(self.clazz.pk, DAY), 1)
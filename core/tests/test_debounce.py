@@ -0,0 +1,75 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.debounce import TimeWindowCache, idempotent_responses, recent_scans, remember_result
+from core.models import Attendance
+
+from .helpers import create_class, create_student
+
+
+class TimeWindowCacheTests(TestCase):
+
+    def test_entry_expires_after_its_window(self):
+        cache = TimeWindowCache(2, 10)
+        cache.set("k", "v", now=100.0)
+        self.assertEqual(cache.get("k", now=101.5), "v")
+        self.assertIsNone(cache.get("k", now=102.5))
+
+    def test_full_cache_keeps_old_entries(self):
+        cache = TimeWindowCache(2, 1)
+        cache.set("a", 1, now=100.0)
+        cache.set("b", 2, now=100.5)
+        self.assertEqual(cache.get("a", now=101.0), 1)
+        self.assertIsNone(cache.get("b", now=101.0))
+
+
+@override_settings(
+    ATTENDANCE_BUFFERED_INGEST=False, ATTENDANCE_REQUIRE_ENROLLMENT=False,
+    ATTENDANCE_DEBOUNCE_SECONDS=2, ATTENDANCE_IDEMPOTENCY_SECONDS=300,
+)
+class ScanDebounceTests(TestCase):
+
+    def setUp(self):
+        recent_scans.clear()
+        idempotent_responses.clear()
+        self.addCleanup(recent_scans.clear)
+        self.addCleanup(idempotent_responses.clear)
+        self.clazz = create_class(start="00:00", end="23:59")
+        self.student = create_student()
+
+    def scan(self, key=None):
+        headers = {"Idempotency-Key": key} if key else {}
+        response = self.client.post(
+            f"{reverse('attendance-checkin-qr')}?token={self.clazz.qr_token}",
+            {"student_id": self.student.pk}, content_type="application/json", headers=headers,
+        )
+        return response.status_code, response.json().get("action")
+
+    def test_double_scan_repeats_the_first_response(self):
+        self.assertEqual(self.scan(), (200, "check_in"))
+        self.assertEqual(self.scan(), (200, "check_in"))
+        self.assertEqual(Attendance.objects.filter(check_out__isnull=True).count(), 1)
+
+    @override_settings(ATTENDANCE_DEBOUNCE_SECONDS=0)
+    def test_debounce_disabled_toggles(self):
+        self.assertEqual(self.scan()[1], "check_in")
+        self.assertEqual(self.scan()[1], "check_out")
+
+    @override_settings(ATTENDANCE_DEBOUNCE_SECONDS=0)
+    def test_idempotency_key_works_without_debounce(self):
+        self.assertEqual(self.scan("retry-1")[1], "check_in")
+        self.assertEqual(self.scan("retry-1")[1], "check_in")
+        self.assertEqual(self.scan("retry-2")[1], "check_out")
+
+    @override_settings(ATTENDANCE_IDEMPOTENCY_SECONDS=0)
+    def test_idempotency_disabled_keeps_debounce(self):
+        self.assertEqual(self.scan("retry-1")[1], "check_in")
+        self.assertEqual(self.scan("retry-1")[1], "check_in")
+        self.assertEqual(len(idempotent_responses), 0)
+
+    def test_only_successes_are_kept_for_the_idempotency_window(self):
+        remember_result(self.student.pk, self.clazz.pk, "retry-1", 409, {"error": "aforo completo"})
+        self.assertEqual(len(idempotent_responses), 0)
+        self.assertEqual(len(recent_scans), 1)
+        remember_result(self.student.pk, self.clazz.pk, "retry-2", 200, {"action": "check_in"})
+        self.assertEqual(len(idempotent_responses), 1)
@@ -0,0 +1,85 @@
+import csv
+import datetime
+import gzip
+import io
+import zlib
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.export import csv_chunks, gzip_chunks
+from core.models import Attendance
+
+from .helpers import aware, create_class, create_student
+
+DAY = datetime.date(2025, 9, 15)
+
+
+class CsvChunksTests(SimpleTestCase):
+
+    def test_rows_are_read_lazily_chunk_by_chunk(self):
+        read = []
+
+        def rows():
+            for i in range(10):
+                read.append(i)
+                yield (i, f"fila {i}")
+
+        chunks = csv_chunks(["n", "texto"], rows(), chunk_size=4)
+        self.assertEqual(next(chunks), "n,texto\r\n")
+        self.assertEqual(read, [])  # la cabecera sale antes de leer nada
+        self.assertEqual(next(chunks).count("\r\n"), 4)
+        self.assertEqual(len(read), 4)
+        rest = list(chunks)
+        self.assertEqual([chunk.count("\r\n") for chunk in rest], [4, 2])
+
+    def test_gzip_chunks_are_decodable_as_they_arrive(self):
+        parts = ["a,b\r\n", "1,á\r\n", "2,é\r\n"]
+        decoder = zlib.decompressobj(31)
+        received = ""
+        compressed = gzip_chunks(iter(parts))
+        for part in parts:
+            # Z_SYNC_FLUSH: cada trozo se puede descomprimir sin esperar al final
+            received += decoder.decompress(next(compressed)).decode("utf-8")
+            self.assertTrue(received.endswith(part))
+        self.assertEqual(decoder.decompress(b"".join(compressed)), b"")
+        self.assertTrue(decoder.eof)
+        self.assertEqual(gzip.decompress(b"".join(gzip_chunks(iter(parts)))), "".join(parts).encode())
+
+
+class AttendanceExportTests(TestCase):
+
+    def setUp(self):
+        clazz = create_class()
+        for n in range(1, 4):
+            Attendance.objects.create(
+                student=create_student(n), clazz=clazz, date=DAY, check_in=aware(DAY, 9, n),
+            )
+        self.url = reverse("attendance-export-excel")
+
+    def rows(self, content):
+        return list(csv.reader(io.StringIO(content.decode("utf-8"))))
+
+    def test_plain_csv_is_streamed(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertNotIn("Content-Encoding", response)
+        rows = self.rows(b"".join(response.streaming_content))
+        self.assertEqual(rows[0], ["Clase", "Alumno", "Check-in", "Check-out", "Método"])
+        self.assertEqual(len(rows), 4)
+
+    def test_gzip_when_the_client_accepts_it(self):
+        response = self.client.get(self.url, headers={"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        rows = self.rows(gzip.decompress(b"".join(response.streaming_content)))
+        self.assertEqual(len(rows), 4)
+
+    @override_settings(EXPORT_GZIP=False)
+    def test_gzip_can_be_disabled(self):
+        response = self.client.get(self.url, headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_date_filter(self):
+        response = self.client.get(self.url, {"from": "2025-09-16"})
+        self.assertEqual(len(self.rows(b"".join(response.streaming_content))), 1)
@@ -0,0 +1,104 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from core import ingest, occupancy
+from core.checkin import CheckinRejected, toggle_attendance
+from core.ingest import CheckinBuffer
+from core.models import Attendance, ClassDayStats, StudentClassStats
+
+from .helpers import aware, create_class, create_student
+
+DAY = datetime.date(2025, 9, 15)
+
+
+@override_settings(ATTENDANCE_REQUIRE_ENROLLMENT=False, ATTENDANCE_ON_TIME_GRACE_MINUTES=10)
+class CheckinBufferTests(TestCase):
+
+    def setUp(self):
+        self.clazz = create_class(weekday=DAY.weekday(), start="09:00", end="11:00")
+        self.students = [create_student(n) for n in (1, 2)]
+        self.buffer = CheckinBuffer()  # sin hilo: se vuelca a mano
+
+    def submit(self, student, hour, minute=0):
+        return self.buffer.submit(self.clazz, student.pk, "qr", aware(DAY, hour, minute))
+
+    def day_stats(self):
+        stats = ClassDayStats.objects.get(clazz=self.clazz, date=DAY)
+        return stats.headcount, stats.on_time, stats.minutes
+
+    def test_toggles_before_the_flush(self):
+        self.assertEqual(self.submit(self.students[0], 9, 0), "check_in")
+        self.assertEqual(self.submit(self.students[0], 10, 0), "check_out")
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(Attendance.objects.get().check_out, aware(DAY, 10, 0))
+        self.assertEqual(self.day_stats(), (1, 1, 60))
+
+    def test_closes_attendance_already_in_the_database(self):
+        with override_settings(ATTENDANCE_BUFFERED_INGEST=False):
+            toggle_attendance(self.clazz, self.students[0].pk, now=aware(DAY, 9, 0))
+        self.assertEqual(self.submit(self.students[0], 9, 45), "check_out")
+        self.buffer.flush()
+        self.assertEqual(Attendance.objects.get().check_out, aware(DAY, 9, 45))
+        self.assertEqual(self.day_stats(), (1, 1, 45))
+        self.assertEqual(occupancy.current(self.clazz.pk, DAY), 0)
+
+    def test_known_scans_need_no_queries(self):
+        self.submit(self.students[0], 9, 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.submit(self.students[0], 9, 30), "check_out")
+            self.assertEqual(self.submit(self.students[0], 9, 40), "check_in")
+
+    def test_seats_are_written_with_the_batch(self):
+        self.submit(self.students[0], 9, 0)
+        self.submit(self.students[1], 9, 0)
+        self.assertEqual(occupancy.current(self.clazz.pk, DAY), 0)
+        self.buffer.flush()
+        self.assertEqual(occupancy.current(self.clazz.pk, DAY), 2)
+
+    @override_settings(ATTENDANCE_ENFORCE_CAPACITY=True)
+    def test_capacity_counts_unflushed_scans(self):
+        self.clazz.capacity_override = 1
+        self.submit(self.students[0], 9, 0)
+        with self.assertRaises(CheckinRejected):
+            self.submit(self.students[1], 9, 5)
+        self.submit(self.students[0], 9, 10)  # libera la plaza
+        self.assertEqual(self.submit(self.students[1], 9, 15), "check_in")
+
+    def test_scans_accepted_while_a_batch_is_written(self):
+        self.submit(self.students[0], 9, 0)
+        during = []
+
+        def write_batch(created, closed):
+            # Con el candado tomado durante la escritura esto se bloquearía
+            during.append(self.submit(self.students[0], 9, 30))
+            during.append(self.submit(self.students[1], 9, 30))
+            return real_write_batch(created, closed)
+
+        real_write_batch = ingest._write_batch
+        with mock.patch.object(ingest, "_write_batch", side_effect=write_batch):
+            self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(during, ["check_out", "check_in"])
+        self.assertEqual(self.buffer.flush(), 2)
+        first = Attendance.objects.get(student=self.students[0])
+        self.assertEqual(first.check_out, aware(DAY, 9, 30))
+        self.assertIsNone(Attendance.objects.get(student=self.students[1]).check_out)
+        self.assertEqual(occupancy.current(self.clazz.pk, DAY), 1)
+        self.assertEqual(self.day_stats()[2], 30)
+
+    def test_row_by_row_fallback_updates_rollups(self):
+        with override_settings(ATTENDANCE_BUFFERED_INGEST=False):
+            toggle_attendance(self.clazz, self.students[0].pk, now=aware(DAY, 9, 0))
+        self.submit(self.students[0], 9, 30)            # cierra la de la BD
+        self.submit(self.students[1], 9, 20)            # entra tarde...
+        self.submit(self.students[1], 10, 20)           # ...y sale
+        with mock.patch.object(ingest, "_write_batch", side_effect=RuntimeError("lote")), \
+                self.assertLogs("core.ingest", "ERROR"):
+            self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(Attendance.objects.filter(check_out__isnull=True).count(), 0)
+        self.assertEqual(self.day_stats(), (2, 1, 90))
+        self.assertEqual(occupancy.current(self.clazz.pk, DAY), 0)
+        stats = StudentClassStats.objects.get(student=self.students[1], clazz=self.clazz)
+        self.assertEqual((stats.sessions, stats.on_time, stats.minutes), (1, 0, 60))
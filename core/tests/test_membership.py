@@ -0,0 +1,71 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.checkin import CheckinRejected, sync_scans, toggle_attendance
+from core.membership import class_rosters
+from core.models import Attendance, Enrollment
+
+from .helpers import aware, create_class, create_student
+
+DAY = datetime.date(2025, 9, 15)
+
+
+@override_settings(ATTENDANCE_BUFFERED_INGEST=False, ATTENDANCE_REQUIRE_ENROLLMENT=True)
+class EnrollmentRequiredTests(TestCase):
+
+    def setUp(self):
+        class_rosters.invalidate()
+        self.addCleanup(class_rosters.invalidate)
+        self.clazz = create_class(weekday=DAY.weekday(), start="09:00", end="11:00")
+        self.student = create_student()
+
+    def enroll(self, status=Enrollment.ACTIVE):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Enrollment.objects.create(student=self.student, clazz=self.clazz, status=status)
+
+    def scan(self, minute=0):
+        return toggle_attendance(self.clazz, self.student.pk, now=aware(DAY, 9, minute))
+
+    def test_unenrolled_student_is_rejected(self):
+        with self.assertRaises(CheckinRejected) as ctx:
+            self.scan()
+        self.assertEqual((str(ctx.exception), ctx.exception.status), ("alumno no matriculado", 403))
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_canceled_enrollment_is_rejected(self):
+        self.enroll(status=Enrollment.CANCELED)
+        with self.assertRaises(CheckinRejected):
+            self.scan()
+
+    def test_enrolled_student_checks_in_and_out(self):
+        self.enroll()
+        self.assertEqual(self.scan(0), "check_in")
+        self.assertEqual(self.scan(30), "check_out")
+
+    def test_roster_follows_enrollment_changes(self):
+        enrollment = self.enroll()
+        self.assertTrue(class_rosters.is_enrolled(self.clazz.pk, self.student.pk))
+        with self.assertNumQueries(0):
+            class_rosters.is_enrolled(self.clazz.pk, self.student.pk)
+        enrollment.status = Enrollment.CANCELED
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.save()
+        self.assertFalse(class_rosters.is_enrolled(self.clazz.pk, self.student.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.delete()
+        self.assertFalse(class_rosters.is_enrolled(self.clazz.pk, self.student.pk))
+
+    def test_web_check_in_is_403(self):
+        response = self.client.post(reverse("class-checkin", args=[self.clazz.pk]), {"student_id": self.student.pk})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {"error": "alumno no matriculado"})
+
+    def test_synced_scan_is_rejected(self):
+        results = sync_scans(
+            [{"token": str(self.clazz.qr_token), "student_id": self.student.pk,
+              "scanned_at": aware(DAY, 9, 0).isoformat()}],
+            now=aware(DAY, 18),
+        )
+        self.assertEqual(results[0]["error"], "alumno no matriculado")
@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import registry, timed
+
+
+class MetricsViewTests(TestCase):
+
+    def setUp(self):
+        registry.clear()
+        self.addCleanup(registry.clear)
+
+    def login_staff(self):
+        self.client.force_login(User.objects.create_user("admin", is_staff=True))
+
+    @override_settings(METRICS_TOKEN="")
+    def test_without_token_only_staff(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.login_staff()
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="s3cr3t")
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        wrong = self.client.get("/metrics", headers={"Authorization": "Bearer otro"})
+        self.assertEqual(wrong.status_code, 401)
+        ok = self.client.get("/metrics", headers={"Authorization": "Bearer s3cr3t"})
+        self.assertEqual(ok.status_code, 200)
+        self.assertTrue(ok["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+    def test_requests_and_operations_are_exposed(self):
+        self.client.get(reverse("room-list"))
+        with timed("qr_render"):
+            pass
+        self.login_staff()
+        text = self.client.get("/metrics").content.decode()
+        self.assertIn("# TYPE qrclassmanager_http_request_duration_seconds histogram", text)
+        self.assertIn('qrclassmanager_http_requests_total{route="api/rooms/$",view="room-list",method="GET",status="200"} 1', text)
+        self.assertIn('qrclassmanager_db_queries_per_request_count{route="api/rooms/$",view="room-list"} 1', text)
+        self.assertIn('qrclassmanager_operation_duration_seconds_count{operation="qr_render"} 1', text)
@@ -0,0 +1,49 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Attendance
+
+from .helpers import aware, create_class, create_student
+
+DAY = datetime.date(2025, 9, 15)
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        clazz = create_class()
+        students = [create_student(n) for n in range(1, 8)]
+        # Varias filas con el mismo check_in: el cursor desempata por id
+        times = [aware(DAY, 9, 0)] * 3 + [aware(DAY, 9, 5), aware(DAY, 9, 10)] + [aware(DAY, 9, 20)] * 2
+        for student, check_in in zip(students, times):
+            Attendance.objects.create(student=student, clazz=clazz, date=DAY, check_in=check_in)
+        self.expected = list(Attendance.objects.order_by("-check_in", "-pk").values_list("pk", flat=True))
+
+    def walk(self, **params):
+        pages, url, query = [], reverse("attendance-list"), {"page_size": 2, **params}
+        while url:
+            data = self.client.get(url, query).json()
+            pages.append(data)
+            url, query = data["next"], None
+        return pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        for fast in (False, True):  # serializador y ruta rápida (core.fastread)
+            with self.subTest(fast=fast), override_settings(FAST_READ_LISTS=fast):
+                pages = self.walk()
+                self.assertEqual([row["id"] for page in pages for row in page["results"]], self.expected)
+                self.assertEqual(len(pages), 4)
+
+    def test_count_only_on_first_page(self):
+        pages = self.walk(count="exact")
+        self.assertEqual(pages[0]["count"], 7)
+        self.assertTrue(all("count" not in page for page in pages[1:]))
+
+    def test_count_none(self):
+        self.assertNotIn("count", self.walk(count="none")[0])
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse("attendance-list"), {"cursor": "no-es-un-cursor"})
+        self.assertEqual(response.status_code, 404)
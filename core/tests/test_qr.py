@@ -0,0 +1,75 @@
+import re
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from core import qr
+from core.models import Class
+
+from .helpers import create_class
+
+
+@override_settings(QR_RENDER_ASYNC=False)
+class ClassQrTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.storage = Class._meta.get_field("qr_image").storage
+
+    def create(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            clazz = create_class()
+        clazz.refresh_from_db()
+        return clazz
+
+    def test_new_class_gets_a_content_addressed_png(self):
+        clazz = self.create()
+        self.assertRegex(clazz.qr_image.name, rf"^class_qr/class_{clazz.pk}_[0-9a-f]{{16}}\.png$")
+        self.assertEqual(clazz.qr_image.name, qr.qr_filename(clazz))
+        self.assertTrue(self.storage.exists(clazz.qr_image.name))
+
+    def test_saving_without_payload_change_does_not_render(self):
+        clazz = self.create()
+        with mock.patch.object(qr, "render_png") as render, self.captureOnCommitCallbacks(execute=True):
+            clazz.name = "Yoga avanzado"
+            clazz.save()
+        render.assert_not_called()
+        self.assertFalse(qr.render_class_qr(clazz.pk))
+
+    def test_payload_change_renders_a_new_file_and_removes_the_old_one(self):
+        clazz = self.create()
+        old = clazz.qr_image.name
+        with mock.patch.object(qr, "qr_payload", return_value='{"class_id": 0, "v": 2}'):
+            self.assertTrue(qr.render_class_qr(clazz.pk))
+            clazz.refresh_from_db()
+            self.assertEqual(clazz.qr_image.name, qr.qr_filename(clazz))
+        self.assertNotEqual(clazz.qr_image.name, old)
+        self.assertFalse(self.storage.exists(old))
+        self.assertTrue(self.storage.exists(clazz.qr_image.name))
+
+    def test_existing_file_is_reused(self):
+        clazz = self.create()
+        Class.objects.filter(pk=clazz.pk).update(qr_image="")
+        with mock.patch.object(qr, "render_png") as render:
+            self.assertTrue(qr.render_class_qr(clazz.pk))
+        render.assert_not_called()
+        clazz.refresh_from_db()
+        self.assertEqual(clazz.qr_image.name, qr.qr_filename(clazz))
+
+    def test_force_rewrites_the_file(self):
+        clazz = self.create()
+        with mock.patch.object(qr, "render_png", return_value=b"png") as render:
+            self.assertTrue(qr.render_class_qr(clazz.pk, force=True))
+        render.assert_called_once()
+        with self.storage.open(clazz.qr_image.name) as f:
+            self.assertEqual(f.read(), b"png")
+
+    def test_payload_is_deterministic(self):
+        clazz = self.create()
+        self.assertEqual(qr.qr_payload(clazz), qr.qr_payload(Class.objects.get(pk=clazz.pk)))
+        self.assertIsNone(re.search(r"time|created", qr.qr_payload(clazz)))
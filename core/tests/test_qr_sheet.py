@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.qr import render_sheet
+
+from .helpers import create_class
+
+
+class QrSheetTests(TestCase):
+
+    def setUp(self):
+        self.clazz = create_class()
+
+    def test_empty_filter_returns_404(self):
+        response = self.client.get(reverse("class-qr-sheet"), {"class": "no-existe"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_sheet_is_a_pdf(self):
+        response = self.client.get(reverse("class-qr-sheet"), {"size": 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b"%PDF"))
+
+    def test_command_rejects_empty_filter(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "qr.pdf")
+            with self.assertRaises(CommandError):
+                call_command("qr_sheet", output, "--class", "no-existe")
+            self.assertFalse(os.path.exists(output))
+
+    def test_render_sheet_rejects_no_classes(self):
+        with self.assertRaises(ValueError):
+            render_sheet([])
+
+    @override_settings(QR_SHEET_WORKERS=2)
+    def test_posters_rendered_in_spawned_processes(self):
+        other = create_class("Pilates")
+        document, _, _ = render_sheet([self.clazz, other], "zip", size=123)
+        self.assertTrue(document.startswith(b"PK"))
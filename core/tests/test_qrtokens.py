@@ -0,0 +1,79 @@
+import tempfile
+import time
+
+from django.http import Http404
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.cache import class_token_cache
+from core.qrtokens import TokenExpired, current_window, make_token, verify_token
+
+from .helpers import create_class, create_student
+
+
+@override_settings(QR_ROTATION_SECONDS=30, QR_ROTATION_GRACE_WINDOWS=1)
+class SignedTokenTests(SimpleTestCase):
+
+    def setUp(self):
+        self.now = time.time()
+        self.window = current_window(self.now)
+
+    def test_round_trip(self):
+        self.assertEqual(verify_token(make_token(42, self.window), self.now), 42)
+
+    def test_grace_window_is_accepted(self):
+        self.assertEqual(verify_token(make_token(42, self.window - 1), self.now), 42)
+
+    def test_old_and_future_windows_expire(self):
+        for window in (self.window - 2, self.window + 1):
+            with self.subTest(window=window), self.assertRaises(TokenExpired):
+                verify_token(make_token(42, window), self.now)
+
+    def test_tampered_payload_is_rejected(self):
+        payload, signature = make_token(42, self.window).split(".")
+        forged = make_token(43, self.window).split(".")[0]
+        for token in (f"{forged}.{signature}", f"{payload}.", "x.y", "sin-punto"):
+            with self.subTest(token=token), self.assertRaises(Http404):
+                verify_token(token, self.now)
+
+    def test_new_secret_invalidates_tokens(self):
+        token = make_token(42, self.window)
+        with override_settings(SECRET_KEY="otra-clave"), self.assertRaises(Http404):
+            verify_token(token, self.now)
+
+
+@override_settings(
+    ATTENDANCE_BUFFERED_INGEST=False, ATTENDANCE_REQUIRE_ENROLLMENT=False, ATTENDANCE_DEBOUNCE_SECONDS=0,
+    QR_ROTATING_TOKENS=True, QR_STATIC_TOKENS=False, QR_ROTATION_SECONDS=30, QR_ROTATION_GRACE_WINDOWS=1,
+)
+class RotatingCheckinTests(TestCase):
+
+    def setUp(self):
+        class_token_cache.clear()  # los pk se reutilizan entre tests
+        self.addCleanup(class_token_cache.clear)
+        self.clazz = create_class(start="00:00", end="23:59")
+        self.student = create_student()
+
+    def scan(self, token):
+        return self.client.post(
+            f"{reverse('attendance-checkin-qr')}?token={token}",
+            {"student_id": self.student.pk}, content_type="application/json",
+        )
+
+    def test_current_token_checks_in(self):
+        response = self.scan(make_token(self.clazz.pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["action"], "check_in")
+
+    def test_expired_token_is_410(self):
+        self.assertEqual(self.scan(make_token(self.clazz.pk, current_window() - 5)).status_code, 410)
+
+    def test_static_token_disabled_is_404(self):
+        self.assertEqual(self.scan(self.clazz.qr_token).status_code, 404)
+
+    def test_rotating_qr_image(self):
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media, QR_ROTATION_BATCH=2):
+            response = self.client.get(reverse("class-rotating-qr", args=[self.clazz.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertIn("max-age=", response["Cache-Control"])
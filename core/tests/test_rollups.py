@@ -0,0 +1,77 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import rollups
+from core.checkin import toggle_attendance
+from core.models import ClassDayStats, StudentClassStats
+
+from .helpers import aware, create_class, create_student
+
+DAY = datetime.date(2025, 9, 15)
+
+
+@override_settings(
+    ATTENDANCE_BUFFERED_INGEST=False, ATTENDANCE_REQUIRE_ENROLLMENT=False, ATTENDANCE_ON_TIME_GRACE_MINUTES=10,
+)
+class RollupTests(TestCase):
+
+    def setUp(self):
+        self.clazz = create_class(weekday=DAY.weekday(), start="09:00", end="11:00")
+        self.student = create_student()
+
+    def scan(self, day, hour, minute=0):
+        return toggle_attendance(self.clazz, self.student.pk, now=aware(day, hour, minute))
+
+    def day_stats(self, day=DAY):
+        stats = ClassDayStats.objects.get(clazz=self.clazz, date=day)
+        return stats.headcount, stats.on_time, stats.minutes
+
+    def student_stats(self):
+        stats = StudentClassStats.objects.get(student=self.student, clazz=self.clazz)
+        return stats.sessions, stats.on_time, stats.minutes
+
+    def test_leaving_and_coming_back_counts_once(self):
+        self.scan(DAY, 9, 0)
+        self.scan(DAY, 9, 30)
+        self.scan(DAY, 9, 45)   # vuelve a entrar (tarde)
+        self.scan(DAY, 10, 45)
+        self.assertEqual(self.day_stats(), (1, 1, 90))
+        self.assertEqual(self.student_stats(), (1, 1, 90))
+
+    def test_web_plus_qr_check_in_counts_once(self):
+        toggle_attendance(self.clazz, self.student.pk)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("profe"))
+        client.post(reverse("class-checkin", args=[self.clazz.pk]), {"student_id": self.student.pk})
+        self.assertEqual(ClassDayStats.objects.get(clazz=self.clazz).headcount, 1)
+        self.assertEqual(self.student_stats()[0], 1)
+
+    def test_each_day_is_a_session(self):
+        other_day = DAY + datetime.timedelta(days=7)
+        self.scan(DAY, 9, 0)
+        self.scan(other_day, 9, 20)
+        self.assertEqual(self.student_stats()[:2], (2, 1))
+
+    def test_rebuild_matches_incremental(self):
+        for hour, minute in [(9, 0), (9, 30), (9, 45), (10, 45)]:
+            self.scan(DAY, hour, minute)
+        self.scan(DAY + datetime.timedelta(days=7), 9, 20)
+        incremental = (list(ClassDayStats.objects.order_by("date").values_list("headcount", "on_time", "minutes")),
+                       self.student_stats())
+        rollups.rebuild()
+        rebuilt = (list(ClassDayStats.objects.order_by("date").values_list("headcount", "on_time", "minutes")),
+                   self.student_stats())
+        self.assertEqual(rebuilt, incremental)
+
+    def test_attendance_rate_is_not_inflated(self):
+        self.scan(DAY, 9, 0)
+        self.scan(DAY, 9, 30)
+        self.scan(DAY, 9, 45)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("profe"))
+        row = client.get(f"/api/stats/students/{self.student.pk}/").json()["classes"][0]
+        self.assertEqual((row["sessions"], row["sessions_held"], row["attendance_rate"]), (1, 1, 1.0))
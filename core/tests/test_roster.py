@@ -0,0 +1,91 @@
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from core.membership import class_rosters
+from core.models import Enrollment, Student
+from core.roster import RosterError, import_roster
+from core.search import search_students
+
+from .helpers import create_class, create_student
+
+HEADER = "first_name,last_name,email,dni,classes\n"
+
+
+class RosterImportTests(TestCase):
+
+    def setUp(self):
+        self.yoga = create_class("Yoga")
+        self.pilates = create_class("Pilates")
+
+    def run_import(self, rows, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_roster(io.StringIO(HEADER + rows), **kwargs)
+
+    def test_creates_students_and_enrollments(self):
+        summary = self.run_import(
+            "Ana,López,ana@example.com,1A,Yoga;pilates\n"
+            "Luis,Pérez,luis@example.com,2B,\n"
+        )
+        self.assertEqual((summary["students_created"], summary["enrollments"], summary["error_count"]), (2, 2, 0))
+        ana = Student.objects.get(dni="1A")
+        self.assertCountEqual(ana.enrollments.values_list("clazz__name", flat=True), ["Yoga", "Pilates"])
+        self.assertEqual(list(search_students("lopez")), [ana])  # bulk_create sin señales: índice al día
+
+    def test_updates_by_dni_and_reactivates_enrollments(self):
+        student = create_student(1, dni="1A")
+        Enrollment.objects.create(student=student, clazz=self.yoga, status=Enrollment.CANCELED)
+        summary = self.run_import("Ana,Nueva,nueva@example.com,1A,Yoga\n")
+        self.assertEqual((summary["students_created"], summary["students_updated"]), (0, 1))
+        student.refresh_from_db()
+        self.assertEqual((student.last_name, student.email), ("Nueva", "nueva@example.com"))
+        self.assertEqual(Enrollment.objects.get(student=student).status, Enrollment.ACTIVE)
+
+    def test_membership_cache_sees_imported_enrollments(self):
+        self.addCleanup(class_rosters.invalidate)
+        self.assertFalse(class_rosters.is_enrolled(self.yoga.pk, 0))
+        self.run_import("Ana,López,ana@example.com,1A,Yoga\n")
+        self.assertTrue(class_rosters.is_enrolled(self.yoga.pk, Student.objects.get(dni="1A").pk))
+
+    def test_invalid_rows_reported_with_line_number(self):
+        create_student(9, email="taken@example.com", dni="9Z")
+        summary = self.run_import(
+            "Ana,López,ana@example.com,1A,Boxeo\n"
+            "Luis,Pérez,no-es-email,2B,\n"
+            "Eva,Ruiz,taken@example.com,3C,\n"
+            "Sara,Gil,sara@example.com,4D,Yoga\n"
+        )
+        self.assertEqual(summary["students_created"], 1)
+        self.assertEqual([(e["row"], e["error"]) for e in summary["errors"]], [
+            (2, "clase desconocida: Boxeo"),
+            (3, "email inválido"),
+            (4, "email ya usado por el alumno con DNI 9Z"),
+        ])
+
+    def test_repeated_dni_merges_classes(self):
+        summary = self.run_import(
+            "Ana,López,ana@example.com,1A,Yoga\n"
+            "Ana,López,ana@example.com,1A,Pilates\n",
+            chunk_size=10,
+        )
+        self.assertEqual(summary["students_created"], 1)
+        self.assertEqual(Enrollment.objects.count(), 2)
+
+    def test_missing_columns(self):
+        with self.assertRaises(RosterError):
+            import_roster(io.StringIO("first_name,last_name\nAna,López\n"))
+
+
+class RosterEndpointTests(TestCase):
+
+    def test_upload(self):
+        create_class("Yoga")
+        upload = SimpleUploadedFile("alumnos.csv", (HEADER + "Ana,López,ana@example.com,1A,Yoga\n").encode("utf-8-sig"))
+        response = self.client.post(reverse("student-import-roster"), {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["students_created"], 1)
+
+    def test_missing_file_is_400(self):
+        self.assertEqual(self.client.post(reverse("student-import-roster")).status_code, 400)
@@ -0,0 +1,56 @@
+from django.contrib import admin
+from django.test import TestCase
+
+from core.admin import AttendanceAdmin, StudentAdmin
+from core.models import Attendance, Student
+from core.search import search_classes, search_students
+
+from .helpers import create_class, create_student
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.maria = create_student(1, first_name="María", last_name="García Muñoz")
+        self.pedro = create_student(2, first_name="Pedro", last_name="Martín")
+
+    def test_prefixes_ignore_accents_and_case(self):
+        self.assertEqual(list(search_students("gar MAR")), [self.maria])
+        self.assertEqual(list(search_students("munoz")), [self.maria])
+
+    def test_every_word_must_match(self):
+        self.assertCountEqual(search_students("mar"), [self.maria, self.pedro])
+        self.assertFalse(search_students("pedro garcia").exists())
+
+    def test_tokens_follow_edits(self):
+        self.pedro.last_name = "Gómez"
+        self.pedro.save()
+        self.assertFalse(search_students("martin").exists())
+        self.assertEqual(list(search_students("gomez")), [self.pedro])
+
+    def test_classes_by_name(self):
+        yoga = create_class("Yoga Avanzado")
+        create_class("Pilates")
+        self.assertEqual(list(search_classes("avan")), [yoga])
+
+
+class AdminTokenSearchTests(TestCase):
+
+    def setUp(self):
+        self.student = create_student(1, first_name="Lucía", last_name="Pérez")
+        self.clazz = create_class("Yoga")
+        Attendance.objects.create(student=self.student, clazz=self.clazz)
+
+    def test_student_admin_uses_the_index(self):
+        model_admin = StudentAdmin(Student, admin.site)
+        results, duplicates = model_admin.get_search_results(None, Student.objects.all(), "lucia")
+        self.assertEqual(list(results), [self.student])
+        self.assertFalse(duplicates)
+
+    def test_attendance_admin_searches_student_or_class(self):
+        model_admin = AttendanceAdmin(Attendance, admin.site)
+        for term in ("perez", "yog"):
+            results, _ = model_admin.get_search_results(None, Attendance.objects.all(), term)
+            self.assertEqual(results.count(), 1)
+        results, _ = model_admin.get_search_results(None, Attendance.objects.all(), "nadie")
+        self.assertEqual(results.count(), 0)
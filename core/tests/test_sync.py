@@ -0,0 +1,122 @@
+import datetime
+
+from django.test import TestCase, override_settings
+
+from core.checkin import sync_scans, toggle_attendance
+from core.models import Attendance
+from core.qrtokens import current_window, make_token
+
+from .helpers import aware, create_class, create_student
+
+DAY = datetime.date(2025, 9, 15)  # lunes
+
+
+def sync(events, hour=18):
+    """Sincroniza como si el kiosko recuperase la conexión ese mismo día."""
+    return sync_scans(events, now=aware(DAY, hour))
+
+
+@override_settings(ATTENDANCE_BUFFERED_INGEST=False, ATTENDANCE_REQUIRE_ENROLLMENT=False)
+class SyncScansTests(TestCase):
+
+    def setUp(self):
+        self.clazz = create_class(weekday=DAY.weekday(), start="14:00", end="16:00")
+        self.student = create_student()
+
+    def event(self, hour, minute):
+        return {
+            "token": str(self.clazz.qr_token), "student_id": self.student.pk,
+            "scanned_at": aware(DAY, hour, minute).isoformat(),
+        }
+
+    def test_pairs_by_scanned_at_not_by_input_order(self):
+        results = sync([self.event(15, 30), self.event(14, 5)])
+        self.assertEqual([r["action"] for r in results], ["check_out", "check_in"])
+        att = Attendance.objects.get()
+        self.assertEqual((att.check_in, att.check_out), (aware(DAY, 14, 5), aware(DAY, 15, 30)))
+
+    def test_alternates_check_in_and_out(self):
+        results = sync([self.event(14, 0), self.event(14, 30), self.event(15, 0)])
+        self.assertEqual([r["action"] for r in results], ["check_in", "check_out", "check_in"])
+        self.assertEqual(Attendance.objects.filter(check_out__isnull=True).count(), 1)
+
+    def test_closes_live_check_in_with_later_scan(self):
+        toggle_attendance(self.clazz, self.student.pk, now=aware(DAY, 14, 22))
+        results = sync([self.event(15, 40)])
+        self.assertEqual(results[0]["action"], "check_out")
+        self.assertEqual(Attendance.objects.get().check_out, aware(DAY, 15, 40))
+
+    def test_replay_earlier_than_open_check_in_is_rejected(self):
+        toggle_attendance(self.clazz, self.student.pk, now=aware(DAY, 14, 22))
+        results = sync([self.event(14, 17)])
+        self.assertFalse(results[0]["success"])
+        self.assertEqual(results[0]["error"], "escaneo anterior al check-in abierto")
+        att = Attendance.objects.get()
+        self.assertEqual(att.check_in, aware(DAY, 14, 22))
+        self.assertIsNone(att.check_out)
+
+    def test_rejected_replay_does_not_consume_the_open_attendance(self):
+        toggle_attendance(self.clazz, self.student.pk, now=aware(DAY, 14, 22))
+        results = sync([self.event(14, 17), self.event(15, 0)])
+        self.assertEqual([r["success"] for r in results], [False, True])
+        self.assertEqual(Attendance.objects.get().check_out, aware(DAY, 15, 0))
+
+    def test_invalid_events_are_reported(self):
+        results = sync([
+            {"token": "x", "student_id": self.student.pk, "scanned_at": aware(DAY, 14).isoformat()},
+            {**self.event(14, 0), "student_id": 999999},
+        ])
+        self.assertEqual([r["success"] for r in results], [False, False])
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_future_and_stale_scans_are_rejected(self):
+        with override_settings(ATTENDANCE_SYNC_MAX_AGE_HOURS=24):
+            results = sync([self.event(14, 0)], hour=13)
+            self.assertEqual(results[0]["error"], "scanned_at en el futuro")
+            results = sync_scans([self.event(14, 0)], now=aware(DAY + datetime.timedelta(days=2), 9))
+            self.assertEqual(results[0]["error"], "scanned_at fuera del plazo de sincronización")
+        self.assertFalse(Attendance.objects.exists())
+
+
+@override_settings(
+    ATTENDANCE_BUFFERED_INGEST=False, ATTENDANCE_REQUIRE_ENROLLMENT=False,
+    QR_ROTATING_TOKENS=True, QR_ROTATION_SECONDS=30, QR_ROTATION_GRACE_WINDOWS=1,
+)
+class SyncTokenTests(TestCase):
+
+    def setUp(self):
+        self.clazz = create_class(weekday=DAY.weekday(), start="14:00", end="16:00")
+        self.student = create_student()
+        self.scanned_at = aware(DAY, 14, 5)
+
+    def sync(self, token, scanned_at=None):
+        return sync([{
+            "token": str(token), "student_id": self.student.pk,
+            "scanned_at": (scanned_at or self.scanned_at).isoformat(),
+        }])[0]
+
+    def window(self, when):
+        return current_window(when.timestamp())
+
+    def test_signed_token_checked_against_scanned_at(self):
+        token = make_token(self.clazz.pk, self.window(self.scanned_at))
+        self.assertEqual(self.sync(token)["action"], "check_in")
+
+    def test_signed_token_outside_its_window_is_rejected(self):
+        token = make_token(self.clazz.pk, self.window(self.scanned_at) - 5)
+        self.assertEqual(self.sync(token)["error"], "token QR caducado")
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_tampered_signed_token_is_rejected(self):
+        token = make_token(self.clazz.pk, self.window(self.scanned_at))
+        self.assertEqual(self.sync(token[:-2] + ("AA" if token[-2:] != "AA" else "BB"))["error"], "token desconocido")
+
+    def test_static_token_rejected_when_disabled(self):
+        with override_settings(QR_STATIC_TOKENS=False):
+            self.assertEqual(self.sync(self.clazz.qr_token)["error"], "token desconocido")
+        self.assertEqual(self.sync(self.clazz.qr_token)["action"], "check_in")
+
+    def test_signed_token_rejected_when_rotation_disabled(self):
+        token = make_token(self.clazz.pk, self.window(self.scanned_at))
+        with override_settings(QR_ROTATING_TOKENS=False):
+            self.assertEqual(self.sync(token)["error"], "token desconocido")
@@ -0,0 +1,60 @@
+import datetime
+
+from django.test import TestCase
+
+from core.models import Class, Room, Teacher
+from core.timetable import timetable
+
+
+def _time(value):
+    return datetime.time(*map(int, value.split(":")))
+
+
+class RoomConflictsTests(TestCase):
+
+    def setUp(self):
+        self.room = Room.objects.create(name="Aula 1", capacity=20)
+        self.teacher = Teacher.objects.create(first_name="Ana", last_name="Ruiz", email="ana@example.com")
+        timetable.load()
+
+    def make_class(self, name, start, end, weekday=0):
+        return Class.objects.create(
+            name=name, room=self.room, teacher=self.teacher, weekday=weekday,
+            start_time=_time(start), end_time=_time(end),
+        )
+
+    def conflicts(self, start, end, weekday=0):
+        return Class(room=self.room, weekday=weekday, start_time=_time(start), end_time=_time(end)).room_conflicts()
+
+    def test_detects_overlap(self):
+        self.make_class("Yoga", "09:00", "10:00")
+        self.assertEqual(self.conflicts("09:30", "10:30"), ["Yoga"])
+
+    def test_adjacent_slots_do_not_conflict(self):
+        self.make_class("Yoga", "09:00", "10:00")
+        self.assertEqual(self.conflicts("10:00", "11:00"), [])
+        self.assertEqual(self.conflicts("08:00", "09:00"), [])
+
+    def test_other_weekday_does_not_conflict(self):
+        self.make_class("Yoga", "09:00", "10:00")
+        self.assertEqual(self.conflicts("09:00", "10:00", weekday=1), [])
+
+    def test_long_slot_hidden_behind_short_one(self):
+        # Franjas ya solapadas en el aula (datos previos o bulk_create): la
+        # corta no debe ocultar la larga que empieza antes
+        self.make_class("Larga", "08:00", "12:00")
+        self.make_class("Corta", "09:00", "09:30")
+        self.assertEqual(self.conflicts("10:00", "11:00"), ["Larga"])
+
+    def test_index_follows_updates_and_deletes(self):
+        long_class = self.make_class("Larga", "08:00", "12:00")
+        self.make_class("Corta", "09:00", "09:30")
+        long_class.end_time = _time("09:45")
+        long_class.save()
+        self.assertEqual(self.conflicts("10:00", "11:00"), [])
+        long_class.delete()
+        self.assertEqual(self.conflicts("09:15", "11:00"), ["Corta"])
+
+    def test_excludes_itself(self):
+        yoga = self.make_class("Yoga", "09:00", "10:00")
+        self.assertEqual(yoga.room_conflicts(), [])
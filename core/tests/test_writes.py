@@ -0,0 +1,49 @@
+from unittest import mock
+
+from django.db import OperationalError, transaction
+from django.test import TransactionTestCase, override_settings
+
+from core.writes import write_transaction
+
+
+@override_settings(SQLITE_WRITE_RETRIES=2)
+@mock.patch("core.writes.time.sleep")
+class WriteTransactionTests(TransactionTestCase):
+    """Sin la transacción envolvente de TestCase: es el caso en que se reintenta."""
+
+    def failing(self, *errors):
+        calls = []
+
+        @write_transaction
+        def write():
+            calls.append(transaction.get_connection().in_atomic_block)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return "ok"
+
+        return write, calls
+
+    def test_locked_database_is_retried(self, sleep):
+        write, calls = self.failing(OperationalError("database is locked"), OperationalError("database is busy"))
+        self.assertEqual(write(), "ok")
+        self.assertEqual(calls, [True, True, True])  # cada intento en su transacción
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_gives_up_after_the_retries(self, sleep):
+        write, calls = self.failing(*[OperationalError("database is locked")] * 3)
+        with self.assertRaisesMessage(OperationalError, "locked"):
+            write()
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self, sleep):
+        write, calls = self.failing(OperationalError("no such table: core_attendance"))
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+        sleep.assert_not_called()
+
+    def test_not_retried_inside_an_outer_transaction(self, sleep):
+        write, calls = self.failing(OperationalError("database is locked"))
+        with self.assertRaises(OperationalError), transaction.atomic():
+            write()
+        self.assertEqual(len(calls), 1)
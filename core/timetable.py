@@ -0,0 +1,189 @@
+"""
+Índice en memoria del horario semanal.
+
+Por cada clase guarda su franja (día, inicio, fin, aula) y, por cada
+(día, aula), la lista de franjas ordenada por hora de inicio. Con eso:
+
+- ``session(clazz_id, when)`` dice qué sesión de la clase está en curso y si
+  el alumno llega pronto, puntual, tarde o fuera de horario, sin consultas.
+- ``conflicts(...)`` detecta solapes de aula con una búsqueda binaria en la
+  lista del aula (sin comparar todas las clases entre sí).
+
+Se mantiene de forma incremental con las señales de Class. Los cambios
+hechos en otros procesos se detectan por la versión del catálogo "class"
+(core.catalog), revisada como mucho cada TIMETABLE_REFRESH_SECONDS.
+"""
+import bisect
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .catalog import get_versions
+from .models import Class
+
+EARLY = "early"
+ON_TIME = "on_time"
+LATE = "late"
+OUT_OF_WINDOW = "out_of_window"
+
+
+class TimetableIndex:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._classes = {}   # pk -> (weekday, start, end, room_id)
+        self._rooms = {}     # (weekday, room_id) -> [(start, end, pk)] ordenada
+        self._max_ends = {}  # (weekday, room_id) -> [máximo de end hasta cada posición]
+        self._version = None
+        self._checked = 0.0
+
+    # -------------------------------
+    # Mantenimiento
+    # -------------------------------
+
+    def load(self):
+        with self._lock:
+            self._version = get_versions(("class",))
+            self._checked = time.monotonic()
+            self._classes, self._rooms, self._max_ends = {}, {}, {}
+            for row in Class.objects.values_list("pk", "weekday", "start_time", "end_time", "room_id"):
+                self._insert(*row)
+
+    def ensure_fresh(self, force=False):
+        """Recarga si otro proceso cambió clases (o si nunca se cargó)."""
+        if self._version is None:
+            self.load()
+            return
+        if not force and time.monotonic() - self._checked < settings.TIMETABLE_REFRESH_SECONDS:
+            return
+        with self._lock:
+            self._checked = time.monotonic()
+            if get_versions(("class",)) != self._version:
+                self.load()
+
+    def upsert(self, clazz):
+        with self._lock:
+            if self._version is None:
+                return  # se cargará completo en el primer uso
+            self._remove(clazz.pk)
+            self._insert(clazz.pk, clazz.weekday, clazz.start_time, clazz.end_time, clazz.room_id)
+            self._advance_version()
+
+    def remove(self, pk):
+        with self._lock:
+            if self._version is None:
+                return
+            self._remove(pk)
+            self._advance_version()
+
+    def _advance_version(self):
+        # Si solo ha entrado nuestro propio cambio, el índice sigue al día; si
+        # otro proceso cambió algo entretanto, se deja la versión vieja y se recarga.
+        current = get_versions(("class",))
+        if current[0] == self._version[0] + 1:
+            self._version = current
+
+    def _insert(self, pk, weekday, start, end, room_id):
+        self._classes[pk] = (weekday, start, end, room_id)
+        bisect.insort(self._rooms.setdefault((weekday, room_id), []), (start, end, pk))
+        self._reindex((weekday, room_id))
+
+    def _remove(self, pk):
+        old = self._classes.pop(pk, None)
+        if old is None:
+            return
+        weekday, start, end, room_id = old
+        slots = self._rooms.get((weekday, room_id), [])
+        i = bisect.bisect_left(slots, (start, end, pk))
+        if i < len(slots) and slots[i] == (start, end, pk):
+            del slots[i]
+            self._reindex((weekday, room_id))
+
+    def _reindex(self, key):
+        # Máximo acumulado de los fines: las franjas de un aula pueden solaparse
+        # (datos previos, bulk_create, guardados concurrentes), así que el fin de
+        # la franja anterior no basta para saber dónde parar al buscar hacia atrás
+        max_ends, latest = [], None
+        for _, end, _ in self._rooms.get(key, []):
+            latest = end if latest is None or end > latest else latest
+            max_ends.append(latest)
+        self._max_ends[key] = max_ends
+
+    # -------------------------------
+    # Consultas
+    # -------------------------------
+
+    def session(self, clazz_id, when=None):
+        """
+        Sesión de la clase para el instante ``when`` (por defecto, ahora):
+        dict con fecha, franja y ``status`` (early/on_time/late/out_of_window)
+        y ``minutes_late``. None si la clase no tiene sesión ese día.
+        """
+        self.ensure_fresh()
+        entry = self._classes.get(clazz_id)
+        local = timezone.localtime(when or timezone.now())
+        if entry is None or entry[0] != local.weekday():
+            return None
+
+        _, start, end, _ = entry
+        now = local.replace(tzinfo=None)
+        starts_at = datetime.datetime.combine(local.date(), start)
+        ends_at = datetime.datetime.combine(local.date(), end)
+        early = datetime.timedelta(minutes=settings.ATTENDANCE_EARLY_MINUTES)
+        grace = datetime.timedelta(minutes=settings.ATTENDANCE_ON_TIME_GRACE_MINUTES)
+
+        if now < starts_at - early or now > ends_at:
+            status = OUT_OF_WINDOW
+        elif now < starts_at:
+            status = EARLY
+        elif now <= starts_at + grace:
+            status = ON_TIME
+        else:
+            status = LATE
+        return {
+            "date": local.date(),
+            "start": start,
+            "end": end,
+            "status": status,
+            "minutes_late": max(int((now - starts_at).total_seconds() // 60), 0),
+        }
+
+    def conflicts(self, room_id, weekday, start, end, exclude=None):
+        """Clases del aula cuyo horario se solapa con [start, end) ese día."""
+        self.ensure_fresh(force=True)
+        with self._lock:
+            slots = self._rooms.get((weekday, room_id), [])
+            max_ends = self._max_ends.get((weekday, room_id), [])
+            found = []
+            # Las franjas que empiezan antes de ``end`` son candidatas; recorremos hacia
+            # atrás desde ese punto hasta que ninguna anterior termine después de ``start``.
+            i = bisect.bisect_left(slots, (end,))
+            while i > 0 and max_ends[i - 1] > start:
+                i -= 1
+                s_start, s_end, pk = slots[i]
+                if s_end > start and pk != exclude:
+                    found.append(pk)
+            return found
+
+    def next_end(self, when=None):
+        """Próximo instante (con zona) en que termina alguna sesión semanal; None si no hay clases."""
+        self.ensure_fresh()
+        local = timezone.localtime(when or timezone.now())
+        with self._lock:
+            slots = [(weekday, end) for weekday, _, end, _ in self._classes.values()]
+        best = None
+        for weekday, end in slots:
+            day = local.date() + datetime.timedelta(days=(weekday - local.weekday()) % 7)
+            ends_at = timezone.make_aware(datetime.datetime.combine(day, end), local.tzinfo)
+            if ends_at <= local:
+                ends_at += datetime.timedelta(days=7)
+            if best is None or ends_at < best:
+                best = ends_at
+        return best
+
+
+timetable = TimetableIndex()
+
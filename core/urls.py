@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
@@ -8,7 +9,10 @@ from .views import (
     EnrollmentViewSet,
     AttendanceViewSet,
     attendance_checkin_qr,
+    attendance_sync,
     attendance_export_excel,
+    class_stats,
+    student_stats,
 )
 
 # Router de DRF para los ViewSets (CRUD automático)
@@ -21,8 +25,21 @@ router.register(r"enrollments", EnrollmentViewSet)
 router.register(r"attendance", AttendanceViewSet)
 
 # Rutas finales para la app core
+# Las rutas fijas van antes del router: si no, "attendance/<pk>/" las captura.
 urlpatterns = [
-    path("", include(router.urls)),  # Todas las rutas de los ViewSets
     path("attendance/checkin_qr/", attendance_checkin_qr, name="attendance-checkin-qr"),
+    path("attendance/sync/", attendance_sync, name="attendance-sync"),
     path("attendance/export_excel/", attendance_export_excel, name="attendance-export-excel"),
+    path("stats/classes/<int:pk>/", class_stats, name="stats-class"),
+    path("stats/students/<int:pk>/", student_stats, name="stats-student"),
+    path("", include(router.urls)),  # Todas las rutas de los ViewSets
 ]
+
+# Despliegue ASGI: las rutas de check-in las atienden las vistas async (mismas URLs)
+if settings.ASYNC_CHECKIN:
+    from . import async_views
+
+    urlpatterns = [
+        path("attendance/checkin_qr/", async_views.attendance_checkin_qr, name="attendance-checkin-qr"),
+        path("classes/<int:pk>/checkin/", async_views.class_checkin, name="class-checkin"),
+    ] + urlpatterns
@@ -1,39 +1,138 @@
-from rest_framework import viewsets, status
+from rest_framework import viewsets
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from django.conf import settings
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Count
+from django.utils.dateparse import parse_date
+from datetime import datetime, time, timedelta
+import io
+import itertools
 
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 
-from .models import Room, Teacher, Class, Student, Enrollment, Attendance
+from . import occupancy
+from .cache import resolve_class_token
+from .catalog import CatalogCacheMixin
+from .checkin import CheckinRejected, sync_scans, toggle_attendance, web_checkin
+from .debounce import previous_result, remember_result
+from .export import stream_csv
+from .fastread import (
+    FastListMixin, ROOM_LIST, TEACHER_LIST, CLASS_LIST,
+    STUDENT_LIST, ENROLLMENT_LIST, ATTENDANCE_LIST,
+)
+from .pagination import AttendancePagination, EnrollmentPagination
+from .qr import SHEET_FORMATS, current_rotating_qr, render_sheet
+from .qrtokens import TokenExpired
+from .roster import RosterError, import_roster
+from .search import search_classes, search_students
+from .models import (
+    Room, Teacher, Class, Student, Enrollment, Attendance, ArchivedAttendance,
+    ClassDayStats, StudentClassStats,
+)
 from .serializers import (
     RoomSerializer, TeacherSerializer, ClassSerializer,
     StudentSerializer, EnrollmentSerializer, AttendanceSerializer,
 )
+from .timetable import timetable
+
+# -------------------------------
+# Filtros
+# -------------------------------
+
+def filter_classes(qs, params):
+    """Filtra clases por nombre (class), aula (room), profesor (teacher) y día (weekday)."""
+    if params.get("class"):
+        qs = qs.filter(name__icontains=params["class"])
+    for param in ("room", "teacher", "weekday"):
+        if (params.get(param) or "").isdigit():
+            qs = qs.filter(**{param: int(params[param])})
+    return qs
+
+
+def _parse_date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValidationError({name: "Fecha inválida (YYYY-MM-DD)"})
+    return parsed
+
 
-import csv
+def filter_by_class_student(qs, params):
+    """Filtra por ids de clase (class) y alumno (student)."""
+    for param, field in (("class", "clazz_id"), ("student", "student_id")):
+        value = params.get(param)
+        if value:
+            if not value.isdigit():
+                raise ValidationError({param: "Debe ser un id numérico"})
+            qs = qs.filter(**{field: int(value)})
+    return qs
+
+
+def filter_attendances(qs, params):
+    """class, student y rango de fechas from/to sobre Attendance.date."""
+    qs = filter_by_class_student(qs, params)
+    date_from, date_to = _parse_date_param(params, "from"), _parse_date_param(params, "to")
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    return qs
+
+
+def filter_enrollments(qs, params):
+    """class, student y rango de fechas from/to sobre Enrollment.created."""
+    qs = filter_by_class_student(qs, params)
+    date_from, date_to = _parse_date_param(params, "from"), _parse_date_param(params, "to")
+    # Límites como datetime (no created__date) para que el índice sobre created sirva
+    if date_from:
+        qs = qs.filter(created__gte=_start_of_day(date_from))
+    if date_to:
+        qs = qs.filter(created__lt=_start_of_day(date_to + timedelta(days=1)))
+    return qs
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+LIST_FILTER_PARAMETERS = [
+    OpenApiParameter(name="class", location=OpenApiParameter.QUERY, required=False, type=int, description="ID de la clase"),
+    OpenApiParameter(name="student", location=OpenApiParameter.QUERY, required=False, type=int, description="ID del alumno"),
+    OpenApiParameter(name="from", location=OpenApiParameter.QUERY, required=False, description="Fecha desde (YYYY-MM-DD)"),
+    OpenApiParameter(name="to", location=OpenApiParameter.QUERY, required=False, description="Fecha hasta (YYYY-MM-DD)"),
+]
 
 # -------------------------------
 # ViewSets
 # -------------------------------
 
-class RoomViewSet(viewsets.ModelViewSet):
+class RoomViewSet(CatalogCacheMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
+    fast_list = ROOM_LIST
+    catalog_versions = ("room",)
 
 
-class TeacherViewSet(viewsets.ModelViewSet):
+class TeacherViewSet(CatalogCacheMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Teacher.objects.all()
     serializer_class = TeacherSerializer
+    fast_list = TEACHER_LIST
+    catalog_versions = ("teacher",)
 
 
-class ClassViewSet(viewsets.ModelViewSet):
-    queryset = Class.objects.all().select_related("teacher")
+class ClassViewSet(CatalogCacheMixin, FastListMixin, viewsets.ModelViewSet):
+    queryset = Class.objects.all().select_related("teacher", "room")
     serializer_class = ClassSerializer
+    fast_list = CLASS_LIST
+    catalog_versions = ("class", "teacher")  # ClassSerializer anida al profesor
 
     @extend_schema(
         summary="Check-in manual (web)",
@@ -61,7 +160,9 @@ class ClassViewSet(viewsets.ModelViewSet):
                     "error": {"type": "string"}
                 },
                 "example": {"error": "student_id requerido"}
-            }
+            },
+            403: {"description": "Alumno no matriculado en la clase"},
+            409: {"description": "Aforo completo"}
         }
     )
     @action(detail=True, methods=["post"], permission_classes=[AllowAny])
@@ -73,23 +174,187 @@ class ClassViewSet(viewsets.ModelViewSet):
         student = get_object_or_404(Student, pk=student_id)
         clazz = self.get_object()
 
-        Attendance.objects.create(student=student, clazz=clazz, method="web")
+        try:
+            web_checkin(clazz, student.pk)
+        except CheckinRejected as e:
+            return Response({"error": str(e)}, status=e.status)
         return Response({"success": True})
 
+    @extend_schema(
+        summary="Ocupación en vivo",
+        description="Alumnos dentro de la clase hoy (check-in sin check-out) frente a su aforo. "
+                    "Lee un solo contador, sin contar asistencias.",
+        responses={
+            200: {
+                "type": "object",
+                "example": {"class": 1, "date": "2025-09-15", "occupancy": 18, "capacity": 40, "available": 22}
+            }
+        }
+    )
+    @action(detail=True, methods=["get"])
+    def occupancy(self, request, pk=None):
+        clazz = self.get_object()
+        today = timezone.localdate()
+        count = occupancy.current(clazz.pk, today)
+        return Response({
+            "class": clazz.pk,
+            "date": today,
+            "occupancy": count,
+            "capacity": clazz.capacity,
+            "available": max(clazz.capacity - count, 0),
+        })
 
-class StudentViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        summary="QR rotatorio actual",
+        description="PNG del QR firmado de la ventana actual (QR_ROTATING_TOKENS), para la "
+                    "pantalla del aula: caduca a los QR_ROTATION_SECONDS y Cache-Control indica "
+                    "cuándo pedir el siguiente. Las imágenes se renderizan por adelantado en lotes.",
+        responses={
+            200: {"description": "Imagen PNG"},
+            404: {"description": "Clase inexistente o QR rotatorios desactivados"},
+        }
+    )
+    @action(detail=True, methods=["get"], url_path="qr")
+    def rotating_qr(self, request, pk=None):
+        if not settings.QR_ROTATING_TOKENS:
+            return Response({"error": "QR rotatorios desactivados"}, status=404)
+        clazz = self.get_object()
+        png, remaining = current_rotating_qr(clazz.pk)
+        response = HttpResponse(png, content_type="image/png")
+        response["Cache-Control"] = f"private, max-age={remaining}"
+        return response
+
+    @extend_schema(
+        summary="Hoja imprimible de QR",
+        description="Genera un PDF (una página por clase) o un ZIP de PNG con los QR "
+                    "de las clases filtradas. Las repeticiones se sirven desde caché.",
+        parameters=[
+            OpenApiParameter(name="class", location=OpenApiParameter.QUERY, required=False, description="Nombre de la clase"),
+            OpenApiParameter(name="room", location=OpenApiParameter.QUERY, required=False, description="ID del aula"),
+            OpenApiParameter(name="teacher", location=OpenApiParameter.QUERY, required=False, description="ID del profesor"),
+            OpenApiParameter(name="weekday", location=OpenApiParameter.QUERY, required=False, description="Día de la semana (0=lunes)"),
+            OpenApiParameter(name="output", location=OpenApiParameter.QUERY, required=False, description="pdf (por defecto) o zip"),
+            OpenApiParameter(name="size", location=OpenApiParameter.QUERY, required=False, description="Lado del QR en píxeles (100-2000)"),
+        ],
+        responses={
+            200: {"description": "Documento PDF o ZIP"},
+            400: {"description": "Parámetros inválidos"},
+            404: {"description": "Ninguna clase coincide con el filtro"},
+        }
+    )
+    @action(detail=False, methods=["get"])
+    def qr_sheet(self, request):
+        fmt = request.GET.get("output", "pdf")
+        if fmt not in SHEET_FORMATS:
+            return Response({"error": "output debe ser pdf o zip"}, status=400)
+        try:
+            size = min(max(int(request.GET.get("size", 600)), 100), 2000)
+        except ValueError:
+            return Response({"error": "size debe ser un entero"}, status=400)
+
+        classes = list(filter_classes(
+            Class.objects.select_related("room").order_by("room__name", "weekday", "start_time"), request.GET
+        ))
+        if not classes:
+            return Response({"error": "Ninguna clase coincide con el filtro"}, status=404)
+        document, content_type, filename = render_sheet(classes, fmt, size)
+        response = HttpResponse(document, content_type=content_type)
+        response["Content-Disposition"] = f"attachment; filename={filename}"
+        return response
+
+
+STUDENT_SEARCH_MAX_LIMIT = 100
+
+
+class StudentViewSet(FastListMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
+    fast_list = STUDENT_LIST
+
+    @extend_schema(
+        summary="Buscar alumnos",
+        description="Cada palabra de q debe ser el prefijo de una palabra del nombre o apellidos, "
+                    "o del DNI o email, sin distinguir acentos ni mayúsculas ('gar mar' encuentra "
+                    "'María García'). Usa el índice de core.search. Ordenados por apellidos.",
+        parameters=[
+            OpenApiParameter(name="q", location=OpenApiParameter.QUERY, required=True, description="Texto a buscar"),
+            OpenApiParameter(name="limit", location=OpenApiParameter.QUERY, required=False, type=int,
+                             description=f"Máximo de resultados (por defecto 20, máx. {STUDENT_SEARCH_MAX_LIMIT})"),
+        ],
+        responses={200: StudentSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        limit = request.query_params.get("limit", "20")
+        if not limit.isdigit():
+            raise ValidationError({"limit": "Debe ser un entero"})
+        limit = max(1, min(int(limit), STUDENT_SEARCH_MAX_LIMIT))
+        qs = search_students(request.query_params.get("q", "")).order_by("last_name", "first_name", "pk")
+        return Response(StudentSerializer(qs[:limit], many=True).data)
+
+    @extend_schema(
+        summary="Importar alumnos y matrículas (CSV)",
+        description="CSV con columnas first_name, last_name, email, dni y classes (nombres "
+                    "separados por ';'). Da de alta o actualiza alumnos por DNI y los matricula "
+                    "en sus clases, por lotes. Las filas con errores se descartan y se informan.",
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"],
+            }
+        },
+        responses={
+            200: {
+                "type": "object",
+                "example": {
+                    "rows": 3, "students_created": 1, "students_updated": 1, "enrollments": 3,
+                    "error_count": 1, "errors": [{"row": 4, "error": "clase desconocida: Yoga"}],
+                },
+            },
+            400: {"description": "Falta el fichero, no es UTF-8 o faltan columnas"},
+        }
+    )
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
+    def import_roster(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "file requerido"}, status=400)
+        try:
+            summary = import_roster(io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""))
+        except RosterError as e:
+            return Response({"error": str(e)}, status=400)
+        except UnicodeDecodeError:
+            return Response({"error": "El fichero debe estar en UTF-8"}, status=400)
+        return Response(summary)
 
 
-class EnrollmentViewSet(viewsets.ModelViewSet):
+@extend_schema_view(list=extend_schema(parameters=LIST_FILTER_PARAMETERS))
+class EnrollmentViewSet(FastListMixin, viewsets.ModelViewSet):
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
+    fast_list = ENROLLMENT_LIST
+    pagination_class = EnrollmentPagination
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == "list":
+            qs = filter_enrollments(qs, self.request.query_params)
+        return qs
 
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+@extend_schema_view(list=extend_schema(parameters=LIST_FILTER_PARAMETERS))
+class AttendanceViewSet(FastListMixin, viewsets.ModelViewSet):
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
+    fast_list = ATTENDANCE_LIST
+    pagination_class = AttendancePagination
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == "list":
+            qs = filter_attendances(qs, self.request.query_params)
+        return qs
 
 # -------------------------------
 # API Functions
@@ -100,7 +365,11 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     description="Permite al estudiante hacer check-in o check-out escaneando un QR. "
                 "Si ya existe un check-in hoy, se marca como check-out.",
     parameters=[
-        OpenApiParameter(name="token", location=OpenApiParameter.QUERY, required=True, description="Token QR de la clase")
+        OpenApiParameter(name="token", location=OpenApiParameter.QUERY, required=True,
+                         description="Token QR de la clase: su UUID o un token rotatorio firmado"),
+        OpenApiParameter(name="Idempotency-Key", location=OpenApiParameter.HEADER, required=False,
+                         description="Clave única de la petición: un reintento con la misma clave "
+                                     "devuelve la respuesta original sin repetir el check-in/check-out"),
     ],
     request={
         "application/json": {
@@ -116,11 +385,30 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             "type": "object",
             "properties": {
                 "success": {"type": "boolean"},
-                "action": {"type": "string", "enum": ["check_in", "check_out"]}
+                "action": {"type": "string", "enum": ["check_in", "check_out"]},
+                "session": {
+                    "type": "object",
+                    "nullable": True,
+                    "description": "Sesión de hoy de la clase; null si hoy no tiene",
+                    "properties": {
+                        "date": {"type": "string", "format": "date"},
+                        "start": {"type": "string"},
+                        "end": {"type": "string"},
+                        "status": {"type": "string", "enum": ["early", "on_time", "late", "out_of_window"]},
+                        "minutes_late": {"type": "integer"},
+                    }
+                }
             },
-            "example": {"success": True, "action": "check_in"}
+            "example": {
+                "success": True, "action": "check_in",
+                "session": {"date": "2025-09-15", "start": "09:00:00", "end": "10:30:00",
+                            "status": "late", "minutes_late": 12}
+            }
         },
-        400: {"description": "Faltan datos requeridos"}
+        400: {"description": "Faltan datos requeridos"},
+        403: {"description": "Alumno no matriculado en la clase"},
+        409: {"description": "Check-in rechazado (p. ej. aforo completo)"},
+        410: {"description": "Token QR rotatorio caducado"}
     }
 )
 @api_view(['POST'])
@@ -132,32 +420,162 @@ def attendance_checkin_qr(request):
     if not token or not student_id:
         return Response({"error": "token y student_id requeridos"}, status=400)
 
-    clazz = get_object_or_404(Class, qr_token=token)
+    try:
+        clazz = resolve_class_token(token)
+    except TokenExpired as e:
+        return Response({"error": str(e)}, status=410)
+    # Escaneo repetido o reintento: la respuesta original, sin tocar la BD (core.debounce)
+    idempotency_key = request.headers.get("Idempotency-Key")
+    previous = previous_result(student_id, clazz.pk, idempotency_key)
+    if previous is not None:
+        return Response(previous[1], status=previous[0])
     student = get_object_or_404(Student, pk=student_id)
 
-    today = timezone.now().date()
-    att = Attendance.objects.filter(
-        student=student,
-        clazz=clazz,
-        date=today,
-        check_out__isnull=True
-    ).first()
-
-    if att:
-        att.check_out = timezone.now()
-        att.save()
-        return Response({"success": True, "action": "check_out"})
+    now = timezone.now()
+    try:
+        action = toggle_attendance(clazz, student.pk, method="qr", now=now)
+    except CheckinRejected as e:
+        code, body = e.status, {"error": str(e)}
     else:
-        Attendance.objects.create(student=student, clazz=clazz, method="qr")
-        return Response({"success": True, "action": "check_in"})
+        code, body = 200, {"success": True, "action": action, "session": timetable.session(clazz.pk, now)}
+    remember_result(student_id, clazz.pk, idempotency_key, code, body)
+    return Response(body, status=code)
+
+
+@extend_schema(
+    summary="Sincronización offline de escaneos (kioscos)",
+    description="Recibe en bloque los escaneos que un kiosko acumuló sin conexión. "
+                "Los check-in/check-out se emparejan por orden de scanned_at y se "
+                "guardan en una sola transacción. Devuelve un resultado por evento.",
+    request={
+        "application/json": {
+            "type": "object",
+            "properties": {
+                "events": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "token": {"type": "string", "description": "UUID de la clase o token QR firmado"},
+                            "student_id": {"type": "integer", "example": 1},
+                            "scanned_at": {"type": "string", "format": "date-time"},
+                        },
+                        "required": ["token", "student_id", "scanned_at"],
+                    },
+                }
+            },
+            "required": ["events"]
+        }
+    },
+    responses={
+        200: {
+            "type": "object",
+            "properties": {
+                "results": {"type": "array", "items": {"type": "object"}}
+            },
+            "example": {"results": [
+                {"index": 0, "success": True, "action": "check_in"},
+                {"index": 1, "success": False, "error": "token desconocido"},
+            ]}
+        },
+        400: {"description": "Falta la lista de eventos o supera el máximo"}
+    }
+)
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def attendance_sync(request):
+    events = request.data.get("events")
+    if not isinstance(events, list):
+        return Response({"error": "events requerido"}, status=400)
+    if len(events) > settings.ATTENDANCE_SYNC_MAX_EVENTS:
+        return Response(
+            {"error": f"máximo {settings.ATTENDANCE_SYNC_MAX_EVENTS} eventos por petición"},
+            status=400,
+        )
+    return Response({"results": sync_scans(events)})
+
+
+@extend_schema(
+    summary="Estadísticas de asistencia por clase",
+    description="Asistencia diaria de una clase (check-ins, puntuales, minutos presentes) "
+                "leída de los resúmenes incrementales, sin recorrer Attendance.",
+    parameters=[
+        OpenApiParameter(name="from", location=OpenApiParameter.QUERY, required=False, description="Fecha desde (YYYY-MM-DD)"),
+        OpenApiParameter(name="to", location=OpenApiParameter.QUERY, required=False, description="Fecha hasta (YYYY-MM-DD)"),
+    ],
+    responses={
+        200: {
+            "type": "object",
+            "example": {
+                "class": 1,
+                "totals": {"headcount": 25, "on_time": 20, "minutes": 1250},
+                "days": [{"date": "2025-09-15", "headcount": 25, "on_time": 20, "minutes": 1250}],
+            }
+        },
+        404: {"description": "Clase inexistente"},
+    }
+)
+@api_view(['GET'])
+def class_stats(request, pk):
+    clazz = get_object_or_404(Class, pk=pk)
+    qs = ClassDayStats.objects.filter(clazz=clazz)
+    date_from, date_to = _parse_date_param(request.GET, "from"), _parse_date_param(request.GET, "to")
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+
+    days = list(qs.order_by("date").values("date", "headcount", "on_time", "minutes"))
+    totals = {key: sum(day[key] for day in days) for key in ("headcount", "on_time", "minutes")}
+    return Response({"class": clazz.pk, "totals": totals, "days": days})
+
+
+@extend_schema(
+    summary="Estadísticas de asistencia por alumno",
+    description="Por cada clase del alumno: sesiones asistidas, puntuales, minutos y "
+                "tasa de asistencia sobre los días con clase registrados.",
+    responses={
+        200: {
+            "type": "object",
+            "example": {
+                "student": 1,
+                "classes": [{"clazz": 1, "sessions": 10, "on_time": 8, "minutes": 500,
+                             "sessions_held": 12, "attendance_rate": 0.833}],
+            }
+        },
+        404: {"description": "Alumno inexistente"},
+    }
+)
+@api_view(['GET'])
+def student_stats(request, pk):
+    student = get_object_or_404(Student, pk=pk)
+    rows = list(
+        StudentClassStats.objects.filter(student=student)
+        .order_by("clazz_id").values("clazz", "sessions", "on_time", "minutes")
+    )
+    held = dict(
+        ClassDayStats.objects.filter(clazz_id__in=[r["clazz"] for r in rows])
+        .values("clazz_id").annotate(n=Count("id")).values_list("clazz_id", "n")
+    )
+    for row in rows:
+        row["sessions_held"] = held.get(row["clazz"], 0)
+        row["attendance_rate"] = (
+            round(row["sessions"] / row["sessions_held"], 3) if row["sessions_held"] else None
+        )
+    return Response({"student": student.pk, "classes": rows})
 
 
 @extend_schema(
     summary="Exportar asistencias a CSV",
-    description="Devuelve un archivo CSV con asistencias filtradas por alumno, clase y rango de fechas.",
+    description=(
+        "Devuelve un archivo CSV con asistencias filtradas por alumno, clase y rango de fechas. "
+        "Incluye las de cursos anteriores ya archivadas."
+    ),
     parameters=[
-        OpenApiParameter(name="student", location=OpenApiParameter.QUERY, required=False, description="Nombre o apellido del alumno"),
-        OpenApiParameter(name="class", location=OpenApiParameter.QUERY, required=False, description="Nombre de la clase"),
+        OpenApiParameter(name="student", location=OpenApiParameter.QUERY, required=False,
+                         description="Nombre o apellidos del alumno (prefijos de palabra, sin acentos ni mayúsculas)"),
+        OpenApiParameter(name="class", location=OpenApiParameter.QUERY, required=False,
+                         description="Nombre de la clase (prefijos de palabra, sin acentos ni mayúsculas)"),
         OpenApiParameter(name="from", location=OpenApiParameter.QUERY, required=False, description="Fecha desde (YYYY-MM-DD)"),
         OpenApiParameter(name="to", location=OpenApiParameter.QUERY, required=False, description="Fecha hasta (YYYY-MM-DD)"),
     ],
@@ -173,32 +591,30 @@ def attendance_export_excel(request):
     date_from    = request.GET.get("from")
     date_to      = request.GET.get("to")
 
-    qs = Attendance.objects.select_related("student", "clazz")
+    def filtered(model):
+        qs = model.objects.all()
+        if student_name:
+            qs = qs.filter(student__in=search_students(student_name).values("pk"))
+        if class_name:
+            qs = qs.filter(clazz__in=search_classes(class_name).values("pk"))
+        if date_from:
+            qs = qs.filter(date__gte=date_from)
+        if date_to:
+            qs = qs.filter(date__lte=date_to)
+        return qs.values_list(
+            "clazz__name", "student__first_name", "student__last_name",
+            "check_in", "check_out", "method",
+        ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
 
-    if student_name:
-        qs = qs.filter(
-            Q(student__first_name__icontains=student_name) |
-            Q(student__last_name__icontains=student_name)
+    # Tabla caliente y archivo (core.archive); con un rango solo del curso actual,
+    # la consulta al archivo no encuentra nada en su índice de fechas
+    rows = (
+        (clazz_name, f"{first_name} {last_name}", check_in, check_out or "", method)
+        for clazz_name, first_name, last_name, check_in, check_out, method in itertools.chain(
+            filtered(Attendance), filtered(ArchivedAttendance),
         )
-    if class_name:
-        qs = qs.filter(clazz__name__icontains=class_name)
-    if date_from:
-        qs = qs.filter(date__gte=date_from)
-    if date_to:
-        qs = qs.filter(date__lte=date_to)
-
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename=asistencias.csv'
-    writer = csv.writer(response)
-    writer.writerow(['Clase', 'Alumno', 'Check-in', 'Check-out', 'Método'])
-
-    for a in qs:
-        writer.writerow([
-            a.clazz.name,
-            f"{a.student.first_name} {a.student.last_name}",
-            a.check_in,
-            a.check_out or "",
-            a.method
-        ])
-
-    return response
+    )
+    return stream_csv(
+        request, "asistencias.csv",
+        ['Clase', 'Alumno', 'Check-in', 'Check-out', 'Método'], rows,
+    )
@@ -0,0 +1,61 @@
+"""
+Transacciones de escritura para SQLite con varios workers.
+
+SQLite admite un solo escritor a la vez. Con SQLITE_HIGH_CONCURRENCY la
+conexión usa WAL (los lectores no bloquean al escritor) y ``BEGIN IMMEDIATE``
+(el bloqueo se pide al empezar y se espera hasta SQLITE_BUSY_TIMEOUT, en vez
+de fallar al promocionar una lectura a escritura). Encima de eso:
+
+- ``write_transaction`` pone en cola las escrituras de los hilos del mismo
+  proceso (un solo escritor por proceso), así solo compiten los procesos.
+- Si aun así la base sigue bloqueada, reintenta la transacción completa
+  SQLITE_WRITE_RETRIES veces con espera exponencial.
+
+En otros motores solo abre la transacción.
+"""
+import contextlib
+import functools
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+_writer = threading.RLock()
+
+
+def is_locked_error(exc):
+    return isinstance(exc, OperationalError) and (
+        "locked" in str(exc) or "busy" in str(exc)
+    )
+
+
+def write_transaction(func):
+    """Ejecuta ``func`` en una transacción atómica serializada y reintentable."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if connection.vendor != "sqlite":
+            with transaction.atomic():
+                return func(*args, **kwargs)
+        if connection.in_atomic_block:
+            # Dentro de una transacción ajena: no se puede reintentar aquí
+            with transaction.atomic():
+                return func(*args, **kwargs)
+
+        retries = settings.SQLITE_WRITE_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                with _queue(), transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as e:
+                if not is_locked_error(e) or attempt == retries:
+                    raise
+            time.sleep(0.05 * 2 ** attempt * (1 + random.random()))
+
+    return wrapper
+
+
+def _queue():
+    return _writer if settings.SQLITE_HIGH_CONCURRENCY else contextlib.nullcontext()
@@ -1,6 +1,18 @@
 """
 ASGI config for qrclassmanager project.
 Expone la variable ``application`` a los servidores ASGI.
+
+Modo ASGI (picos de escaneos): con ``ASYNC_CHECKIN=True`` las rutas de
+check-in (``/api/attendance/checkin_qr/`` y ``/api/classes/<id>/checkin/``)
+las atienden vistas ``async`` (core.async_views), de modo que cada worker
+mantiene muchas peticiones en vuelo en lugar de una. El resto del API sigue
+siendo DRF síncrono y Django lo ejecuta en su pool de hilos.
+
+    ASYNC_CHECKIN=True gunicorn qrclassmanager.asgi:application \\
+        -k uvicorn.workers.UvicornWorker --workers 2
+
+o, en desarrollo, ``ASYNC_CHECKIN=True uvicorn qrclassmanager.asgi:application``.
+Para comparar con los workers síncronos: ``loadtest_checkin`` (core/management).
 """
 
 import os
@@ -9,3 +21,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "qrclassmanager.settings")
 
 application = get_asgi_application()
+
+# Check-out automático de sesiones terminadas en un hilo del worker (ATTENDANCE_AUTO_CHECKOUT)
+from core.autocheckout import start_scheduler  # noqa: E402
+
+start_scheduler()
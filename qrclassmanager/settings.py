@@ -35,6 +35,7 @@ INSTALLED_APPS = [
 # Middleware
 # ------------------------------------------------------------------
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",  # primero: mide la petición completa (/metrics)
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # estáticos en prod
     "django.middleware.security.SecurityMiddleware",
@@ -78,6 +79,24 @@ DATABASES = {
     }
 }
 
+# SQLite con varios workers: WAL, BEGIN IMMEDIATE con espera acotada y
+# escrituras en cola por proceso (ver core/writes.py)
+SQLITE_HIGH_CONCURRENCY = os.environ.get("SQLITE_HIGH_CONCURRENCY", "False") == "True"
+SQLITE_BUSY_TIMEOUT = float(os.environ.get("SQLITE_BUSY_TIMEOUT", "5"))  # segundos esperando el bloqueo
+SQLITE_WRITE_RETRIES = int(os.environ.get("SQLITE_WRITE_RETRIES", "3"))  # reintentos si aun así sigue bloqueada
+if SQLITE_HIGH_CONCURRENCY:
+    DATABASES["default"]["OPTIONS"] = {
+        "transaction_mode": "IMMEDIATE",
+        "timeout": SQLITE_BUSY_TIMEOUT,
+        "init_command": (
+            "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; "
+            "PRAGMA cache_size=-32000; PRAGMA mmap_size=268435456; PRAGMA temp_store=MEMORY"
+        ),
+    }
+# Conexiones persistentes (segundos); dejar a 0 con ASGI
+DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", "0"))
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = DATABASES["default"]["CONN_MAX_AGE"] > 0
+
 # ------------------------------------------------------------------
 # Validadores de contraseña
 # ------------------------------------------------------------------
@@ -133,3 +152,104 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "0.1",
     "SERVE_INCLUDE_SCHEMA": False,
 }
+
+# ------------------------------------------------------------------
+# Check-in / QR
+# ------------------------------------------------------------------
+QR_TOKEN_CACHE_SIZE = int(os.environ.get("QR_TOKEN_CACHE_SIZE", "1024"))  # Class cacheadas por proceso
+QR_TOKEN_REFRESH_SECONDS = 30  # cada cuánto se revisa si otro proceso cambió clases o aulas
+
+# QR rotatorios firmados con SECRET_KEY (ver core.qrtokens): se verifican sin consultar la BD
+QR_ROTATING_TOKENS = os.environ.get("QR_ROTATING_TOKENS", "False") == "True"
+QR_STATIC_TOKENS = os.environ.get("QR_STATIC_TOKENS", "True") == "True"  # acepta también el UUID fijo de la clase
+QR_ROTATION_SECONDS = int(os.environ.get("QR_ROTATION_SECONDS", "30"))  # vida de cada QR mostrado
+QR_ROTATION_GRACE_WINDOWS = int(os.environ.get("QR_ROTATION_GRACE_WINDOWS", "1"))  # ventanas anteriores aún aceptadas
+
+# Escritura diferida de escaneos: se aceptan en memoria y se vuelcan en bloque
+ATTENDANCE_BUFFERED_INGEST = os.environ.get("ATTENDANCE_BUFFERED_INGEST", "False") == "True"
+ATTENDANCE_FLUSH_INTERVAL_MS = int(os.environ.get("ATTENDANCE_FLUSH_INTERVAL_MS", "200"))
+ATTENDANCE_FLUSH_MAX_EVENTS = int(os.environ.get("ATTENDANCE_FLUSH_MAX_EVENTS", "500"))
+ATTENDANCE_SYNC_MAX_EVENTS = int(os.environ.get("ATTENDANCE_SYNC_MAX_EVENTS", "10000"))  # por petición de kiosko
+ATTENDANCE_SYNC_MAX_AGE_HOURS = int(os.environ.get("ATTENDANCE_SYNC_MAX_AGE_HOURS", "72"))  # escaneos offline más antiguos se rechazan
+
+# Antirrebote de escaneos repetidos y reintentos con Idempotency-Key (ver core.debounce); 0 desactiva cada uno
+ATTENDANCE_DEBOUNCE_SECONDS = int(os.environ.get("ATTENDANCE_DEBOUNCE_SECONDS", "2"))
+ATTENDANCE_IDEMPOTENCY_SECONDS = int(os.environ.get("ATTENDANCE_IDEMPOTENCY_SECONDS", "300"))  # respuestas por Idempotency-Key
+ATTENDANCE_DEBOUNCE_MAX_ENTRIES = int(os.environ.get("ATTENDANCE_DEBOUNCE_MAX_ENTRIES", "50000"))  # por proceso
+
+# ------------------------------------------------------------------
+# Exportaciones CSV (streaming)
+# ------------------------------------------------------------------
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "2000"))  # filas por lectura del cursor
+EXPORT_GZIP = os.environ.get("EXPORT_GZIP", "True") == "True"  # gzip al vuelo si el cliente lo acepta
+
+# ------------------------------------------------------------------
+# Generación de QR
+# ------------------------------------------------------------------
+QR_RENDER_ASYNC = os.environ.get("QR_RENDER_ASYNC", "True") == "True"  # False: en línea tras el commit
+QR_RENDER_WORKERS = int(os.environ.get("QR_RENDER_WORKERS", "2"))
+QR_SHEET_WORKERS = int(os.environ.get("QR_SHEET_WORKERS", "2"))  # procesos para hojas imprimibles
+QR_SHEET_CACHE_SIZE = 512           # carteles PNG por (payload, rótulo, tamaño)
+QR_SHEET_DOCUMENT_CACHE_SIZE = 16   # documentos PDF/ZIP completos
+QR_ROTATION_BATCH = int(os.environ.get("QR_ROTATION_BATCH", "120"))  # QR rotatorios renderizados por adelantado por lote
+
+# ------------------------------------------------------------------
+# Paginación por cursor (attendance / enrollments)
+# ------------------------------------------------------------------
+PAGINATION_COUNT_TTL = int(os.environ.get("PAGINATION_COUNT_TTL", "60"))  # segundos que vale un COUNT cacheado
+PAGINATION_COUNT_CACHE_SIZE = 256
+# Admin: por encima de este nº de filas (estimado), la lista sin filtros no hace COUNT(*)
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get("ADMIN_EXACT_COUNT_LIMIT", "10000"))
+
+# Listados GET por values() + JSON directo, sin ModelSerializer (misma salida)
+FAST_READ_LISTS = os.environ.get("FAST_READ_LISTS", "False") == "True"
+
+# ------------------------------------------------------------------
+# Estadísticas de asistencia
+# ------------------------------------------------------------------
+ATTENDANCE_ON_TIME_GRACE_MINUTES = int(os.environ.get("ATTENDANCE_ON_TIME_GRACE_MINUTES", "10"))
+ATTENDANCE_ENFORCE_CAPACITY = os.environ.get("ATTENDANCE_ENFORCE_CAPACITY", "True") == "True"  # rechaza check-ins con aforo completo
+
+# Respuestas de catálogos (rooms/teachers/classes) cacheadas por ETag en cada proceso
+CATALOG_CACHE_SIZE = int(os.environ.get("CATALOG_CACHE_SIZE", "256"))
+ATTENDANCE_EARLY_MINUTES = int(os.environ.get("ATTENDANCE_EARLY_MINUTES", "15"))  # check-in admitido antes del inicio
+ATTENDANCE_REJECT_OUT_OF_WINDOW = os.environ.get("ATTENDANCE_REJECT_OUT_OF_WINDOW", "False") == "True"
+TIMETABLE_REFRESH_SECONDS = 30  # cada cuánto se revisa si otro proceso cambió el horario
+ATTENDANCE_REQUIRE_ENROLLMENT = os.environ.get("ATTENDANCE_REQUIRE_ENROLLMENT", "True") == "True"  # solo alumnos con matrícula activa
+ROSTER_REFRESH_SECONDS = 30  # cada cuánto se revisa si otro proceso cambió matrículas
+
+# Check-out automático al terminar cada sesión (ver core.autocheckout)
+ATTENDANCE_AUTO_CHECKOUT = os.environ.get("ATTENDANCE_AUTO_CHECKOUT", "False") == "True"  # hilo en cada worker
+ATTENDANCE_AUTO_CHECKOUT_GRACE_MINUTES = int(os.environ.get("ATTENDANCE_AUTO_CHECKOUT_GRACE_MINUTES", "15"))  # tras el fin
+ATTENDANCE_AUTO_CHECKOUT_INTERVAL = 600  # segundos máximos entre revisiones
+
+# ------------------------------------------------------------------
+# Archivo de asistencias (ver core.archive)
+# ------------------------------------------------------------------
+# Inicio de cada curso/trimestre (MM-DD): lo anterior al actual se puede archivar
+ATTENDANCE_TERM_STARTS = os.environ.get("ATTENDANCE_TERM_STARTS", "09-01,02-01").split(",")
+ATTENDANCE_ARCHIVE_BATCH_SIZE = int(os.environ.get("ATTENDANCE_ARCHIVE_BATCH_SIZE", "5000"))  # filas por transacción
+
+# ------------------------------------------------------------------
+# Despliegue ASGI (ver qrclassmanager/asgi.py)
+# ------------------------------------------------------------------
+ASYNC_CHECKIN = os.environ.get("ASYNC_CHECKIN", "False") == "True"  # check-in con vistas async nativas
+
+# ------------------------------------------------------------------
+# Benchmarks (comando bench_suite): un JSON por ejecución para comparar versiones
+# ------------------------------------------------------------------
+BENCH_RESULTS_DIR = os.environ.get("BENCH_RESULTS_DIR", str(BASE_DIR / "bench_results"))
+
+# ------------------------------------------------------------------
+# Métricas Prometheus (/metrics, ver core/metrics.py)
+# ------------------------------------------------------------------
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True") == "True"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")  # /metrics exige "Authorization: Bearer <token>"; sin él, solo personal
+METRICS_SLOW_REQUEST_MS = int(os.environ.get("METRICS_SLOW_REQUEST_MS", "0"))  # 0: sin muestreo de SQL
+METRICS_SLOW_SQL_LIMIT = 20  # consultas más lentas que se registran por petición lenta
+
+# ------------------------------------------------------------------
+# Importación de alumnos/matrículas por CSV (core/roster.py)
+# ------------------------------------------------------------------
+ROSTER_IMPORT_CHUNK_SIZE = int(os.environ.get("ROSTER_IMPORT_CHUNK_SIZE", "1000"))  # filas por lote/transacción
+ROSTER_IMPORT_MAX_ERRORS = 1000  # errores por fila devueltos en la respuesta del API
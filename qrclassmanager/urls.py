@@ -6,12 +6,15 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import redirect  # Para redirigir la raíz (/)
 
+from core.metrics import metrics_view
+
 urlpatterns = [
     path("", lambda request: redirect("/docs/")),  # Redirige la raíz al Swagger
     path("admin/", admin.site.urls),
     path("schema/", SpectacularAPIView.as_view(), name="schema"),
     path("docs/", SpectacularSwaggerView.as_view(url_name="schema")),
     path("api/", include("core.urls")),
+    path("metrics", metrics_view),  # Prometheus
 ]
 
 # Servir archivos subidos (por ejemplo QRs) en modo desarrollo
@@ -9,3 +9,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "qrclassmanager.settings")
 
 application = get_wsgi_application()
+
+# Check-out automático de sesiones terminadas en un hilo del worker (ATTENDANCE_AUTO_CHECKOUT)
+from core.autocheckout import start_scheduler  # noqa: E402
+
+start_scheduler()